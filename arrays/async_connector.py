@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Base of the asynchronous connectors (asyncio mode).
+One event loop sends the requests of many arrays at the same time, without a
+thread by request. Needs the aiohttp module.
+"""
+
+import asyncio
+import logging
+import time
+from abc import ABCMeta, abstractmethod
+from arrays.errors import CircuitOpenError, ConfigurationError
+from arrays.metrics import get_metrics
+from arrays.throttle import Throttle
+
+try:
+    import aiohttp
+except ImportError:  # Optional dependency, only needed by the asyncio mode
+    aiohttp = None
+
+
+class ServerBusy(Exception):
+    """ The server answered 429 or 503 : try again later """
+
+
+class Prefetched(object):
+    """
+    Connector answering with the data already collected by an asynchronous
+    connector. Given to the usual inventory collectors.
+    """
+
+    def __init__(self, name: str, data: dict):
+        """
+        Constructor
+        :param name: name of the array
+        :param data: result of each method of the connector (name: data)
+        """
+        self._name = name
+        self._data = data
+
+    def __str__(self):
+        return self._name
+
+    def __getattr__(self, method):
+        if method.startswith('_') or method not in self._data:
+            raise AttributeError(method)
+        return lambda: self._data[method]
+
+
+class AsyncConnector(object, metaclass=ABCMeta):
+    """ Abstract class of the asynchronous connectors """
+
+    # Methods called by the inventory collector (coroutines)
+    methods = []
+
+    def __init__(self, name: str, concurrency: int = 100, throttle=None,
+                 headers: dict = None, auth: tuple = None, timeout: int = 600):
+        """
+        Constructor
+        :param name: name of the array (for the logs)
+        :param concurrency: maximum of requests in flight on this array
+        :param throttle: Throttle of the requests (rate, retries, adaptive
+                         concurrency), shared with the threaded connector.
+                         By default : 'concurrency' requests in flight
+        :param headers: HTTP headers of each request
+        :param auth: (user, password) for a basic authentication
+        :param timeout: timeout of a request (seconds)
+        """
+        if aiohttp is None:
+            raise ConfigurationError('The asyncio mode needs the aiohttp module')
+
+        self._name = name
+        self._concurrency = concurrency
+        self._throttle = throttle or Throttle(concurrency=concurrency)
+        self._headers = headers
+        self._auth = aiohttp.BasicAuth(*auth) if auth else None
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = None
+        self._logger = logging.getLogger('arrayxray')
+        self._metrics = get_metrics()
+
+    def __str__(self):
+        return self._name
+
+    @abstractmethod
+    def _connection_error(self, message: str):
+        """
+        Error raised when the server can't be reached, of the array type
+        :param message: message of the error
+        :return: (Exception)
+        """
+
+    async def _open(self):
+        """ Create the session in the running event loop """
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._concurrency, ssl=False)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  headers=self._headers,
+                                                  auth=self._auth,
+                                                  timeout=self._timeout)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get(self, url: str, endpoint: str):
+        """
+        Send a GET request, guarded by the throttle of the array and retried
+        with a backoff while the server is busy
+        :param url: URL of the request
+        :param endpoint: kind of request, without the IDs (for the metrics)
+        :return: (HTTP status, body of the response)
+        """
+        await self._open()
+        attempt = 0
+        while True:
+            try:
+                async with self._throttle:
+                    start = time.perf_counter()
+                    try:
+                        async with self._session.get(url) as response:
+                            text = await response.text()
+                    except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                        self._metrics.request(self._name, endpoint,
+                                              time.perf_counter() - start, error=True)
+                        raise
+                    self._metrics.request(self._name, endpoint,
+                                          time.perf_counter() - start, len(text),
+                                          error=response.status >= 400)
+                    if response.status in (429, 503):
+                        raise ServerBusy('HTTP %s' % response.status)
+                    return response.status, text
+            except (aiohttp.ClientConnectionError, ServerBusy) as error:
+                delay = self._throttle.retry_delay(attempt)
+                if delay is None:
+                    self._logger.error('%s' % error)
+                    raise self._connection_error('Problem while connecting '
+                                                 'to %s' % self)
+                self._logger.error('/!\\ RETRY FOR %s (in %.1fs)' % (url, delay))
+                await asyncio.sleep(delay)
+                attempt += 1
+            except asyncio.TimeoutError:
+                raise self._connection_error('Timeout reached')
+            except CircuitOpenError as error:
+                raise self._connection_error('%s unavailable (%s)' % (self, error))
+
+    async def prefetch(self):
+        """
+        Call all the methods of the connector at the same time
+        :return: Prefetched connector for the inventory collector
+        """
+        self._logger.info('Beginning of data extraction %s (asyncio)' % self)
+        results = await asyncio.gather(*(getattr(self, method)()
+                                         for method in self.methods))
+        self._logger.info('End of data extraction %s (asyncio)' % self)
+        return Prefetched(self._name, dict(zip(self.methods, results)))
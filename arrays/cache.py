@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+On-disk cache of the responses sent by the management servers.
+Each response is stored in a JSON file named after the hash of its URL.
+The date of the response is the modification time of the file and its last
+use is the access time : both are set explicitly by this module.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache(object):
+    """ Cache of JSON responses with a time to live and a LRU eviction """
+
+    def __init__(self, directory: str, ttl: int = 86400,
+                 max_size: int = 1073741824, refresh: bool = False):
+        """
+        Constructor
+        :param directory: where to store the responses
+        :param ttl: time to live of a response (seconds)
+        :param max_size: maximum size of the cache (bytes)
+        :param refresh: ignore the stored responses (but store the new ones)
+        """
+        self._directory = directory
+        self._ttl = ttl
+        self._max_size = max_size
+        self._refresh = refresh
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger('arrayxray')
+        self._hits = self._misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        # Size of each file, from the least recently used to the most one
+        self._entries = OrderedDict()
+        self._size = 0
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith('.json'):
+                stat = entry.stat()
+                files.append((stat.st_atime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._size += size
+
+    def __str__(self):
+        return 'ResponseCache(%s)' % self._directory
+
+    @staticmethod
+    def _filename(key: str):
+        return hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json'
+
+    def get(self, key: str):
+        """
+        Get a response from the cache
+        The file is read without holding the lock, so the hits of the workers
+        are not serialized : a file removed meanwhile is a miss.
+        :param key: URL of the request
+        :return: the response or None if missing or expired
+        """
+        name = self._filename(key)
+        path = os.path.join(self._directory, name)
+        with self._lock:
+            if self._refresh or name not in self._entries:
+                self._misses += 1
+                return None
+
+        try:
+            stored = os.path.getmtime(path)
+            expired = time.time() - stored > self._ttl
+            if not expired:
+                with open(path, 'r') as file:
+                    payload = json.load(file)
+        except OSError:
+            with self._lock:
+                self._misses += 1
+            return None
+        except ValueError:
+            expired = True  # Unreadable, removed like an expired response
+
+        if expired:
+            with self._lock:
+                self._misses += 1
+                if self._unchanged(name, stored):
+                    self._remove(name)
+            return None
+
+        # Mark the response as recently used (the date stays the same)
+        try:
+            os.utime(path, (time.time(), stored))
+        except OSError:
+            pass
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+            self._hits += 1
+        return payload
+
+    def put(self, key: str, payload):
+        """
+        Store a response in the cache
+        :param key: URL of the request
+        :param payload: JSON payload of the response
+        """
+        name = self._filename(key)
+        path = os.path.join(self._directory, name)
+        content = json.dumps(payload)
+        with self._lock:
+            try:
+                with open(path + '.tmp', 'w') as file:
+                    file.write(content)
+                os.replace(path + '.tmp', path)
+            except OSError as error:
+                self._logger.warning('Cache not updated (%s)' % error)
+                return
+
+            self._size += len(content) - self._entries.pop(name, 0)
+            self._entries[name] = len(content)
+
+            # Evict the least recently used responses
+            while self._size > self._max_size and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+
+    def _unchanged(self, name: str, stored: float):
+        """ The response wasn't replaced since its date was read (lock must be held) """
+        try:
+            return os.path.getmtime(os.path.join(self._directory, name)) == stored
+        except OSError:
+            return True
+
+    def _remove(self, name: str):
+        """ Remove a response of the cache (lock must be held) """
+        self._size -= self._entries.pop(name, 0)
+        try:
+            os.remove(os.path.join(self._directory, name))
+        except OSError:
+            pass
+
+    def log_statistics(self):
+        """ Write the usage of the cache in the debug log """
+        self._logger.debug('%s: %s hits, %s misses, %s responses (%.1f MB)' %
+                           (self, self._hits, self._misses, len(self._entries),
+                            self._size / 1048576))
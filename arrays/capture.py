@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Capture of the data sent by the arrays, and offline replay.
+A bundle is a directory with a sub-directory by array, holding the output of
+each method of its connector in a gzip file : one JSON record by line
+(<method>.jsonl.gz), or one JSON document (<method>.json.gz) for the methods
+returning a single dictionary. The replay gives this output back to the
+inventory collectors without any network.
+"""
+
+import gzip
+import json
+import logging
+import os
+from functools import wraps
+
+
+def _path(directory: str, array: str):
+    return os.path.join(directory, array)
+
+
+def replayable(directory: str, arrays):
+    """
+    Generator - Keep the arrays captured in a bundle
+    :param directory: directory of the bundle
+    :param arrays: items of ConfigFileParser.get_arrays()
+    :return: items of the arrays captured
+    """
+    for item in arrays:
+        if os.path.isdir(_path(directory, item[0])):
+            yield item
+        else:
+            logging.getLogger('arrayxray').warning('No capture of %s in %s' %
+                                                   (item[0], directory))
+
+
+class CaptureConnector(object):
+    """
+    Connector recording the output of another one while it is used
+    The records are written as they are read by the collector.
+    """
+
+    def __init__(self, connector, directory: str, array: str):
+        """
+        Constructor
+        :param connector: connector of the array (or Prefetched connector)
+        :param directory: directory of the bundle
+        :param array: name of the array in the configuration file
+        """
+        self._connector = connector
+        self._directory = _path(directory, array)
+        self._logger = logging.getLogger('arrayxray')
+        os.makedirs(self._directory, exist_ok=True)
+
+    def __str__(self):
+        return str(self._connector)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._connector, name)
+        if not name.startswith('get_') or not callable(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def capture(*args, **kwargs):
+            data = attribute(*args, **kwargs)
+            if isinstance(data, dict):
+                self._write_document(name, data)
+                return data
+            return self._write_records(name, data)
+
+        return capture
+
+    def _write_document(self, method: str, data: dict):
+        path = os.path.join(self._directory, '%s.json.gz' % method)
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as file:
+            json.dump(data, file)
+        os.replace(path + '.tmp', path)
+
+    def _write_records(self, method: str, data):
+        """ Generator - Yield the records while writing them """
+        path = os.path.join(self._directory, '%s.jsonl.gz' % method)
+        count = 0
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as file:
+            for record in data:
+                file.write(json.dumps(record))
+                file.write('\n')
+                count += 1
+                yield record
+        os.replace(path + '.tmp', path)
+        self._logger.debug('%s records of %s captured' % (count, method))
+
+
+class ReplayConnector(object):
+    """ Connector giving back the output captured on an array """
+
+    def __init__(self, directory: str, array: str):
+        """
+        Constructor
+        :param directory: directory of the bundle
+        :param array: name of the array in the configuration file
+        """
+        self._array = array
+        self._directory = _path(directory, array)
+
+    def __str__(self):
+        return '%s (replay)' % self._array
+
+    def close(self):
+        pass
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+
+        records = os.path.join(self._directory, '%s.jsonl.gz' % method)
+        document = os.path.join(self._directory, '%s.json.gz' % method)
+        if os.path.isfile(records):
+            def replay():
+                with gzip.open(records, 'rt', encoding='utf-8') as file:
+                    for line in file:
+                        yield json.loads(line)
+        elif os.path.isfile(document):
+            def replay():
+                with gzip.open(document, 'rt', encoding='utf-8') as file:
+                    return json.load(file)
+        else:
+            # Method not called during the capture (ex: VMAX-3 only methods)
+            raise AttributeError(method)
+
+        return replay
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+This module contain classes for saving data under columnar formats (Parquet
+or Arrow IPC). Each sheet is a typed file of a directory, written by batches
+of rows : no limit of rows, and the memory used is bounded by the batch size.
+Needs the pyarrow module.
+"""
+
+import os
+import logging
+from arrays.injector import Injector
+from arrays.errors import ColumnarFormatterError
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Optional dependency, only needed by this injector
+    pyarrow = None
+
+__author__ = 'Julien B.'
+
+
+class ColumnarInjector(Injector):
+    """ Format the data under a directory of Parquet or Arrow files """
+
+    formats = ['parquet', 'arrow']
+
+    def __init__(self, directory: str, filename: str, file_format: str = 'parquet',
+                 batch_size: int = 65536):
+        """Constructor
+        :param directory: Where create the inventory
+        :param filename: name of the inventory (directory of the sheets, the
+                         extension is removed : VMAX.xlsx gives VMAX/)
+        :param file_format: 'parquet' or 'arrow' (Arrow IPC file)
+        :param batch_size: rows kept in memory before being written
+        """
+        super().__init__()
+
+        if pyarrow is None:
+            raise ColumnarFormatterError('The %s format needs the pyarrow module'
+                                         % file_format)
+        if file_format not in self.formats:
+            raise ColumnarFormatterError('Unknown format %s' % file_format)
+
+        if not os.path.isdir(directory):
+            self._logger.error('Path incorrect (%s)' % directory)
+            raise ColumnarFormatterError('Path incorrect (%s)' % directory)
+
+        if not os.access(directory, os.W_OK):
+            self._logger.error('Insufficient rights on %s' % directory)
+            raise ColumnarFormatterError('Insufficient rights on %s' % directory)
+
+        self._directory = os.path.join(directory, os.path.splitext(filename)[0])
+        self._format = file_format
+        self._batch_size = batch_size
+        self._sheets = {}
+        self._logger.info('Initializing a %s inventory (%s)' %
+                          (file_format, self._directory))
+        os.makedirs(self._directory, exist_ok=True)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """ Write the last rows and close the files """
+        if not getattr(self, '_sheets', None):
+            return
+
+        self._logger.debug('Now closing the %s files' % self._format)
+        for sheet in self._sheets.values():
+            sheet.close()
+        self._sheets = {}
+
+    def save(self, *args, **kwargs):
+        name = kwargs['name']
+        data = kwargs['data']
+        if name not in self._sheets:
+            path = os.path.join(self._directory, '%s.%s' %
+                                (name.replace(' ', '_'), self._format))
+            self._sheets[name] = ColumnarSheet(path, self._format, self._batch_size)
+        self._sheets[name].add_row(data)
+
+
+class ColumnarSheet(object):
+    """
+    One sheet written in a columnar file
+    The columns and their type are chosen on the first batch of rows :
+    numbers stay numbers, lists become lists of strings and the rest is text.
+    Empty or missing values are nulls. When a later batch brings a new column
+    or a value not fitting the type of its column (int -> float -> string),
+    the rows already written are copied, batch by batch, in a new file.
+    """
+
+    def __init__(self, path: str, file_format: str, batch_size: int):
+        """ Constructor
+
+        :param path: path of the file
+        :param file_format: 'parquet' or 'arrow'
+        :param batch_size: rows kept in memory before being written
+        """
+        self._path = path
+        self._format = file_format
+        self._batch_size = batch_size
+        self._rows = []
+        self._schema = None
+        self._writer = None
+        self._logger = logging.getLogger('arrayxray')
+
+    @staticmethod
+    def _kinds(values):
+        """ Python types of the values of a column (empty values excluded) """
+        return {type(value) for value in values if value is not None and value != ''}
+
+    @classmethod
+    def _column_type(cls, values):
+        """
+        Arrow type of a column
+        :param values: values of the column in the first batch
+        :return: pyarrow.DataType (null if the values are all empty)
+        """
+        kinds = cls._kinds(values)
+        if not kinds:
+            return pyarrow.null()
+        if kinds == {bool}:
+            return pyarrow.bool_()
+        if kinds == {int}:
+            return pyarrow.int64()
+        if kinds <= {int, float}:
+            return pyarrow.float64()
+        if kinds == {list}:
+            return pyarrow.list_(pyarrow.string())
+        return pyarrow.string()
+
+    @classmethod
+    def _widen(cls, kind, values):
+        """
+        Arrow type of a column holding new values
+        :param kind: pyarrow.DataType of the column
+        :param values: values of the column in the new batch
+        :return: pyarrow.DataType (kind if all the values fit in it)
+        """
+        kinds = cls._kinds(values)
+        if not kinds:
+            return kind
+        if kind == pyarrow.null():
+            return cls._column_type(values)
+        if kind == pyarrow.bool_() and kinds == {bool}:
+            return kind
+        if kind == pyarrow.int64() and kinds == {int}:
+            return kind
+        if kind in (pyarrow.int64(), pyarrow.float64()) and kinds <= {int, float}:
+            return pyarrow.float64()
+        if kind in (pyarrow.bool_(), pyarrow.int64(), pyarrow.float64()):
+            return pyarrow.string()
+        return kind  # Text and lists of strings take any value
+
+    @staticmethod
+    def _cast(value, kind):
+        """
+        Convert a value not matching the type of its column
+        :param value: value of a cell
+        :param kind: pyarrow.DataType of the column
+        :return: converted value
+        """
+        if value is None or value == '':
+            return None
+        if kind == pyarrow.string():
+            return ', '.join(value) if isinstance(value, list) else str(value)
+        if isinstance(kind, pyarrow.ListType):
+            return [str(item) for item in value] if isinstance(value, list) else [str(value)]
+        if kind == pyarrow.float64():
+            return float(value)
+        return value
+
+    def _array(self, values, kind):
+        """ Arrow array of a column (values converted only if needed) """
+        try:
+            return pyarrow.array(values, type=kind)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, TypeError):
+            return pyarrow.array([self._cast(value, kind) for value in values],
+                                 type=kind)
+
+    def _batch(self, values, length):
+        """
+        Arrow batch of rows in the schema of the file
+        :param values: values by header
+        :param length: number of rows
+        :return: pyarrow.RecordBatch
+        """
+        arrays = [self._array(values.get(field.name, [None] * length), field.type)
+                  for field in self._schema]
+        return pyarrow.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+    def _open(self, schema):
+        """ Create the file with the given columns """
+        self._schema = schema
+        if self._format == 'parquet':
+            self._writer = pyarrow.parquet.ParquetWriter(self._path, schema)
+        else:
+            self._writer = pyarrow.ipc.new_file(self._path, schema)
+
+    def _write(self, batch):
+        """ Append a batch of rows to the file """
+        self._writer.write_table(pyarrow.Table.from_batches([batch]))
+
+    def _written(self, path):
+        """ Batches of rows of a file written by this sheet """
+        if self._format == 'parquet':
+            with pyarrow.parquet.ParquetFile(path) as source:
+                yield from source.iter_batches(batch_size=self._batch_size)
+        else:
+            with pyarrow.OSFile(path) as source:
+                reader = pyarrow.ipc.open_file(source)
+                for index in range(reader.num_record_batches):
+                    yield reader.get_batch(index)
+
+    def _migrate(self, schema):
+        """
+        Copy the rows already written in a file with new columns or types
+        :param schema: pyarrow.Schema of the new file
+        """
+        self._logger.debug('New columns or types for %s, rewriting it' % self._path)
+        self._writer.close()
+        previous = '%s.previous' % self._path
+        os.replace(self._path, previous)
+        self._open(schema)
+        for batch in self._written(previous):
+            self._write(self._batch(batch.to_pydict(), batch.num_rows))
+        os.remove(previous)
+
+    def _columns(self, rows):
+        """
+        Values of the rows by column, matched by header
+        The rows of a sheet may have different headers (ex: the capacities of
+        the VMAX arrays) : a value missing in a row is a null
+        :param rows: list of Record
+        :return: {header: values}
+        """
+        headers = rows[0].headers
+        if all(row.headers == headers for row in rows):
+            return dict(zip(headers, zip(*rows)))
+
+        headers = dict.fromkeys(header for row in rows for header in row.headers)
+        rows = [dict(zip(row.headers, row)) for row in rows]
+        return {header: [row.get(header) for row in rows] for header in headers}
+
+    def _flush(self):
+        """ Write the rows in memory as one batch """
+        if not self._rows:
+            return
+
+        rows, self._rows = self._rows, []
+        values = self._columns(rows)
+        try:
+            if self._writer is None:
+                self._open(pyarrow.schema([(header, self._column_type(column))
+                                           for header, column in values.items()]))
+            else:
+                fields = [(field.name, self._widen(field.type, values[field.name])
+                           if field.name in values else field.type)
+                          for field in self._schema]
+                fields += [(header, self._column_type(column))
+                           for header, column in values.items()
+                           if header not in self._schema.names]
+                schema = pyarrow.schema(fields)
+                if not schema.equals(self._schema):
+                    self._migrate(schema)
+            self._write(self._batch(values, len(rows)))
+        except (OSError, pyarrow.ArrowException) as error:
+            raise ColumnarFormatterError('Error while writing %s (%s)' %
+                                         (self._path, error))
+
+    def add_row(self, data):
+        """
+        Adding a new line to the sheet
+        :param data: data for the new line (Record, values by position)
+        """
+        self._rows.append(data)
+        if len(self._rows) >= self._batch_size:
+            self._flush()
+
+    def close(self):
+        """ Write the last rows and close the file """
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -2,11 +2,31 @@
 # coding: utf-8
 
 
+class CircuitOpenError(Exception):
+    def __init__(self, message):
+        Exception.__init__(self, message)
+
+
+class ColumnarFormatterError(Exception):
+    def __init__(self, message):
+        Exception.__init__(self, message)
+
+
 class ConfigurationError(Exception):
     def __init__(self, message):
         Exception.__init__(self, message)
 
 
+class InjectorProcessError(Exception):
+    def __init__(self, message):
+        Exception.__init__(self, message)
+
+
+class SQLiteFormatterError(Exception):
+    def __init__(self, message):
+        Exception.__init__(self, message)
+
+
 class SVCConnectorError(Exception):
     def __init__(self, message):
         Exception.__init__(self, message)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Concurrent fetching engine shared by the connectors.
+Send a lot of independent requests with a pool of threads and give back the
+responses in the same order as the requests.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def ordered_map(function, iterable, workers: int):
+    """
+    Generator - Apply a function on each item with a pool of threads
+    :param function: function to call on each item (one request)
+    :param iterable: items to process (may be a generator)
+    :param workers: number of threads of the pool
+    :return: results of each call, in the order of the items
+    """
+    if workers <= 1:
+        for item in iterable:
+            yield function(item)
+        return
+
+    # Never keep more than two calls by thread pending : the memory stays
+    # bounded and the input is consumed at the pace of the output
+    window = workers * 2
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for item in iterable:
+                pending.append(executor.submit(function, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Consumer gone or error raised: don't launch the pending calls
+            for future in pending:
+                future.cancel()
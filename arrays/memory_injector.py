@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+This module contain a class for keeping data in memory.
+Used to collect an array apart and write its data later in another injector.
+"""
+
+from arrays.injector import Injector
+
+
+class MemoryInjector(Injector):
+    """ Keep the data in memory, in the order of saving """
+
+    def __init__(self):
+        super().__init__()
+        self._rows = []
+
+    def __len__(self):
+        return len(self._rows)
+
+    def save(self, *args, **kwargs):
+        # The rows are Records (tuples) : no copy needed
+        self._rows.append((kwargs['name'], kwargs['data']))
+
+    def replay(self, formatter: Injector):
+        """
+        Send all the data saved to another injector
+        :param formatter: injector receiving the data
+        """
+        for name, data in self._rows:
+            formatter.save(name=name, data=data)
+        self._rows = []
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Measures of a run : where the time goes, array by array.
+- sections : for each part of an inventory (hosts, TDEVs, etc.), the time
+  spent waiting for the data (fetch), cleaning it (filter) and saving it
+  (write), and the rows written
+- endpoints : for each kind of request (REST endpoint, SVC command), the
+  number of requests, the errors, the bytes received and a histogram of the
+  latencies (time until the beginning of the response for the streamed ones)
+- timers : the other steps of the run (closing the output file, etc.)
+The measures are kept by one registry for the whole process (get_metrics),
+and written as a JSON report or as a Prometheus textfile.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from arrays.injector import Injector
+
+# Upper bounds of the latency histograms (seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+           30.0, 60.0)
+
+
+class Histogram(object):
+    """ Latencies of the requests, counted by bucket """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, rank: float):
+        """
+        Approximate quantile (upper bound of its bucket)
+        :param rank: between 0 and 1 (0.95 for the 95th percentile)
+        :return: (float) None if nothing observed
+        """
+        if not self.count:
+            return None
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank * self.count:
+                return bound
+        return self.max
+
+    def cumulative(self):
+        """ Generator - (upper bound, observations below) like Prometheus """
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class Endpoint(object):
+    """ Requests of one kind sent to an array """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency = Histogram()
+
+    def report(self):
+        return {'requests': self.requests,
+                'errors': self.errors,
+                'bytes': self.bytes,
+                'latency': {'sum': round(self.latency.sum, 6),
+                            'mean': round(self.latency.sum / self.latency.count, 6)
+                            if self.latency.count else None,
+                            'p50': self.latency.quantile(0.5),
+                            'p95': self.latency.quantile(0.95),
+                            'max': round(self.latency.max, 6),
+                            'buckets': {str(bound): count for bound, count
+                                        in self.latency.cumulative()}}}
+
+
+class Section(object):
+    """ One part of an inventory (a method of a collector) """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = perf_counter()
+        self.fetch = 0.0
+        self.write = 0.0
+        self.total = 0.0
+        self.rows = 0
+
+    def report(self):
+        # The filter is what is left : the filters are lazy generators,
+        # called between the fetch of a record and its writing
+        return {'name': self.name,
+                'fetch': round(self.fetch, 6),
+                'filter': round(max(self.total - self.fetch - self.write, 0.0), 6),
+                'write': round(self.write, 6),
+                'total': round(self.total, 6),
+                'rows': self.rows}
+
+
+class Collection(object):
+    """
+    Measures of the inventory of an array
+    Each section is measured by the thread running it. With a pipeline (see
+    arrays.pipeline), the write of a section is the time spent handing its
+    rows over to the writer, waiting while the writer is behind.
+    """
+
+    def __init__(self, array: str):
+        self.array = array
+        self.sections = []
+        self.sheets = {}  # Rows written by sheet
+        self.lock = threading.Lock()  # Sheets written by several sections
+        self._local = threading.local()
+        self._logger = logging.getLogger('arrayxray')
+
+    @property
+    def current(self):
+        return getattr(self._local, 'section', None)
+
+    @contextmanager
+    def section(self, name: str):
+        """ Measure a section of the inventory """
+        section = Section(name)
+        self._local.section = section
+        try:
+            yield section
+        finally:
+            section.total = perf_counter() - section.start
+            self._local.section = None
+            if not (section.fetch or section.rows):
+                return  # Section not available on this array
+            self.sections.append(section)
+            report = section.report()
+            self._logger.debug('  %s rows in %.2fs (fetch %.2fs, filter %.2fs, '
+                               'write %.2fs)' % (report['rows'], report['total'],
+                                                 report['fetch'], report['filter'],
+                                                 report['write']))
+
+    @contextmanager
+    def fetching(self):
+        """ Count the time of the block as waiting for data """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            section = self.current
+            if section is not None:
+                section.fetch += perf_counter() - start
+
+    def iterate(self, data):
+        """ Generator - Yield the records, counting the time to get each one """
+        iterator = iter(data)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                section = self.current
+                if section is not None:
+                    section.fetch += perf_counter() - start
+            yield item
+
+    def connector(self, connector):
+        """ Connector measuring the time waited for its data """
+        return MeasuredConnector(connector, self)
+
+    def injector(self, formatter: Injector):
+        """ Injector measuring the time of writing and counting the rows """
+        return MeasuredInjector(formatter, self)
+
+    def report(self):
+        # The sections of a pipeline end in any order
+        sections = sorted(self.sections, key=lambda section: section.start)
+        return {'sections': [section.report() for section in sections],
+                'rows': self.sheets}
+
+
+class MeasuredConnector(object):
+    """ Connector counting the time spent in the methods of another one """
+
+    def __init__(self, connector, collection: Collection):
+        self._connector = connector
+        self._collection = collection
+
+    def __str__(self):
+        return str(self._connector)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._connector, name)
+        if not name.startswith('get_') or not callable(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def measured(*args, **kwargs):
+            with self._collection.fetching():
+                data = attribute(*args, **kwargs)
+            if isinstance(data, dict):
+                return data
+            return self._collection.iterate(data)
+
+        return measured
+
+
+class MeasuredInjector(Injector):
+    """ Injector counting the time spent in the saves of another one """
+
+    def __init__(self, formatter: Injector, collection: Collection):
+        super().__init__()
+        self._formatter = formatter
+        self._collection = collection
+
+    def save(self, *args, **kwargs):
+        start = perf_counter()
+        self._formatter.save(*args, **kwargs)
+        section = self._collection.current
+        if section is not None:
+            section.write += perf_counter() - start
+            section.rows += 1
+        with self._collection.lock:
+            sheets = self._collection.sheets
+            sheets[kwargs['name']] = sheets.get(kwargs['name'], 0) + 1
+
+
+class Metrics(object):
+    """ Registry of the measures of the run """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self._collections = {}
+        self._endpoints = {}  # (array, endpoint): Endpoint
+        self._timers = {}
+
+    def collection(self, array: str):
+        """
+        Measures of the inventory of an array
+        :param array: name of the array (str of its connector)
+        :return: Collection
+        """
+        with self._lock:
+            if array not in self._collections:
+                self._collections[array] = Collection(array)
+            return self._collections[array]
+
+    def request(self, array: str, endpoint: str, latency: float,
+                size: int = 0, error: bool = False):
+        """
+        Count a request sent to an array
+        :param array: name of the array (str of its connector)
+        :param endpoint: kind of request (URI without the IDs, command)
+        :param latency: duration of the request (seconds)
+        :param size: bytes received
+        :param error: True if the request failed
+        """
+        with self._lock:
+            key = (array, endpoint)
+            if key not in self._endpoints:
+                self._endpoints[key] = Endpoint()
+            measure = self._endpoints[key]
+            measure.requests += 1
+            measure.errors += error
+            measure.bytes += size
+            measure.latency.observe(latency)
+
+    def received(self, array: str, endpoint: str, size: int):
+        """ Count the bytes of a response read after its request was counted """
+        with self._lock:
+            key = (array, endpoint)
+            if key not in self._endpoints:
+                self._endpoints[key] = Endpoint()
+            self._endpoints[key].bytes += size
+
+    @contextmanager
+    def timer(self, name: str):
+        """ Measure a step of the run (ex: 'close' of the output) """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._timers[name] = self._timers.get(name, 0.0) + \
+                                     perf_counter() - start
+
+    def report(self):
+        """ :return: (dict) all the measures of the run """
+        arrays = {}
+        with self._lock:
+            for array, collection in self._collections.items():
+                arrays[array] = collection.report()
+            for (array, endpoint), measure in sorted(self._endpoints.items()):
+                arrays.setdefault(array, {'sections': [], 'rows': {}})
+                arrays[array].setdefault('endpoints', {})[endpoint] = measure.report()
+            timers = {name: round(value, 6) for name, value in self._timers.items()}
+        return {'start': time.strftime('%Y-%m-%dT%H:%M:%S',
+                                       time.localtime(self._start)),
+                'duration': round(time.time() - self._start, 3),
+                'timers': timers,
+                'arrays': arrays}
+
+    def write_json(self, path: str):
+        """ Write the report of the run in a JSON file """
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=2)
+
+    def write_prometheus(self, path: str):
+        """
+        Write the measures in the text format of Prometheus (textfile
+        collector of the node exporter). The file is replaced atomically.
+        """
+        report = self.report()
+        lines = ['# HELP arrayxray_run_duration_seconds Duration of the run',
+                 '# TYPE arrayxray_run_duration_seconds gauge',
+                 'arrayxray_run_duration_seconds %s' % report['duration'],
+                 '# HELP arrayxray_step_seconds Duration of the other steps of the run',
+                 '# TYPE arrayxray_step_seconds gauge']
+        for name, value in report['timers'].items():
+            lines.append('arrayxray_step_seconds{step="%s"} %s' % (name, value))
+
+        lines += ['# HELP arrayxray_section_seconds Duration of each stage of a section',
+                  '# TYPE arrayxray_section_seconds gauge']
+        for array, data in report['arrays'].items():
+            for section in data['sections']:
+                for stage in ('fetch', 'filter', 'write'):
+                    lines.append('arrayxray_section_seconds{%s,stage="%s"} %s' %
+                                 (_labels(array=array, section=section['name']),
+                                  stage, section[stage]))
+
+        lines += ['# HELP arrayxray_rows_total Rows written by sheet',
+                  '# TYPE arrayxray_rows_total counter']
+        for array, data in report['arrays'].items():
+            for sheet, rows in data['rows'].items():
+                lines.append('arrayxray_rows_total{%s} %s' %
+                             (_labels(array=array, sheet=sheet), rows))
+
+        counters = [('requests', 'requests_total', 'Requests sent'),
+                    ('errors', 'request_errors_total', 'Requests in error'),
+                    ('bytes', 'response_bytes_total', 'Bytes received')]
+        for key, metric, text in counters:
+            lines += ['# HELP arrayxray_%s %s by endpoint' % (metric, text),
+                      '# TYPE arrayxray_%s counter' % metric]
+            for array, data in report['arrays'].items():
+                for endpoint, measure in data.get('endpoints', {}).items():
+                    lines.append('arrayxray_%s{%s} %s' %
+                                 (metric, _labels(array=array, endpoint=endpoint),
+                                  measure[key]))
+
+        lines += ['# HELP arrayxray_request_seconds Latency of the requests by endpoint',
+                  '# TYPE arrayxray_request_seconds histogram']
+        for array, data in report['arrays'].items():
+            for endpoint, measure in data.get('endpoints', {}).items():
+                labels = _labels(array=array, endpoint=endpoint)
+                for bound, count in measure['latency']['buckets'].items():
+                    lines.append('arrayxray_request_seconds_bucket{%s,le="%s"} %s' %
+                                 (labels, bound, count))
+                lines.append('arrayxray_request_seconds_sum{%s} %s' %
+                             (labels, measure['latency']['sum']))
+                lines.append('arrayxray_request_seconds_count{%s} %s' %
+                             (labels, measure['requests']))
+
+        with open(path + '.tmp', 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+        os.replace(path + '.tmp', path)
+
+
+def _labels(**labels):
+    """ Prometheus labels (values escaped) """
+    return ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\')
+                                 .replace('"', '\\"').replace('\n', '\\n'))
+                    for key, value in labels.items())
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """ :return: Metrics of the run (the same for the whole process) """
+    return _metrics
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Run the inventory of several arrays at the same time.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from arrays.injector import Injector
+from arrays.memory_injector import MemoryInjector
+
+
+class _Relay(Injector):
+    """
+    Injector of an inventory run in a thread
+    The data is kept in memory until the turn of the array to be written, then
+    written straight into the formatter.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._buffer = MemoryInjector()
+        self._formatter = None
+
+    def save(self, *args, **kwargs):
+        with self._lock:
+            if self._formatter is None:
+                self._buffer.save(**kwargs)
+                return
+        self._formatter.save(**kwargs)
+
+    def live(self, formatter: Injector):
+        """ Write the data kept so far, then the next data as it comes """
+        with self._lock:
+            self._buffer.replay(formatter)
+            self._formatter = formatter
+
+
+def _replay(future, relay: _Relay, formatter: Injector):
+    """
+    Write the data of an inventory into the formatter until its end
+    :param future: future of the inventory
+    :param relay: _Relay used by the inventory
+    :param formatter: final injector
+    """
+    # Data collected before an error is kept, like in sequential mode
+    relay.live(formatter)
+    future.result()  # Raise the error of the inventory (if any)
+
+
+def run_inventories(arrays, inventory, formatter: Injector, jobs: int = 1):
+    """
+    Generator - Run the inventory of each array of the configuration
+
+    With more than one job, the arrays are collected concurrently by threads.
+    The data is written into the formatter following the order of the
+    configuration file : the sheets and the rows stay in the same order than
+    a sequential run. The array being written saves its data straight into
+    the formatter, the next ones keep theirs in memory until their turn.
+
+    :param arrays: items of ConfigFileParser.get_arrays()
+    :param inventory: function(formatter, array, address, user, password)
+    :param formatter: injector where to save the data
+    :param jobs: number of arrays collected at the same time
+    :return: (array name, function to call to get the end of its inventory)
+    """
+    if jobs <= 1:
+        for item in arrays:
+            yield item[0], partial(inventory, formatter, *item)
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        tasks = []
+        for item in arrays:
+            relay = _Relay()
+            if not tasks:
+                relay.live(formatter)  # The first array is written at once
+            future = executor.submit(inventory, relay, *item)
+            tasks.append((item[0], future, relay))
+
+        try:
+            for array, future, relay in tasks:
+                yield array, partial(_replay, future, relay, formatter)
+        finally:
+            for _, future, _ in tasks:
+                future.cancel()
+
+
+class _EventLoop(object):
+    """
+    Event loop of the asyncio mode, run in a thread of its own
+    The arrays are started in the order of the configuration file. With a
+    limit of jobs, an array starts only once a previous one is written.
+    """
+
+    def __init__(self, items: list, connect, jobs: int = 0):
+        """
+        Constructor
+        :param items: items of ConfigFileParser.get_arrays()
+        :param connect: function(array, address, user, password) giving an
+                        AsyncConnector (run by a thread of the executor)
+        :param jobs: arrays fetched or waiting to be written (0 : no limit)
+        """
+        self._connect = connect
+        self._jobs = jobs
+        self.results = deque(Future() for _ in items)  # Prefetched connectors
+        # Once started, only the task of an array references its future
+        self._pending = deque(zip(items, self.results))
+        self._loop = asyncio.new_event_loop()
+        self._slots = None
+        self._main = self._loop.create_task(self._fetch_all())
+        self._thread = threading.Thread(target=self._run, name='arrayxray-asyncio',
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self._loop.run_until_complete(self._main)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.run_until_complete(self._loop.shutdown_default_executor())
+            self._loop.close()
+
+    async def _fetch(self, item, result: Future):
+        """ Collect an array, give its Prefetched connector (or the error) """
+        try:
+            connector = await self._loop.run_in_executor(None, self._connect, *item)
+            try:
+                data = await connector.prefetch()
+            finally:
+                await connector.close()
+        except Exception as error:
+            result.set_exception(error)
+        else:
+            result.set_result(data)
+
+    async def _fetch_all(self):
+        if self._jobs > 0:
+            self._slots = asyncio.Semaphore(self._jobs)
+        tasks = []
+        try:
+            while self._pending:
+                if self._slots is not None:
+                    await self._slots.acquire()
+                fetch = self._fetch(*self._pending.popleft())
+                tasks.append(self._loop.create_task(fetch))
+            await asyncio.gather(*tasks)
+        finally:
+            # Stopped : the arrays still collected give up
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def written(self):
+        """ An array is written : the next one may start """
+        if self._slots is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._slots.release)
+            except RuntimeError:  # Closed meanwhile : all the arrays are done
+                pass
+
+    def stop(self):
+        """ Cancel the collection of the arrays not written yet """
+        try:
+            self._loop.call_soon_threadsafe(self._main.cancel)
+        except RuntimeError:  # The event loop is already closed
+            pass
+        self._thread.join()
+
+
+def _write(result: Future, collect, formatter: Injector, array: str, written):
+    """
+    Write the data of an array collected by the event loop
+    :param result: future of the Prefetched connector of the array
+    :param collect: function(formatter, connector, array)
+    :param formatter: final injector
+    :param array: name of the array
+    :param written: function to call once the array is written
+    """
+    try:
+        collect(formatter, result.result(), array)  # Raise the error (if any)
+    finally:
+        written()
+
+
+def run_async_inventories(arrays, connect, collect, formatter: Injector,
+                          jobs: int = 0):
+    """
+    Generator - Run the inventory of each array of the configuration with asyncio
+
+    One event loop, in a thread of its own, sends the requests of the arrays
+    at the same time. Each array is written into the formatter, following the
+    order of the configuration file, as soon as it and the previous ones are
+    collected; then its data is released.
+
+    :param arrays: items of ConfigFileParser.get_arrays()
+    :param connect: function(array, address, user, password) giving an
+                    AsyncConnector
+    :param collect: function(formatter, connector, array) writing the
+                    inventory of a (prefetched) connector
+    :param formatter: injector where to save the data
+    :param jobs: arrays collected or waiting to be written, which stay in
+                 memory (0 : all of them)
+    :return: (array name, function to call to write its inventory)
+    """
+    items = list(arrays)
+    loop = _EventLoop(items, connect, jobs)
+    try:
+        for item in items:
+            # Only the function writing the array keeps its data
+            yield item[0], partial(_write, loop.results.popleft(), collect,
+                                   formatter, item[0], loop.written)
+    finally:
+        loop.stop()
@@ -14,6 +14,11 @@ from arrays.errors import ConfigurationError
 class ConfigFileParser(object):
     """ Validate the content of the config file """
 
+    # Optional settings of an array section (tuning of the collection) and
+    # their minimum : no limit of rate and no retry are allowed
+    integers = {'port': 1, 'workers': 1, 'pool_size': 1, 'channels': 1,
+                'rate': 0, 'retries': 0}
+
     def __init__(self, file: str):
         """
         Constructor
@@ -24,11 +29,11 @@ class ConfigFileParser(object):
 
         if not os.path.isfile(file):
             self._logger.error('Unknown file %s' % file)
-            raise ConfigurationError
+            raise ConfigurationError('Unknown file %s' % file)
 
         if not os.access(file, os.R_OK):
             self._logger.error('Insufficient rights on %s' % file)
-            raise ConfigurationError
+            raise ConfigurationError('Insufficient rights on %s' % file)
 
         self._config = configparser.ConfigParser()
 
@@ -36,7 +41,7 @@ class ConfigFileParser(object):
             self._config.read(file)
         except configparser.MissingSectionHeaderError:
             self._logger.error('Incorrect config file. Please check syntax.')
-            raise ConfigurationError
+            raise ConfigurationError('Incorrect config file')
 
         self._validate()
 
@@ -55,11 +60,21 @@ class ConfigFileParser(object):
                 if value not in self._config[section]:
                     msg = '%s not in %s section' % (value, section)
                     self._logger.error(msg)
-                    raise ConfigurationError
+                    raise ConfigurationError(msg)
 
                 if not self._config[section][value]:
                     self._logger.error('%s item cannot be empty' % value)
-                    raise ConfigurationError
+                    raise ConfigurationError('%s item cannot be empty' % value)
+
+            # Optional values that must be integers when present
+            for value, minimum in self.integers.items():
+                if value in self._config[section]:
+                    if not self._config[section][value].isdigit() or \
+                            int(self._config[section][value]) < minimum:
+                        msg = '%s must be an integer >= %s in %s section' % \
+                              (value, minimum, section)
+                        self._logger.error(msg)
+                        raise ConfigurationError(msg)
 
     def get_arrays(self):
         """ Generator - Extract the configuration items from the configuration """
@@ -70,3 +85,13 @@ class ConfigFileParser(object):
             password = self._config[section]['password']
 
             yield section, address, user, password
+
+    def get_int(self, section: str, option: str, fallback=None):
+        """
+        Get an optional integer setting of an array section
+        :param section: name of the array section
+        :param option: name of the setting
+        :param fallback: value returned if the setting is missing
+        :return: (int)
+        """
+        return self._config[section].getint(option, fallback=fallback)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Pipeline of the sections of an inventory.
+The sections (methods of a collector) run ahead in threads : each one fetches
+and filters its records, and hands its rows over by batches through a bounded
+queue. The thread of the collector writes the rows in the order of the
+sections. While a section is written, the next ones are already fetched,
+and a section stops fetching as long as its queue is full : the memory stays
+bounded whatever the size of the arrays.
+"""
+
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from queue import Full, Queue
+from arrays.injector import Injector
+
+_END = None  # End of the rows of a section
+
+
+class _Stopped(Exception):
+    """ The writing of the sections stopped (error) : give up the section """
+
+
+class Pipeline(object):
+    """ Collect the next sections of an inventory while writing the current one """
+
+    def __init__(self, formatter: Injector, depth: int = 2, batch_size: int = 1000,
+                 batches: int = 8):
+        """
+        Constructor
+        :param formatter: injector where to write the rows
+        :param depth: sections running at the same time (the one written and
+                      the next ones)
+        :param batch_size: rows handed over at once
+        :param batches: batches waiting to be written by section (then the
+                        section waits)
+        """
+        self._formatter = formatter
+        self._depth = depth
+        self._batch_size = batch_size
+        self._batches = batches
+        self._local = threading.local()  # Queue and rows of each section
+        self._stop = threading.Event()
+
+    def injector(self):
+        """ Injector to give to the sections (it hands the rows over) """
+        return PipelineInjector(self)
+
+    def save(self, name: str, data):
+        """ Keep a row of the section of the thread, hand it over by batches """
+        rows = self._local.rows
+        rows.append((name, data))
+        if len(rows) >= self._batch_size:
+            self._local.rows = []
+            self._put(rows)
+
+    def _put(self, item):
+        """ Hand a batch over, wait while the queue of the section is full """
+        while True:
+            try:
+                self._local.queue.put(item, timeout=0.5)
+                return
+            except Full:
+                if self._stop.is_set():
+                    raise _Stopped()
+
+    def _produce(self, section, queue: Queue):
+        """ Run a section in a thread of the pool """
+        self._local.queue = queue
+        self._local.rows = []
+        try:
+            section()
+        finally:
+            # Rows saved before an error are written, like in a sequential run
+            try:
+                if self._local.rows:
+                    self._put(self._local.rows)
+                self._put(_END)
+            except _Stopped:
+                pass
+
+    def _write(self, queue: Queue, future):
+        """ Write the rows of a section as they come, then raise its error """
+        while True:
+            rows = queue.get()
+            if rows is _END:
+                break
+            for name, data in rows:
+                self._formatter.save(name=name, data=data)
+        future.result()
+
+    def run(self, sections):
+        """
+        Run the sections and write their rows, in order
+        :param sections: functions saving rows into self.injector()
+        """
+        sections = iter(sections)
+        with ThreadPoolExecutor(max_workers=self._depth) as executor:
+            def start(section):
+                queue = Queue(maxsize=self._batches)
+                return queue, executor.submit(self._produce, section, queue)
+
+            running = deque(start(section)
+                            for section in itertools.islice(sections, self._depth))
+            try:
+                while running:
+                    self._write(*running.popleft())
+                    running.extend(start(section)
+                                   for section in itertools.islice(sections, 1))
+            finally:
+                # After an error, the sections still running give up
+                self._stop.set()
+
+
+class PipelineInjector(Injector):
+    """ Injector of the sections run by a Pipeline """
+
+    def __init__(self, pipeline: Pipeline):
+        super().__init__()
+        self._pipeline = pipeline
+
+    def save(self, *args, **kwargs):
+        self._pipeline.save(kwargs['name'], kwargs['data'])
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+This module contain a class for writing the inventory in a worker process.
+The rows are sent by batches through a bounded queue to a process of its
+own, where another injector (Excel workbook, SQLite database, etc.) encodes
+them. The encoding of the cells and the compression of the file don't hold
+the GIL of the process collecting the arrays.
+"""
+
+import logging
+import multiprocessing
+import queue
+from arrays.errors import InjectorProcessError
+from arrays.injector import Injector
+from arrays.schema import record_class
+
+_END = None  # No more rows : close the injector of the worker
+
+
+def _worker(factory, options: dict, level: int, batches, results):
+    """
+    Worker process - Create the injector, write the batches and close it
+    The result of the creation, then of the close, is sent back : None or
+    the error (class, message).
+    """
+    logger = logging.getLogger('arrayxray')
+    if not logger.handlers:  # The main module of the CLIs adds its own
+        logger.addHandler(logging.StreamHandler())
+    logger.setLevel(level)
+    try:
+        formatter = factory(**options)
+        results.put(None)
+        for batch in iter(batches.get, _END):
+            for name, headers, values in batch:
+                formatter.save(name=name, data=record_class(headers)(values))
+        formatter.close()
+        results.put(None)
+    except Exception as error:
+        results.put((type(error), str(error)))
+
+
+class ProcessInjector(Injector):
+    """ Send the data to an injector running in a worker process """
+
+    def __init__(self, factory, batch_size: int = 1000, batches: int = 16,
+                 **options):
+        """
+        Constructor
+        :param factory: class of the injector (XlsInjector, SQLiteInjector...)
+        :param batch_size: rows sent at once
+        :param batches: batches waiting to be written (then save waits)
+        :param options: arguments of the injector (directory, filename...)
+        """
+        super().__init__()
+        self._batch_size = batch_size
+        self._rows = []
+        # spawn : the worker doesn't inherit the threads of the collect
+        context = multiprocessing.get_context('spawn')
+        self._batches = context.Queue(maxsize=batches)
+        self._results = context.Queue()
+        self._process = context.Process(target=_worker, name='arrayxray-writer',
+                                        args=(factory, options,
+                                              self._logger.getEffectiveLevel(),
+                                              self._batches, self._results),
+                                        daemon=True)
+        self._process.start()
+        self._raise(self._result())  # The injector couldn't be created
+
+    def __del__(self):
+        # Exit on an error : the worker still closes its injector (best effort)
+        if getattr(self, '_process', None) is None:
+            return
+        try:
+            self.close()
+        except Exception:
+            pass
+        finally:
+            if self._process is not None:
+                self._process.terminate()
+                self._process = None
+
+    @staticmethod
+    def _raise(error):
+        """ Raise the error sent back by the worker, if any """
+        if error is not None:
+            error_class, message = error
+            try:
+                error = error_class(message)
+            except TypeError:  # Constructor with other arguments
+                error = InjectorProcessError('%s: %s' % (error_class.__name__, message))
+            raise error
+
+    def _result(self):
+        """ Wait for the next result of the worker """
+        while True:
+            try:
+                return self._results.get(timeout=1)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise InjectorProcessError('Writer process stopped (exit '
+                                               'code %s)' % self._process.exitcode)
+
+    def _put(self, batch):
+        """ Send a batch, wait while the worker is behind """
+        while True:
+            if not self._process.is_alive():
+                # The worker stopped on an error : raise it
+                self._raise(self._result())
+                raise InjectorProcessError('Writer process stopped (exit code '
+                                           '%s)' % self._process.exitcode)
+            try:
+                self._batches.put(batch, timeout=1)
+                return
+            except queue.Full:
+                pass
+
+    def save(self, *args, **kwargs):
+        # A Record class is created on the fly : send its headers and values
+        data = kwargs['data']
+        self._rows.append((kwargs['name'], data.headers, tuple(data)))
+        if len(self._rows) >= self._batch_size:
+            self._put(self._rows)
+            self._rows = []
+
+    def close(self):
+        """ Send the last rows, wait until the worker has closed its injector """
+        if self._process is None:
+            return
+
+        if self._rows:
+            self._put(self._rows)
+            self._rows = []
+        self._put(_END)
+        self._logger.debug('Waiting for the writer process')
+        error = self._result()
+        self._process.join()
+        self._process = None
+        self._raise(error)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Compact rows given by the filters to the injectors.
+The description of a sheet (headers, keys of the source records, converters)
+is compiled once in a Schema. Each row is then a Record : a tuple of values
+sharing the headers of its class, read by position by the injectors.
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+
+# Default value of a Schema : the keys of the source records are mandatory
+REQUIRED = object()
+
+
+class Record(tuple):
+    """ Row of a sheet : values by position, headers shared by the class """
+
+    __slots__ = ()
+    headers = ()
+
+    def value(self, header: str):
+        """
+        Get a value by its header
+        :param header: header of the column
+        :return: value of the column
+        """
+        return self[self.headers.index(header)]
+
+    def as_dict(self):
+        return OrderedDict(zip(self.headers, self))
+
+
+@lru_cache(maxsize=None)
+def record_class(headers: tuple):
+    """
+    Class of the rows having these headers (one class by sheet)
+    :param headers: headers of the columns, in order
+    :return: subclass of Record
+    """
+    return type('Record', (Record,), {'__slots__': (), 'headers': headers})
+
+
+def fields(keys: list, header=str.capitalize):
+    """
+    Columns copying the values of the source records as is
+    :param keys: keys of the source records
+    :param header: function giving the header of a key
+    :return: list of (header, key, converter) for a Schema
+    """
+    return [(header(key), key, None) for key in keys]
+
+
+class Schema(object):
+    """ Compiled description of the rows of a sheet """
+
+    def __init__(self, columns: list, constants: tuple = (), default=REQUIRED):
+        """
+        Constructor
+        :param columns: list of (header, key, converter)
+                        converter None : the value is kept as is
+                        key None : the converter receives the whole record
+        :param constants: headers of the first columns, filled with values
+                          given by the collector (ex: name of the system)
+        :param default: value of the keys missing in a source record
+        """
+        self.headers = tuple(constants) + tuple(column[0] for column in columns)
+        self.record = record_class(self.headers)
+        self.row = self._compile(columns, default)
+
+    def _compile(self, columns: list, default):
+        """
+        Build the function making a row out of a source record
+        Sample of body : constants + (record['id'], _convert1(record['capacity']))
+        :return: function(record, constants) returning a Record
+        """
+        namespace = {'_new': tuple.__new__, '_record': self.record,
+                     '_default': default}
+        values = []
+        for index, (_, key, converter) in enumerate(columns):
+            if key is None:
+                value = 'record'
+            elif default is REQUIRED:
+                value = 'record[%r]' % key
+            else:
+                value = 'record.get(%r, _default)' % key
+            if converter is not None:
+                namespace['_convert%s' % index] = converter
+                value = '_convert%s(%s)' % (index, value)
+            values.append(value)
+
+        source = ('def row(record, constants=()):\n'
+                  '    return _new(_record, constants + (%s,))\n' % ', '.join(values))
+        exec(source, namespace)
+        return namespace['row']
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+HTTP session shared by all the requests sent to a same management server.
+Keep the connections (and their TLS handshake) alive between requests.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PooledSession(requests.Session):
+    """ requests.Session with a pool of keep-alive connections """
+
+    def __init__(self, pool_size: int = 10):
+        """
+        Constructor
+        :param pool_size: maximum of connections opened at the same time
+        """
+        super(PooledSession, self).__init__()
+        # pool_block : threads wait for a free connection instead of opening
+        # a connection that would be thrown away after the request
+        adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=True)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        # Self-signed certificates of the arrays. REQUESTS_CA_BUNDLE has the
+        # precedence over this setting : the requests also give verify=False
+        self.verify = False
+
+    def statistics(self):
+        """
+        Count the connections opened and the requests sent by the pools
+        :return: (connections, requests)
+        """
+        connections = sent = 0
+        for adapter in set(self.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                connections += pools[key].num_connections
+                sent += pools[key].num_requests
+        return connections, sent
+
+    def log_statistics(self, logger, name: str):
+        """
+        Write the usage of the connections in the debug log
+        :param logger: logger to use
+        :param name: name of the remote equipment
+        """
+        connections, sent = self.statistics()
+        logger.debug('Connection pool of %s: %s requests, %s handshakes, '
+                     '%s connection reuses' %
+                     (name, sent, connections, max(sent - connections, 0)))
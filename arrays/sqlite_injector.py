@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+This module contain classes for saving data in a SQLite database.
+Each sheet is a table, loaded by batches of rows in transactions. The
+identifier columns (WWN, UID, host, etc.) are indexed once the load is over,
+to answer queries across arrays and sheets.
+"""
+
+import os
+import logging
+import sqlite3
+from arrays.injector import Injector
+from arrays.errors import SQLiteFormatterError
+
+__author__ = 'Julien B.'
+
+# Headers (lower case) of the columns indexed in every table
+INDEXED = {'wwn', 'wwnn', 'uid', 'vdisk_uid', 'naa', 'vpd-id', 'node-wwn',
+           'port-wwn', 'remote_wwpn', 'local_wwpn', 'initiatorid', 'hostid',
+           'hostgroupid', 'volumeid', 'storagegroupid', 'maskingviewid',
+           'portgroupid', 'poolid', 'srpid', 'mdisk_grp_name', 'vdisk_name',
+           'volume', 'storage-volume'}
+
+
+def quote(identifier: str):
+    """ Quote the name of a table or a column ("Managed disks") """
+    return '"%s"' % identifier.replace('"', '""')
+
+
+class SQLiteInjector(Injector):
+    """ Format the data under a SQLite database """
+
+    def __init__(self, directory: str, filename: str, batch_size: int = 10000):
+        """Constructor
+        :param directory: Where create the database
+        :param filename: name of the inventory (the extension is replaced by
+                         .sqlite : VMAX.xlsx gives VMAX.sqlite)
+        :param batch_size: rows inserted by transaction
+        """
+        super().__init__()
+
+        if not os.path.isdir(directory):
+            self._logger.error('Path incorrect (%s)' % directory)
+            raise SQLiteFormatterError('Path incorrect (%s)' % directory)
+
+        if not os.access(directory, os.W_OK):
+            self._logger.error('Insufficient rights on %s' % directory)
+            raise SQLiteFormatterError('Insufficient rights on %s' % directory)
+
+        # Like a workbook, the database of a previous run is replaced
+        self._path = os.path.join(directory, os.path.splitext(filename)[0] + '.sqlite')
+        self._batch_size = batch_size
+        self._tables = {}
+        self._logger.info('Initializing a SQLite database (%s)' % self._path)
+        try:
+            if os.path.isfile(self._path):
+                os.remove(self._path)
+            self._database = sqlite3.connect(self._path)
+            # The database is rebuilt at each run : no need to survive a crash
+            self._database.execute('PRAGMA journal_mode = OFF')
+            self._database.execute('PRAGMA synchronous = OFF')
+        except (OSError, sqlite3.Error) as error:
+            raise SQLiteFormatterError('Error while creating %s (%s)' %
+                                       (self._path, error))
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """ Insert the last rows, create the indexes and close the database """
+        if getattr(self, '_database', None) is None:
+            return
+
+        self._logger.debug('Now closing the database')
+        try:
+            for table in self._tables.values():
+                table.close()
+            self._database.execute('ANALYZE')
+            self._database.commit()
+            self._database.close()
+        except sqlite3.Error as error:
+            raise SQLiteFormatterError('Error while closing %s (%s)' %
+                                       (self._path, error))
+        finally:
+            self._database = None
+
+    def save(self, *args, **kwargs):
+        name = kwargs['name']
+        data = kwargs['data']
+        if name not in self._tables:
+            self._tables[name] = SQLiteTable(self._database, name, self._batch_size)
+        self._tables[name].add_row(data)
+
+
+class SQLiteTable(object):
+    """ One sheet stored in a table """
+
+    def __init__(self, database, table_name: str, batch_size: int):
+        """ Constructor
+
+        :param database: sqlite3 connection
+        :param table_name: name of the sheet
+        :param batch_size: rows inserted by transaction
+        """
+        self._database = database
+        self._name = table_name
+        self._batch_size = batch_size
+        self._columns = []
+        self._headers = None
+        self._insert = None
+        self._rows = []
+        self._logger = logging.getLogger('arrayxray')
+
+    @staticmethod
+    def _affinity(value):
+        if isinstance(value, (bool, int)):
+            return 'INTEGER'
+        if isinstance(value, float):
+            return 'REAL'
+        return 'TEXT'
+
+    @staticmethod
+    def _value(value):
+        """ Lists are stored like in the Excel sheets (joined by commas) """
+        if isinstance(value, list):
+            return ', '.join(str(item) for item in value)
+        if isinstance(value, dict):
+            return str(value)
+        return value
+
+    def _create(self, data):
+        """ Create the table, the type of each column is given by the first row """
+        self._columns = list(data.headers)
+        columns = ', '.join('%s %s' % (quote(header), self._affinity(value))
+                            for header, value in zip(data.headers, data))
+        self._database.execute('CREATE TABLE %s (%s)' % (quote(self._name), columns))
+
+    def _prepare(self, data):
+        """
+        Statement inserting the rows having the headers of this one
+        The rows of a sheet may have different headers (ex: the capacities of
+        the VMAX arrays) : the new ones are added to the table, and the
+        values are inserted by column name (missing ones are NULL)
+        """
+        if not self._columns:
+            self._create(data)
+        for header, value in zip(data.headers, data):
+            if header not in self._columns:
+                self._logger.debug('New column %s in %s' % (header, self._name))
+                self._database.execute('ALTER TABLE %s ADD COLUMN %s %s' %
+                                       (quote(self._name), quote(header),
+                                        self._affinity(value)))
+                self._columns.append(header)
+        self._headers = data.headers
+        self._insert = 'INSERT INTO %s (%s) VALUES (%s)' % (
+            quote(self._name), ', '.join(quote(header) for header in data.headers),
+            ', '.join('?' * len(data.headers)))
+
+    def _flush(self):
+        """ Insert the rows in memory in one transaction """
+        if not self._rows:
+            return
+
+        value = self._value
+        try:
+            with self._database:
+                self._database.executemany(self._insert,
+                                           ([value(item) for item in row]
+                                            for row in self._rows))
+        except sqlite3.Error as error:
+            raise SQLiteFormatterError('Error while writing %s (%s)' %
+                                       (self._name, error))
+        self._rows = []
+
+    def add_row(self, data):
+        """
+        Adding a new line to the table
+        :param data: data for the new line (Record, values by position)
+        """
+        if data.headers != self._headers:
+            # The rows in memory are inserted with the previous headers
+            self._flush()
+            self._prepare(data)
+        self._rows.append(data)
+        if len(self._rows) >= self._batch_size:
+            self._flush()
+
+    def close(self):
+        """ Insert the last rows and index the identifier columns """
+        self._flush()
+        for header in self._columns:
+            if header.lower() in INDEXED:
+                index = quote('%s_%s' % (self._name, header))
+                self._logger.debug('Indexing %s of %s' % (header, self._name))
+                self._database.execute('CREATE INDEX %s ON %s (%s)' %
+                                       (index, quote(self._name), quote(header)))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Incremental decoding of big JSON responses.
+The records of a list nested in the document are decoded one at a time, as
+the response is received : neither the whole body nor the whole tree of
+objects is ever held in memory.
+"""
+
+import codecs
+import json
+
+_WHITESPACES = ' \t\n\r'
+
+
+class JSONReader(object):
+    """ Read the JSON values of a document received in chunks of bytes """
+
+    def __init__(self, chunks):
+        """
+        Constructor
+        :param chunks: iterable of bytes (ex: Response.iter_content())
+        """
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._position = 0
+        self._eof = False
+
+    def _fill(self):
+        """
+        Append the next chunk to the buffer (the part already read is dropped)
+        :return: False at the end of the document
+        """
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            text = self._decoder.decode(b'', final=True)
+        else:
+            text = self._decoder.decode(chunk)
+        self._buffer = self._buffer[self._position:] + text
+        self._position = 0
+        return True
+
+    def _skip(self):
+        """
+        Skip the whitespaces
+        :return: next character ('' at the end of the document)
+        """
+        while True:
+            while (self._position < len(self._buffer) and
+                   self._buffer[self._position] in _WHITESPACES):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return ''
+
+    def token(self):
+        """ Consume the next structural character ({ } [ ] : ,) """
+        char = self._skip()
+        if not char:
+            raise ValueError('Unexpected end of JSON document')
+        self._position += 1
+        return char
+
+    def peek(self):
+        """ Next character, not consumed """
+        return self._skip()
+
+    def expect(self, char: str):
+        found = self.token()
+        if found != char:
+            raise ValueError('Expecting %r, found %r in JSON document' %
+                             (char, found))
+
+    def value(self):
+        """
+        Decode the next complete value (string, number, object, list, etc.)
+        :return: the decoded value
+        """
+        self._skip()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                # Incomplete value : wait for the next chunk
+                if not self._fill():
+                    raise
+                continue
+            # A number may go on in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._position = end
+            return value
+
+
+def iter_items(chunks, path: tuple, members: dict = None):
+    """
+    Generator - Yield the items of a list nested in a JSON document
+    Sample : path ('response', 'context') for {"response": {"context": [...]}}
+    :param chunks: iterable of bytes of the document
+    :param path: keys of the objects leading to the list
+    :param members: dict filled with the other members of these objects
+    :return: each item of the list (nothing if missing or null)
+    """
+    reader = JSONReader(chunks)
+    members = {} if members is None else members
+
+    def others():
+        """ Read the members of the current object up to the end of it """
+        separator = reader.token()
+        while separator == ',':
+            key = reader.value()
+            reader.expect(':')
+            members[key] = reader.value()
+            separator = reader.token()
+        if separator != '}':
+            raise ValueError('Expecting "}", found %r in JSON document' % separator)
+
+    # Go down to the list
+    depth = 0
+    for target in path:
+        reader.expect('{')
+        depth += 1
+        separator = '}' if reader.peek() == '}' else ','
+        if separator == '}':
+            reader.token()
+        while separator == ',':
+            key = reader.value()
+            reader.expect(':')
+            if key == target:
+                break
+            members[key] = reader.value()
+            separator = reader.token()
+        else:
+            # Missing key : nothing to yield
+            for _ in range(depth - 1):
+                others()
+            return
+
+    if reader.peek() == '[':
+        reader.token()
+        if reader.peek() == ']':
+            reader.token()
+        else:
+            separator = ','
+            while separator == ',':
+                yield reader.value()
+                separator = reader.token()
+            if separator != ']':
+                raise ValueError('Expecting "]", found %r in JSON document' %
+                                 separator)
+    else:
+        reader.value()  # null
+
+    # Read the members after the list (ex: the message of the response)
+    for _ in range(depth):
+        others()
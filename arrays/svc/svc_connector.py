@@ -3,21 +3,31 @@
 
 """
 Sending SSH commands to an SVC equipment (works also with FlashSystem products).
-Returning, in the most of cases, a list of dictionary for each method.
+Returning, in the most of cases, a stream of dictionary for each method.
 """
 
 import csv
+import time
 import paramiko
 from arrays.errors import SVCConnectorError
+from arrays.metrics import get_metrics
 
 
 class SVCCommunicator(object):
     """ Class used to collect information over a SSH connection """
 
-    def __init__(self, address: str, login: str, password: str):
+    def __init__(self, address: str, login: str, password: str, port: int = 22):
+        """
+        Constructor
+        :param address: IP address of the SVC
+        :param login: Username
+        :param password: Password
+        :param port: TCP port of the SSH server (by default 22)
+        """
         self._address = address
         self._user = login
         self._password = password
+        self._metrics = get_metrics()
 
         self._client = paramiko.SSHClient()
         self._client.load_system_host_keys()
@@ -25,6 +35,7 @@ class SVCCommunicator(object):
 
         try:
             self._client.connect(hostname=self._address,
+                                 port=port,
                                  username=self._user,
                                  password=self._password)
         except paramiko.ssh_exception.AuthenticationException:
@@ -43,36 +54,63 @@ class SVCCommunicator(object):
             self._client.close()
 
     def _send_command(self, command: str):
-        stdin, stdout, stderr = self._client.exec_command(command)
-        return stdout
+        """
+        Generator - Send a command and yield the lines of its output
+        The latency measured is the time until the first line
+        :param command: CLI command
+        :return: each line of the output
+        """
+        start = time.perf_counter()
+        latency = None
+        size = 0
+        error = True
+        try:
+            stdin, stdout, stderr = self._client.exec_command(command)
+            for line in stdout:
+                if latency is None:
+                    latency = time.perf_counter() - start
+                size += len(line)
+                yield line
+            error = False
+        except GeneratorExit:  # Output left by the consumer : not an error
+            error = False
+            raise
+        finally:
+            if latency is None:
+                latency = time.perf_counter() - start
+            self._metrics.request(str(self), command.split()[0], latency, size,
+                                  error=error)
+
+    def _read_rows(self, command: str):
+        """
+        Generator - Send a command and yield each row of its CSV output
+        Rows are parsed as the lines arrive : the output is never loaded
+        entirely in memory
+        :param command: CLI command (with -delim ,)
+        :return: one dictionary by row
+        """
+        yield from csv.DictReader(self._send_command(command))
 
     def get_controller(self):
-        stdout = self._send_command('lscontroller -delim ,')
-        return [line for line in csv.DictReader(stdout)]
+        return self._read_rows('lscontroller -delim ,')
 
     def get_fabric(self):
-        stdout = self._send_command('lsfabric -delim ,')
-        return [line for line in csv.DictReader(stdout)]
+        return self._read_rows('lsfabric -delim ,')
 
     def get_hosts(self):
-        stdout = self._send_command('lshost -delim ,')
-        return [line for line in csv.DictReader(stdout)]
+        return self._read_rows('lshost -delim ,')
 
     def get_mapping(self):
-        stdout = self._send_command('lshostvdiskmap -delim ,')
-        return [line for line in csv.DictReader(stdout)]
+        return self._read_rows('lshostvdiskmap -delim ,')
 
     def get_nodes(self):
-        stdout = self._send_command('lsnode -delim ,')
-        return [line for line in csv.DictReader(stdout)]
+        return self._read_rows('lsnode -delim ,')
 
     def get_mdisks(self):
-        stdout = self._send_command('lsmdisk -bytes -delim ,')
-        return [line for line in csv.DictReader(stdout)]
+        return self._read_rows('lsmdisk -bytes -delim ,')
 
     def get_mdiskgroups(self):
-        stdout = self._send_command('lsmdiskgrp -bytes -delim ,')
-        return [line for line in csv.DictReader(stdout)]
+        return self._read_rows('lsmdiskgrp -bytes -delim ,')
 
     def get_system(self):
         stdout = self._send_command('lssystem -bytes -delim ,')
@@ -80,9 +118,7 @@ class SVCCommunicator(object):
         return {line[0]: line[1] for line in reader if line}
 
     def get_users(self):
-        stdout = self._send_command('lsuser -delim ,')
-        return [line for line in csv.DictReader(stdout)]
+        return self._read_rows('lsuser -delim ,')
 
     def get_vdisks(self):
-        stdout = self._send_command('lsvdisk -bytes -delim ,')
-        return [line for line in csv.DictReader(stdout)]
+        return self._read_rows('lsvdisk -bytes -delim ,')
@@ -5,181 +5,112 @@
 These objects are going to filter the input data and only keep the interesting
 attributes. Convert of capacity units may be occur to stay more consistent
 between arrays.
+Each filter describes its rows with a Schema (see arrays.schema) and yields
+Records beginning with the name of the system.
 """
 
-import abc
-from collections import OrderedDict
+from arrays.schema import Schema, fields
 
 
-class SVCFilter(object, metaclass=abc.ABCMeta):
+def bytes_to_gb(value):
+    return int(int(value)/1073741824)
+
+
+class SVCFilter(object):
     """ Abstract class for all filters objects """
 
-    def __init__(self, data: list):
+    schema = None  # Schema of the rows, defined by each filter
+
+    def __init__(self, data, *constants):
         """
         Constructor
-        :param data: list of data to filter
+        :param data: records to filter (list or iterator)
+        :param constants: values of the first columns (name of the system)
         """
         self._data = data
-        self._f_data = []
-        self._clean()
+        self._constants = constants
+        # Lazy : each record is cleaned only when the next one is asked
+        self._f_data = self._clean()
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        try:
-            one_element = self._f_data.pop(0)
-        except IndexError:
-            raise StopIteration
-        return one_element
+        return next(self._f_data)
 
-    @staticmethod
-    def _bytes_to_gb(value):
-        return int(int(value)/1073741824)
-
-    @abc.abstractmethod
     def _clean(self):
-        raise NotImplementedError
+        """ Generator - Yield each filtered record """
+        row = self.schema.row
+        constants = self._constants
+        for to_clean in self._data:
+            yield row(to_clean, constants)
 
 
 class SVCController(SVCFilter):
 
-    def __init__(self, data):
-        super(SVCController, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            keys = ['id', 'controller_name', 'ctrl_s/n', 'vendor_id',
-                    'product_id_low', 'product_id_high', 'site_id',
-                    'site_name']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema(fields(['id', 'controller_name', 'ctrl_s/n', 'vendor_id',
+                            'product_id_low', 'product_id_high', 'site_id',
+                            'site_name']),
+                    constants=('System',))
 
 
 class SVCFabric(SVCFilter):
 
-    def __init__(self, data):
-        super(SVCFabric, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            keys = ['remote_wwpn', 'remote_nportid', 'id', 'node_name',
-                    'local_wwpn', 'local_port', 'local_nportid', 'state',
-                    'name', 'cluster_name', 'type']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema(fields(['remote_wwpn', 'remote_nportid', 'id', 'node_name',
+                            'local_wwpn', 'local_port', 'local_nportid', 'state',
+                            'name', 'cluster_name', 'type']),
+                    constants=('System',))
 
 
 class SVCHost(SVCFilter):
 
-    def __init__(self, data):
-        super(SVCHost, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            keys = ['id', 'name', 'port_count', 'iogrp_count', 'status',
-                    'site_id', 'site_name']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema(fields(['id', 'name', 'port_count', 'iogrp_count', 'status',
+                            'site_id', 'site_name']),
+                    constants=('System',))
 
 
 class SVCHostVdiskMap(SVCFilter):
 
-    def __init__(self, data):
-        super(SVCHostVdiskMap, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            keys = ['id', 'name', 'SCSI_id', 'vdisk_id', 'vdisk_name',
-                    'vdisk_UID', 'IO_group_id', 'IO_group_name']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema(fields(['id', 'name', 'SCSI_id', 'vdisk_id', 'vdisk_name',
+                            'vdisk_UID', 'IO_group_id', 'IO_group_name']),
+                    constants=('System',))
 
 
 class SVCMdisk(SVCFilter):
 
-    def __init__(self, data):
-        super(SVCMdisk, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            keys = ['id', 'name', 'status', 'mode', 'mdisk_grp_id',
-                    'mdisk_grp_name']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-
-            clean['Capacity_GB'] = self._bytes_to_gb(to_clean['capacity'])
-
-            keys = ['ctrl_LUN_#', 'controller_name', 'UID', 'tier', 'encrypt',
-                    'site_id', 'site_name']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema(fields(['id', 'name', 'status', 'mode', 'mdisk_grp_id',
+                            'mdisk_grp_name']) +
+                    [('Capacity_GB', 'capacity', bytes_to_gb)] +
+                    fields(['ctrl_LUN_#', 'controller_name', 'UID', 'tier',
+                            'encrypt', 'site_id', 'site_name']),
+                    constants=('System',))
 
 
 class SVCMdiskGroup(SVCFilter):
 
-    def __init__(self, data):
-        super(SVCMdiskGroup, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            keys = ['id', 'name', 'status', 'mdisk_count', 'vdisk_count',
-                    'extent_size']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-
-            keys = ['capacity', 'free_capacity', 'virtual_capacity',
-                    'used_capacity', 'real_capacity']
-
-            for key in keys:
-                clean[key.capitalize() + '_GB'] = self._bytes_to_gb(to_clean[key])
-
-            keys = ['overallocation', 'warning', 'easy_tier', 'easy_tier_status',
-                    'compression_active', 'parent_mdisk_grp_id',
-                    'parent_mdisk_grp_name', 'child_mdisk_grp_count',
-                    'child_mdisk_grp_capacity', 'type', 'encrypt', 'owner_type',
-                    'site_id', 'site_name']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema(fields(['id', 'name', 'status', 'mdisk_count', 'vdisk_count',
+                            'extent_size']) +
+                    [(key.capitalize() + '_GB', key, bytes_to_gb)
+                     for key in ['capacity', 'free_capacity', 'virtual_capacity',
+                                 'used_capacity', 'real_capacity']] +
+                    fields(['overallocation', 'warning', 'easy_tier',
+                            'easy_tier_status', 'compression_active',
+                            'parent_mdisk_grp_id', 'parent_mdisk_grp_name',
+                            'child_mdisk_grp_count', 'child_mdisk_grp_capacity',
+                            'type', 'encrypt', 'owner_type', 'site_id',
+                            'site_name']),
+                    constants=('System',))
 
 
 class SVCNode(SVCFilter):
 
-    def __init__(self, data):
-        super(SVCNode, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            keys = ['id', 'name', 'UPS_serial_number', 'WWNN', 'status',
-                    'IO_group_id', 'IO_group_name', 'config_node',
-                    'UPS_unique_id', 'hardware', 'iscsi_name', 'iscsi_alias',
-                    'panel_name', 'enclosure_id', 'canister_id',
-                    'enclosure_serial_number', 'site_id', 'site_name']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema(fields(['id', 'name', 'UPS_serial_number', 'WWNN', 'status',
+                            'IO_group_id', 'IO_group_name', 'config_node',
+                            'UPS_unique_id', 'hardware', 'iscsi_name',
+                            'iscsi_alias', 'panel_name', 'enclosure_id',
+                            'canister_id', 'enclosure_serial_number', 'site_id',
+                            'site_name']),
+                    constants=('System',))
 
 
 class SVCSystem(object):
@@ -190,38 +121,24 @@ class SVCSystem(object):
     processing, only a dictionary. No iterator needed.
     """
 
-    def __init__(self, data):
-        self._data = data
-        self._f_data = None
-        self._bytes_to_gb = lambda x: int(int(x) / 1073741824)
-        self._clean()
-
-    def _clean(self):
-        clean = OrderedDict()
-        keys = ['id', 'product_name', 'name', 'location', 'total_overallocation']
-
-        for key in keys:
-            clean[key.capitalize()] = self._data[key]
-
-        keys = ['total_mdisk_capacity',
-                'space_in_mdisk_grps', 'space_allocated_to_vdisks',
-                'total_free_space', 'total_vdiskcopy_capacity',
-                'total_used_capacity', 'total_vdisk_capacity',
-                'total_allocated_extent_capacity', 'compression_virtual_capacity',
-                'compression_compressed_capacity',
-                'compression_uncompressed_capacity']
+    schema = Schema(fields(['id', 'product_name', 'name', 'location',
+                            'total_overallocation']) +
+                    [(key.capitalize() + '_GB', key, bytes_to_gb)
+                     for key in ['total_mdisk_capacity', 'space_in_mdisk_grps',
+                                 'space_allocated_to_vdisks', 'total_free_space',
+                                 'total_vdiskcopy_capacity', 'total_used_capacity',
+                                 'total_vdisk_capacity',
+                                 'total_allocated_extent_capacity',
+                                 'compression_virtual_capacity',
+                                 'compression_compressed_capacity',
+                                 'compression_uncompressed_capacity']] +
+                    fields(['time_zone', 'code_level', 'email_reply',
+                            'email_contact', 'cluster_ntp_IP_address',
+                            'compression_active', 'email_organization',
+                            'email_machine_address', 'email_machine_city']))
 
-        for key in keys:
-            clean[key.capitalize() + '_GB'] = self._bytes_to_gb(self._data[key])
-
-        keys = ['time_zone', 'code_level', 'email_reply', 'email_contact',
-                'cluster_ntp_IP_address', 'compression_active',
-                'email_organization', 'email_machine_address', 'email_machine_city']
-
-        for key in keys:
-            clean[key.capitalize()] = self._data[key]
-
-        self._f_data = clean
+    def __init__(self, data):
+        self._f_data = self.schema.row(data)
 
     def clean(self):
         return self._f_data
@@ -229,41 +146,18 @@ class SVCSystem(object):
 
 class SVCUser(SVCFilter):
 
-    def __init__(self, data):
-        super(SVCUser, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            keys = ['id', 'name', 'password', 'ssh_key', 'remote',
-                    'usergrp_id', 'usergrp_name']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema(fields(['id', 'name', 'password', 'ssh_key', 'remote',
+                            'usergrp_id', 'usergrp_name']),
+                    constants=('System',))
 
 
 class SVCVdisk(SVCFilter):
 
-    def __init__(self, data):
-        super(SVCVdisk, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            keys = ['id', 'name', 'IO_group_id', 'IO_group_name', 'status',
-                    'mdisk_grp_id', 'mdisk_grp_name']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-
-            clean['Capacity_GB'] = self._bytes_to_gb(to_clean['capacity'])
-
-            keys = ['type', 'vdisk_UID', 'fc_map_count', 'copy_count',
-                    'fast_write_state', 'se_copy_count', 'RC_change',
-                    'compressed_copy_count', 'parent_mdisk_grp_id',
-                    'parent_mdisk_grp_name', 'formatting']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema(fields(['id', 'name', 'IO_group_id', 'IO_group_name', 'status',
+                            'mdisk_grp_id', 'mdisk_grp_name']) +
+                    [('Capacity_GB', 'capacity', bytes_to_gb)] +
+                    fields(['type', 'vdisk_UID', 'fc_map_count', 'copy_count',
+                            'fast_write_state', 'se_copy_count', 'RC_change',
+                            'compressed_copy_count', 'parent_mdisk_grp_id',
+                            'parent_mdisk_grp_name', 'formatting']),
+                    constants=('System',))
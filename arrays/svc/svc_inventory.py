@@ -2,6 +2,9 @@
 # coding: utf-8
 
 import logging
+from functools import partial
+from arrays.metrics import get_metrics
+from arrays.pipeline import Pipeline
 from arrays.svc.svc_connector import SVCCommunicator
 from arrays.svc.svc_filters import *
 from arrays.xls_injector import XlsInjector
@@ -10,10 +13,18 @@ from arrays.xls_injector import XlsInjector
 class SVCInventoryCollector(object):
     """ Describe how to collect information from SVC product """
 
-    def __init__(self):
+    def __init__(self, channels: int = 1):
+        """
+        Constructor
+        :param channels: number of CLI commands running at the same time, the
+                         one being written included (their output is
+                         streamed, bounded by the Pipeline)
+        """
         self._formatter = None  # Format the output
         self._svc = None  # SVC array
         self._svc_name = None
+        self._channels = channels
+        self._measures = None  # Measures of the collect
         self._logger = logging.getLogger('arrayxray')
         # This list enforce the order of collecting methods
         self._order = [self._get_system,
@@ -27,51 +38,45 @@ class SVCInventoryCollector(object):
                        self._get_node,
                        self._get_users]
 
-    def _system_first(self, dictionary):
-        dictionary['System'] = self._svc_name
-        dictionary.move_to_end('System', last=False)
+    def _section(self, collect_method):
+        """ Run a collect method as a section (_get_hosts : hosts) """
+        with self._measures.section(collect_method.__name__[5:]):
+            collect_method()
 
     def _get_controller(self):
         self._logger.info('- Extraction of Controller')
-        for controller in SVCController(self._svc.get_controller()):
+        for controller in SVCController(self._svc.get_controller(), self._svc_name):
             self._formatter.save(name='Controller', data=controller)
-            self._system_first(controller)
 
     def _get_fabric(self):
         self._logger.info('- Extraction of Fabric')
-        for fabric in SVCFabric(self._svc.get_fabric()):
+        for fabric in SVCFabric(self._svc.get_fabric(), self._svc_name):
             self._formatter.save(name='Fabric', data=fabric)
-            self._system_first(fabric)
 
     def _get_hosts(self):
         self._logger.info('- Extraction of Hosts')
-        for host in SVCHost(self._svc.get_hosts()):
+        for host in SVCHost(self._svc.get_hosts(), self._svc_name):
             self._formatter.save(name='Hosts', data=host)
-            self._system_first(host)
 
     def _get_host_map(self):
         self._logger.info('- Extraction of Host\'s mapping')
-        for link in SVCHostVdiskMap(self._svc.get_mapping()):
+        for link in SVCHostVdiskMap(self._svc.get_mapping(), self._svc_name):
             self._formatter.save(name='Mapping', data=link)
-            self._system_first(link)
 
     def _get_mdisk(self):
         self._logger.info('- Extraction of Managed Disks')
-        for disk in SVCMdisk(self._svc.get_mdisks()):
+        for disk in SVCMdisk(self._svc.get_mdisks(), self._svc_name):
             self._formatter.save(name='Managed disks', data=disk)
-            self._system_first(disk)
 
     def _get_mdisk_group(self):
         self._logger.info('- Extraction of Pools')
-        for pool in SVCMdiskGroup(self._svc.get_mdiskgroups()):
+        for pool in SVCMdiskGroup(self._svc.get_mdiskgroups(), self._svc_name):
             self._formatter.save(name='Pools', data=pool)
-            self._system_first(pool)
 
     def _get_node(self):
         self._logger.info('- Extraction of Nodes')
-        for node in SVCNode(self._svc.get_nodes()):
+        for node in SVCNode(self._svc.get_nodes(), self._svc_name):
             self._formatter.save(name='Nodes', data=node)
-            self._system_first(node)
 
     def _get_system(self):
         """
@@ -81,19 +86,17 @@ class SVCInventoryCollector(object):
         self._logger.info('- Extraction of System\'s information')
         data = SVCSystem(self._svc.get_system()).clean()
         self._formatter.save(name='System', data=data)
-        self._svc_name = data['Name']  # Memorize the system's name
+        self._svc_name = data.value('Name')  # Memorize the system's name
 
     def _get_users(self):
         self._logger.info('- Extraction of Users')
-        for user in SVCUser(self._svc.get_users()):
+        for user in SVCUser(self._svc.get_users(), self._svc_name):
             self._formatter.save(name='Users', data=user)
-            self._system_first(user)
 
     def _get_vdisk(self):
         self._logger.info('- Extraction of Vdisks')
-        for disk in SVCVdisk(self._svc.get_vdisks()):
+        for disk in SVCVdisk(self._svc.get_vdisks(), self._svc_name):
             self._formatter.save(name='Volumes', data=disk)
-            self._system_first(disk)
 
     def collect(self, formatter: XlsInjector, array: SVCCommunicator):
         """
@@ -102,11 +105,22 @@ class SVCInventoryCollector(object):
         :param array: SVC to collect
         :return:
         """
-        self._svc = array
-        self._formatter = formatter
+        self._measures = get_metrics().collection(str(array))
+        self._svc = self._measures.connector(array)
+        self._formatter = self._measures.injector(formatter)
 
         self._logger.info('Beginning of data extraction %s' % self._svc)
-        for collect_method in self._order:
-            collect_method()
+        sections = [partial(self._section, method) for method in self._order]
+        sections[0]()  # The system first : the other sections need its name
+        if self._channels <= 1:
+            for section in sections[1:]:
+                section()
+        else:
+            # Several commands run at the same time on channels of their own
+            # of the SSH connection. The sheets are still written in the same
+            # order, while the outputs of the next commands are read.
+            pipeline = Pipeline(formatter, depth=self._channels)
+            self._formatter = self._measures.injector(pipeline.injector())
+            pipeline.run(sections[1:])
 
         self._logger.info('End of data extraction %s' % self._svc)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Protect a management server from the requests of the collection.
+A Throttle combines :
+- a token bucket (maximum rate of requests)
+- an adaptive limit of requests in flight (follow the latency and errors)
+- a circuit breaker (stop sending requests to a failing server)
+- a retry policy (exponential backoff with jitter)
+It guards the threads of the connectors (with) as well as the coroutines of
+the asyncio mode (async with) : their waits don't block the event loop.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import time
+from arrays.errors import CircuitOpenError
+
+
+class TokenBucket(object):
+    """ Allow a maximum of requests by second (with some burst) """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Constructor
+        :param rate: requests by second (0 : no limit)
+        :param burst: requests allowed at once after an idle period
+        """
+        self._rate = rate
+        self._burst = max(burst, 1)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """
+        Take a token if there is one
+        :return: 0 if taken, else the seconds to wait for the next one
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens +
+                               (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self._rate
+
+    def acquire(self):
+        """ Wait until a request may be sent """
+        if not self._rate:
+            return
+
+        wait = self._take()
+        while wait:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def acquire_async(self):
+        """ Wait until a request may be sent (coroutine) """
+        if not self._rate:
+            return
+
+        wait = self._take()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take()
+
+
+def _wake(waiter):
+    """ Wake up a coroutine waiting for a slot (unless it was cancelled) """
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdaptiveLimiter(object):
+    """
+    Limit of requests in flight following the health of the server
+    Additive increase while the server answers fast, multiplicative decrease
+    on errors or slow answers (at most once by period of target latency)
+    """
+
+    def __init__(self, maximum: int, target_latency: float = 5.0):
+        """
+        Constructor
+        :param maximum: highest number of requests in flight
+        :param target_latency: answers slower than that are a sign of overload
+        """
+        self._maximum = maximum
+        self._limit = float(maximum)
+        self._target = target_latency
+        self._active = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._waiters = []  # (event loop, future) of the waiting coroutines
+        self._logger = logging.getLogger('arrayxray')
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def acquire(self):
+        """ Wait for a free slot """
+        with self._condition:
+            while self._active >= int(self._limit):
+                self._condition.wait()
+            self._active += 1
+
+    async def acquire_async(self):
+        """ Wait for a free slot (coroutine) """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._active < int(self._limit):
+                    self._active += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, latency: float, error: bool = False):
+        """
+        Free a slot and adapt the limit
+        :param latency: duration of the request (seconds)
+        :param error: the request failed
+        """
+        with self._condition:
+            self._active -= 1
+            now = time.monotonic()
+            if error or latency > self._target:
+                if now - self._last_decrease > self._target:
+                    self._last_decrease = now
+                    self._limit = max(1.0, self._limit / 2)
+                    self._logger.debug('Requests in flight limited to %s' %
+                                       self.limit)
+            elif self._limit < self._maximum:
+                self._limit = min(self._maximum, self._limit + 1 / self._limit)
+            self._condition.notify_all()
+            for loop, waiter in self._waiters:
+                loop.call_soon_threadsafe(_wake, waiter)
+            self._waiters = []
+
+
+class CircuitBreaker(object):
+    """ Stop sending requests after too many consecutive failures """
+
+    def __init__(self, threshold: int = 10, reset: float = 60.0):
+        """
+        Constructor
+        :param threshold: consecutive failures opening the circuit
+        :param reset: seconds before trying again a request
+        """
+        self._threshold = threshold
+        self._reset = reset
+        self._failures = 0
+        self._opened = None
+        self._lock = threading.Lock()
+
+    def check(self):
+        """ Raise CircuitOpenError while the circuit is open """
+        with self._lock:
+            if self._opened is None:
+                return
+            if time.monotonic() - self._opened < self._reset:
+                raise CircuitOpenError('%s consecutive failures' % self._failures)
+            # Half-open : let a request test the server
+            self._opened = None
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self._threshold:
+                self._opened = time.monotonic()
+
+
+# Start of the request of each coroutine (asyncio mode)
+_started = contextvars.ContextVar('started')
+
+
+class Throttle(object):
+    """
+    Per-server guard of the requests
+    Use it as a context manager around each request (async with in a
+    coroutine)
+    """
+
+    def __init__(self, concurrency: int = 1, rate: float = 0, retries: int = 5,
+                 backoff: float = 1.0, backoff_cap: float = 60.0,
+                 target_latency: float = 5.0, breaker_threshold: int = 10,
+                 breaker_reset: float = 60.0):
+        """
+        Constructor
+        :param concurrency: highest number of requests in flight
+        :param rate: maximum of requests by second (0 : no limit)
+        :param retries: maximum of retries of a failing request
+        :param backoff: delay before the first retry (seconds)
+        :param backoff_cap: longest delay between two retries (seconds)
+        :param target_latency: latency above which the concurrency decreases
+        :param breaker_threshold: consecutive failures opening the circuit
+        :param breaker_reset: seconds before the circuit is tried again
+        """
+        self._bucket = TokenBucket(rate, burst=concurrency)
+        self._limiter = AdaptiveLimiter(concurrency, target_latency)
+        self._breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self._retries = retries
+        self._backoff = backoff
+        self._backoff_cap = backoff_cap
+        self._local = threading.local()
+
+    def __enter__(self):
+        self._breaker.check()
+        self._bucket.acquire()
+        self._limiter.acquire()
+        self._local.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._release(time.monotonic() - self._local.start, exc_type is not None)
+        return False
+
+    async def __aenter__(self):
+        self._breaker.check()
+        await self._bucket.acquire_async()
+        await self._limiter.acquire_async()
+        _started.set(time.monotonic())
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._release(time.monotonic() - _started.get(), exc_type is not None)
+        return False
+
+    def _release(self, latency: float, error: bool):
+        """ End of a request : adapt the limit, count the failures """
+        self._limiter.release(latency, error=error)
+        if error:
+            self._breaker.failure()
+        else:
+            self._breaker.success()
+
+    def retry_delay(self, attempt: int):
+        """
+        Delay before retrying a failed request (exponential backoff with jitter)
+        :param attempt: number of the failed attempt (0 for the first one)
+        :return: seconds to wait, or None if there is no retry left
+        """
+        if attempt >= self._retries:
+            return None
+        ceiling = min(self._backoff_cap, self._backoff * 2 ** attempt)
+        return random.uniform(ceiling / 2, ceiling)
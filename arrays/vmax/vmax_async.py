@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Sending REST calls to a VMAX equipment with asyncio.
+Asynchronous counterpart of vmax_connector (same methods, as coroutines).
+"""
+
+import asyncio
+import json
+from functools import partial
+from urllib.parse import quote
+from arrays.async_connector import AsyncConnector
+from arrays.errors import VMAXConnectionError
+from arrays.vmax.vmax_connector import BaseVMAXArray, endpoint, next_range
+
+
+class AsyncVMAXArray(AsyncConnector):
+    """ Asynchronous VMAX array (VMAX-2 or VMAX-3 family) """
+
+    def __init__(self, sym_id: str, node: str, url: str, auth: tuple,
+                 concurrency: int = 100, throttle=None, cache=None, state=None,
+                 strategy: str = 'device'):
+        """
+        Constructor (use BaseVMAXArray.asynchronous)
+        :param sym_id: Symmetrix ID of the VMAX
+        :param node: 'provisioning' (VMAX-2) or 'sloprovisioning' (VMAX-3)
+        :param url: base URL of the REST API of UNISPHERE
+        :param auth: (user, password)
+        :param concurrency: maximum of requests in flight on this array
+        :param throttle: Throttle of the requests (rate, retries, adaptive
+                         concurrency)
+        :param cache: ResponseCache for the GET requests (optional)
+        :param state: TDEVState for an incremental inventory (optional)
+        :param strategy: how to collect the TDEVs ('device' or 'storagegroup',
+                         see BaseVMAXArray)
+        """
+        super(AsyncVMAXArray, self).__init__(sym_id, concurrency=concurrency,
+                                             throttle=throttle, auth=auth)
+        self._sym_id = sym_id
+        self._node = node
+        self._url = url
+        self._cache = cache
+        self._state = state
+        self._strategy = strategy
+
+        self.methods = ['get_system', 'get_thin_volumes', 'get_initiators',
+                        'get_masking_view', 'get_hosts', 'get_host_groups',
+                        'get_port_groups', 'get_storage_group']
+        if node == 'provisioning':
+            self.methods += ['get_thin_pool', 'get_fast_policy']
+        else:
+            self.methods += ['get_srp']
+
+    @property
+    def node(self):
+        return self._node
+
+    def _connection_error(self, message: str):
+        return VMAXConnectionError(message)
+
+    async def _get_request(self, request: str):
+        """
+        Send a GET request to the VMAX
+        The files of the cache are read and written by the threads of the
+        default executor, not by the event loop
+        :param request: URI of the request
+        :return: JSON payload
+        """
+        url = '/'.join([self._url, request])
+        loop = asyncio.get_running_loop()
+        if self._cache is not None:
+            data = await loop.run_in_executor(None, self._cache.get, url)
+            if data is not None:
+                self._logger.debug('---> GET %s (from cache)' % request)
+                return data
+
+        self._logger.debug('---> GET %s' % request)
+        _, text = await self._get(url, endpoint(request))
+        if 'Unauthorized' in text:
+            raise VMAXConnectionError('Authentication failure')
+
+        data = json.loads(text)
+        if self._cache is not None and BaseVMAXArray._cacheable(request, data):
+            await loop.run_in_executor(None, self._cache.put, url, data)
+        return data
+
+    async def _get_request_recursive(self, request: str, re_type: str, re_name: str):
+        """
+        Execute a request on each items on a list, all at the same time
+        :param request: URI request
+        :param re_type: resource type to find
+        :param re_name: resource name
+        :return: (list)
+        """
+        data = await self._get_request(request)
+        # if 'message' in data : no data to collect
+        if 'message' in data:
+            return []
+
+        details = await asyncio.gather(*(self._get_request('/'.join([request, item]))
+                                         for item in data[re_type]))
+        return [data[re_name][0] for data in details]
+
+    async def _get_volume_ids(self, request: str):
+        """
+        IDs of the volumes returned by a list request (pages all at once)
+        :param request: URI of the list of volumes
+        :return: list of volumes string
+        """
+        data = await self._get_request(request)
+        if 'message' in data or not data.get('count'):
+            return []
+        if data['count'] <= data['maxPageSize']:
+            return [volume['volumeId'] for volume in data['resultList']['result']]
+
+        page = 'common/Iterator/%s/page' % data['id']
+        pages = await asyncio.gather(*(self._get_request(page + '?from=%s&to=%s' %
+                                                         (from_, to_))
+                                       for from_, to_ in next_range(1, data['count'],
+                                                                    data['maxPageSize'])))
+        return [volume['volumeId'] for page in pages for volume in page['result']]
+
+    async def _get_volume(self, base_request: str, device: str):
+        """
+        Get the details of a volume (from the previous run in incremental mode)
+        :param base_request: URI of the volumes
+        :param device: volumeId
+        :return: (dict)
+        """
+        if self._state is not None:
+            volume = self._state.get(device)
+            if volume is not None:
+                return volume
+
+        data = await self._get_request('/'.join([base_request, device]))
+        volume = data['volume'][0]
+        if self._state is not None:
+            self._state.update(device, volume)
+        return volume
+
+    async def _get_storage_group_members(self):
+        """
+        Storage groups of each TDEV, all the lists at the same time
+        :return: (dict) volumeId: list of storageGroupId
+        """
+        request = '%s/symmetrix/%s/storagegroup' % (self.node, self._sym_id)
+        data = await self._get_request(request)
+        if 'message' in data:
+            return {}
+
+        base_request = '%s/symmetrix/%s/volume?tdev=true&storageGroupId=%s'
+        groups = data['storageGroupId']
+        lists = await asyncio.gather(*(self._get_volume_ids(base_request %
+                                                            (self.node, self._sym_id,
+                                                             group))
+                                       for group in groups))
+        return BaseVMAXArray._members(groups, lists)
+
+    async def _get_volume_in_groups(self, base_request: str, members: dict,
+                                    device: str):
+        """ Get the details of a volume, with its storage groups of this run """
+        return BaseVMAXArray._in_groups(await self._get_volume(base_request, device),
+                                        members.get(device, []))
+
+    async def get_fast_policy(self):
+        request = '%s/symmetrix/%s/fastpolicy' % (self.node, self._sym_id)
+        return await self._get_request_recursive(request, 'fastPolicyId', 'fastPolicy')
+
+    async def get_hosts(self):
+        request = '%s/symmetrix/%s/host' % (self.node, self._sym_id)
+        return await self._get_request_recursive(request, 'hostId', 'host')
+
+    async def get_host_groups(self):
+        request = '%s/symmetrix/%s/hostgroup' % (self.node, self._sym_id)
+        return await self._get_request_recursive(request, 'hostGroupId', 'hostGroup')
+
+    async def get_initiators(self):
+        request = '%s/symmetrix/%s/initiator' % (self.node, self._sym_id)
+        return await self._get_request_recursive(request, 'initiatorId', 'initiator')
+
+    async def get_masking_view(self):
+        request = '%s/symmetrix/%s/maskingview' % (self.node, self._sym_id)
+        return await self._get_request_recursive(request, 'maskingViewId', 'maskingView')
+
+    async def get_port_groups(self):
+        request = '%s/symmetrix/%s/portgroup' % (self.node, self._sym_id)
+        return await self._get_request_recursive(request, 'portGroupId', 'portGroup')
+
+    async def get_srp(self):
+        request = '%s/symmetrix/%s/srp' % (self.node, self._sym_id)
+        return await self._get_request_recursive(request, 'srpId', 'srp')
+
+    async def get_storage_group(self):
+        request = '%s/symmetrix/%s/storagegroup' % (self.node, self._sym_id)
+        return await self._get_request_recursive(request, 'storageGroupId', 'storageGroup')
+
+    async def get_system(self):
+        request = '%s/symmetrix/%s' % (self.node, self._sym_id)
+        return (await self._get_request(request))['symmetrix'][0]
+
+    async def get_thin_pool(self):
+        request = '%s/symmetrix/%s/thinpool' % (self.node, self._sym_id)
+        return await self._get_request_recursive(request, 'poolId', 'thinPool')
+
+    async def _check_state(self, request: str):
+        """
+        Incremental mode - Find the TDEVs changed since the previous run
+        (see BaseVMAXArray._check_state), all the lists at the same time
+        :param request: URI of the list of TDEVs (with its query parameters)
+        """
+        probes = self._state.probes()
+        if len(probes) >= len(self._state):
+            # Small array : cheaper to request each device
+            self._state.expire()
+            return
+
+        lists = await asyncio.gather(*(self._get_volume_ids('%s&%s=%s' %
+                                                            (request, attribute,
+                                                             quote(str(value))))
+                                       for attribute, value in probes))
+        for probe, listed in zip(probes, lists):
+            self._state.check(probes[probe], listed)
+
+    async def get_thin_volumes(self):
+        base_request = '%s/symmetrix/%s/volume' % (self.node, self._sym_id)
+        request = base_request + '?meta_member=false&tdev=true'
+        if self._state is not None:
+            await self._check_state(request)
+        if self._strategy == 'storagegroup':
+            # Memberships are collected in bulk, one request by storage group
+            get_volume = partial(self._get_volume_in_groups, base_request,
+                                 await self._get_storage_group_members())
+        else:
+            get_volume = partial(self._get_volume, base_request)
+
+        devices = await self._get_volume_ids(request)
+        response = await asyncio.gather(*(get_volume(device) for device in devices))
+        if self._state is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._state.save)
+        return list(response)
+
+    async def get_version(self):
+        request = 'system/version'
+        return tuple((await self._get_request(request))['version'].split('.'))
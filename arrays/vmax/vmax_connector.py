@@ -7,11 +7,20 @@ Returning, in the most of cases, a list of dictionary for each method.
 """
 
 import abc
+import itertools
 import json
 import logging
+import time
 import requests
+from functools import partial
+from urllib.parse import quote
 from requests.packages.urllib3.exceptions import InsecureRequestWarning, MaxRetryError
-from arrays.errors import VMAXConnectionError, VmaxInventoryFactoryError
+from arrays.errors import CircuitOpenError, ConfigurationError, \
+    VMAXConnectionError, VmaxInventoryFactoryError
+from arrays.fetcher import ordered_map
+from arrays.metrics import get_metrics
+from arrays.session import PooledSession
+from arrays.throttle import Throttle
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
@@ -27,36 +36,85 @@ def next_range(start, end, pagesize):
     if (end-start) < pagesize:
         yield start, end
     else:
-        values = [i for i in range(start, end, pagesize-1)]
+        values = range(start, end, pagesize-1)  # Computed on demand
+        last = len(values) - 1
         for index, value in enumerate(values):
-            if value != values[-1]:
+            if index != last:
                 yield value, values[index+1]-1
             else:
                 yield value, end
 
 
+def endpoint(request: str):
+    """
+    Kind of a request, without the IDs (for the metrics)
+    sloprovisioning/symmetrix/000197800123/volume/00A00 gives
+    sloprovisioning/symmetrix/{sid}/volume/{id}
+    :param request: URI of the request
+    :return: (str)
+    """
+    path = request.split('?')[0].split('/')
+    if path[0] == 'common':
+        return 'common/Iterator/{id}/page'
+    if len(path) > 2 and path[1] == 'symmetrix':
+        return '/'.join(['%s/symmetrix/{sid}' % path[0]] + path[3:4] +
+                        ['{id}'] * (len(path) > 4))
+    return '/'.join(path)
+
+
 class BaseVMAXArray(object, metaclass=abc.ABCMeta):
     """
     Abstract class of VMAX objects
     """
 
-    def __init__(self, sym_id: str, address: str, user: str, password: str):
+    def __init__(self, sym_id: str, address: str, user: str, password: str,
+                 workers: int = 1, pool_size: int = None, cache=None,
+                 state=None, strategy: str = 'device', throttle=None,
+                 port: int = 8443):
         """
         Constructor
         :param sym_id: Symmetrix ID of the VMAX
         :param address: IP address
         :param user: Unipshere user
         :param password: Unisphere password
+        :param workers: maximum of requests in flight on this array
+        :param pool_size: keep-alive connections to UNISPHERE (workers if None)
+        :param cache: ResponseCache for the GET requests (optional)
+        :param state: TDEVState of the previous run for an incremental
+                      inventory of the TDEVs (optional)
+        :param strategy: how to collect the TDEVs. 'device' : one request by
+                         device. 'storagegroup' : storage groups of the
+                         devices listed in bulk, other attributes reused from
+                         the previous run (needs a state)
+        :param throttle: Throttle of the requests (rate, retries, adaptive
+                         concurrency). By default : 'workers' requests in
+                         flight, no rate limit
+        :param port: TCP port of UNISPHERE (by default 8443)
         """
         self._sym_id = sym_id
         self._address = address
         self._user = user
         self._password = password
+        self._workers = workers
+        self._cache = cache
+        if strategy == 'storagegroup' and state is None:
+            # Without a previous run, every device would be requested anyway
+            raise ConfigurationError("The 'storagegroup' strategy needs the "
+                                     "state of an incremental inventory")
+        self._state = state
+        self._strategy = strategy
+        # Per-array limits, shared by all the threads sending requests
+        self._throttle = throttle or Throttle(concurrency=workers)
         self._logger = logging.getLogger('arrayxray')
+        self._metrics = get_metrics()
+
+        # All the requests reuse the same connections
+        self._session = PooledSession(pool_size or workers)
+        self._session.auth = (self._user, self._password)
 
         # Sample of UNISPHERE REST API
         # https://126.199.128.46:8443/univmax/restapi/provisioning/symmetrix/000295700220/volume/00A00
-        self._url = 'https://%s:8443/univmax/restapi' % self._address
+        self._url = 'https://%s:%s/univmax/restapi' % (self._address, port)
 
     def __str__(self):
         return self._sym_id
@@ -65,6 +123,24 @@ class BaseVMAXArray(object, metaclass=abc.ABCMeta):
     def node(self):
         raise NotImplementedError
 
+    def asynchronous(self, concurrency: int = 100):
+        """
+        Asynchronous counterpart of this array (asyncio mode, needs aiohttp)
+        :param concurrency: maximum of requests in flight on this array
+        :return: AsyncVMAXArray
+        """
+        from arrays.vmax.vmax_async import AsyncVMAXArray
+        return AsyncVMAXArray(self._sym_id, self.node, self._url,
+                              (self._user, self._password),
+                              concurrency=concurrency, throttle=self._throttle,
+                              cache=self._cache, state=self._state,
+                              strategy=self._strategy)
+
+    def close(self):
+        """ Close the connections to UNISPHERE """
+        self._session.log_statistics(self._logger, self._sym_id)
+        self._session.close()
+
     def _get_request(self, request: str):
         """
         Send a GET request to the VMAX
@@ -72,32 +148,76 @@ class BaseVMAXArray(object, metaclass=abc.ABCMeta):
         :return: JSON payload
         """
         url = '/'.join([self._url, request])
-        try:
-            self._logger.debug('---> GET %s' % request)
-            data = requests.get(url,
-                                auth=(self._user, self._password),
-                                timeout=600,
-                                verify=False)
-
-            if isinstance(data.text, str) and 'Unauthorized' in data.text:
-                raise VMAXConnectionError('Authentication failure')
-
-            data = json.loads(data.text)
-        except requests.exceptions.ConnectionError as error:
-            # If we experience a MaxRetryError, try again ! ;-)
-            # UNISPHERE may be slow to respond
-            if isinstance(error.args[0], MaxRetryError):
-                self._logger.error('/!\ RETRY FOR %s' % request)
-                return self._get_request(request)
-
-            self._logger.error('%s' % error)
-            raise VMAXConnectionError('Problem while connecting to VMAX')
-
-        except requests.exceptions.ReadTimeout:
-            raise VMAXConnectionError('Timeout reached')
+        if self._cache is not None:
+            data = self._cache.get(url)
+            if data is not None:
+                self._logger.debug('---> GET %s (from cache)' % request)
+                return data
+
+        for attempt in itertools.count():
+            try:
+                self._logger.debug('---> GET %s' % request)
+                with self._throttle:
+                    start = time.perf_counter()
+                    data = self._session.get(url, verify=False, timeout=600)
+                    self._metrics.request(self._sym_id, endpoint(request),
+                                          time.perf_counter() - start,
+                                          len(data.content),
+                                          error=data.status_code >= 400)
+                    if data.status_code in (429, 503):
+                        raise requests.exceptions.RetryError(
+                            'UNISPHERE busy (HTTP %s)' % data.status_code)
+
+                if isinstance(data.text, str) and 'Unauthorized' in data.text:
+                    raise VMAXConnectionError('Authentication failure')
+
+                data = json.loads(data.text)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.RetryError) as error:
+                if isinstance(error, requests.exceptions.ConnectionError):
+                    self._metrics.request(self._sym_id, endpoint(request),
+                                          time.perf_counter() - start, error=True)
+                # If we experience a MaxRetryError or a busy server, try again
+                # later ! ;-) UNISPHERE may be slow to respond
+                retry = (isinstance(error, requests.exceptions.RetryError) or
+                         isinstance(error.args[0], MaxRetryError))
+                delay = self._throttle.retry_delay(attempt)
+                if retry and delay is not None:
+                    self._logger.error('/!\\ RETRY FOR %s (in %.1fs)' %
+                                       (request, delay))
+                    time.sleep(delay)
+                    continue
+
+                self._logger.error('%s' % error)
+                raise VMAXConnectionError('Problem while connecting to VMAX')
+
+            except requests.exceptions.ReadTimeout:
+                self._metrics.request(self._sym_id, endpoint(request),
+                                      time.perf_counter() - start, error=True)
+                raise VMAXConnectionError('Timeout reached')
+
+            except CircuitOpenError as error:
+                raise VMAXConnectionError('UNISPHERE unavailable (%s)' % error)
 
-        else:
-            return data
+            else:
+                if self._cache is not None and self._cacheable(request, data):
+                    self._cache.put(url, data)
+                return data
+
+    @staticmethod
+    def _cacheable(request: str, data: dict):
+        """
+        Tell if a response can be kept in cache
+        UNISPHERE iterators are temporary : their pages and the lists giving
+        their ID must always be requested again. The filtered lists of volumes
+        tell what changed since the previous run : never cached either.
+        :param request: URI of the request
+        :param data: JSON payload
+        :return: (bool)
+        """
+        if request.startswith('common/Iterator') or '/volume?' in request:
+            return False
+        return not ('id' in data and data.get('count', 0) > data.get('maxPageSize', 0))
 
     def _get_request_recursive(self, request: str, re_type: str, re_name: str):
         """
@@ -107,35 +227,41 @@ class BaseVMAXArray(object, metaclass=abc.ABCMeta):
         :param re_name: resource name
         :return: (list)
         """
-        response = []
         data = self._get_request(request)
         # if 'message' in data : no data to collect
-        if 'message' not in data:
-            for item in data[re_type]:
-                data = self._get_request('/'.join([request, item]))
-                response.append(data[re_name][0])
-        return response
+        if 'message' in data:
+            return []
+
+        requests_ = ['/'.join([request, item]) for item in data[re_type]]
+        return [data[re_name][0] for data in self._fetch_all(requests_)]
+
+    def _fetch_all(self, requests_):
+        """
+        Send several GET requests concurrently (in the limit of the workers)
+        :param requests_: URIs of the requests
+        :return: generator of JSON payloads (in the order of the requests)
+        """
+        return ordered_map(self._get_request, requests_, self._workers)
 
     def _get_volumes_iterator(self, iterator: str, count: int, page_size: int):
         """
-        Deal with UNISPHERE iterators to make a list all volumes on an array
+        Generator - Deal with UNISPHERE iterators to list all volumes on an array
+        The pages are requested concurrently (in the limit of the workers) and
+        the volumes are given in order, as soon as their page is received
         :param iterator: ID of the iterator
         :param count: number of devices on array
         :param page_size: maximum size of a respond page
-        :return: list of volumes string
+        :return: volumes string
         """
         # Sample of iterator request
         # common/Iterator/4f477856-5209-46af-a040-9abeed6d31f3_0/page?from=1999&to=1999
         request = 'common/Iterator/%s/page' % iterator
-        volumes = []
-
-        for from_, to_ in next_range(1, count, page_size):
-            req_range = request + '?from=%s&to=%s' % (from_, to_)
-
-            for vol in self._get_request(req_range)['result']:
-                volumes.append(vol['volumeId'])
+        pages = (request + '?from=%s&to=%s' % (from_, to_)
+                 for from_, to_ in next_range(1, count, page_size))
 
-        return volumes
+        for page in self._fetch_all(pages):
+            for vol in page['result']:
+                yield vol['volumeId']
 
     def get_hosts(self):
         request = '%s/symmetrix/%s/host' % (self.node, self._sym_id)
@@ -165,30 +291,157 @@ class BaseVMAXArray(object, metaclass=abc.ABCMeta):
         request = '%s/symmetrix/%s' % (self.node, self._sym_id)
         return self._get_request(request)['symmetrix'][0]
 
-    def get_thin_volumes(self):
-        base_request = '%s/symmetrix/%s/volume' % (self.node, self._sym_id)
-        request = base_request + '?meta_member=false&tdev=true'
+    def _get_volume_ids(self, request: str):
+        """
+        Generator - IDs of the volumes returned by a list request
+        If there is more than one page : use an iterator
+        :param request: URI of the list of volumes (with its query parameters)
+        :return: volumes string
+        """
         data = self._get_request(request)
-        all_devices = []
-        # First of all : get the list of all volumes on the array
-        # If there is more than one page : use an iterator
+        if 'message' in data or not data.get('count'):
+            return
         if data['count'] > data['maxPageSize']:
-            all_devices = self._get_volumes_iterator(data['id'],
-                                                     data['count'],
-                                                     data['maxPageSize'])
+            yield from self._get_volumes_iterator(data['id'],
+                                                  data['count'],
+                                                  data['maxPageSize'])
         else:
             for volume in data['resultList']['result']:
-                all_devices.append(volume['volumeId'])
+                yield volume['volumeId']
+
+    def _get_storage_group_members(self):
+        """
+        Storage groups of each TDEV, with one volume list by storage group
+        :return: (dict) volumeId: list of storageGroupId
+        """
+        request = '%s/symmetrix/%s/storagegroup' % (self.node, self._sym_id)
+        data = self._get_request(request)
+        if 'message' in data:
+            return {}
+
+        base_request = '%s/symmetrix/%s/volume?tdev=true&storageGroupId=%s'
+        groups = data['storageGroupId']
+        list_group = (lambda group:
+                      list(self._get_volume_ids(base_request %
+                                                (self.node, self._sym_id, group))))
+        return self._members(groups, ordered_map(list_group, groups, self._workers))
+
+    @staticmethod
+    def _members(groups, lists):
+        """
+        Storage groups of each TDEV
+        :param groups: storageGroupId of each list
+        :param lists: volumeIds of each storage group
+        :return: (dict) volumeId: list of storageGroupId
+        """
+        members = {}
+        for group, devices in zip(groups, lists):
+            for device in devices:
+                members.setdefault(device, []).append(group)
+        return members
+
+    def _check_state(self, request: str):
+        """
+        Incremental mode - Find the TDEVs changed since the previous run
+        Each value of the checked attributes (capacity, status, etc.) of the
+        previous run is listed in bulk, with the volume list filtered on it : a
+        device missing from the list of its previous value has changed
+        :param request: URI of the list of TDEVs (with its query parameters)
+        """
+        probes = self._state.probes()
+        if len(probes) >= len(self._state):
+            # Small array : cheaper to request each device
+            self._state.expire()
+            return
+
+        list_probe = (lambda probe:
+                      list(self._get_volume_ids('%s&%s=%s' % (request, probe[0],
+                                                              quote(str(probe[1]))))))
+        for probe, listed in zip(probes, ordered_map(list_probe, probes,
+                                                     self._workers)):
+            self._state.check(probes[probe], listed)
+
+    def get_thin_volumes(self):
+        base_request = '%s/symmetrix/%s/volume' % (self.node, self._sym_id)
+        request = base_request + '?meta_member=false&tdev=true'
+        start = time.time()
+        if self._state is not None:
+            self._check_state(request)
+
+        if self._strategy == 'storagegroup':
+            # Memberships are collected in bulk, one request by storage group
+            members = self._get_storage_group_members()
+            get_volume = partial(self._get_volume_in_groups, base_request,
+                                 members)
+        else:
+            get_volume = partial(self._get_volume, base_request)
+
+        # First of all : get the list of all volumes on the array
+        all_devices = self._get_volume_ids(request)
 
         # Then for each of volume in the list : run a GET request
-        # I know it's slow and not very clean but it's the only way to get all
-        # the information i needs
-        response = []
-        for device in all_devices:
-            data = self._get_request('/'.join([base_request, device]))
-            response.append(data['volume'][0])
+        # It's the only way to get all the information i needs, so several
+        # requests are kept in flight (see _fetch_all). The devices are
+        # requested as soon as their page of the iterator is received.
+        response = list(ordered_map(get_volume, all_devices, self._workers))
+        if self._state is not None:
+            self._state.save()
+
+        elapsed = time.time() - start
+        self._logger.info('  %s TDEVs in %.1fs (%.1f devices/sec, %s workers)' %
+                          (len(response), elapsed,
+                           len(response) / elapsed if elapsed else 0,
+                           self._workers))
         return response
 
+    def _get_volume(self, base_request: str, device: str):
+        """
+        Get the details of a volume
+        In incremental mode, the details of the previous run are used while
+        they are recent enough
+        :param base_request: URI of the volumes
+        :param device: volumeId
+        :return: (dict)
+        """
+        if self._state is not None:
+            volume = self._state.get(device)
+            if volume is not None:
+                return volume
+
+        volume = self._get_request('/'.join([base_request, device]))['volume'][0]
+        if self._state is not None:
+            self._state.update(device, volume)
+        return volume
+
+    def _get_volume_in_groups(self, base_request: str, members: dict, device: str):
+        """
+        Get the details of a volume, with its storage groups of this run
+        The volume lists can't give the other attributes (WWN, capacity, etc.):
+        they come from the previous run or from a request on the device
+        :param base_request: URI of the volumes
+        :param members: storage groups of each volume
+        :param device: volumeId
+        :return: (dict)
+        """
+        return self._in_groups(self._get_volume(base_request, device),
+                               members.get(device, []))
+
+    @staticmethod
+    def _in_groups(volume: dict, groups: list):
+        """
+        Copy of a volume with the storage groups of this run
+        :param volume: details of the volume
+        :param groups: storageGroupIds of the volume
+        :return: (dict)
+        """
+        volume = dict(volume)
+        volume['num_of_storage_groups'] = len(groups)
+        if groups:
+            volume['storageGroupId'] = groups
+        else:
+            volume.pop('storageGroupId', None)
+        return volume
+
     def get_version(self):
         request = 'system/version'
         return tuple(self._get_request(request)['version'].split('.'))
@@ -197,8 +450,9 @@ class BaseVMAXArray(object, metaclass=abc.ABCMeta):
 class VMAX2Array(BaseVMAXArray):
     """Concrete VMAX-2 array"""
 
-    def __init__(self, sym_id: str, address: str, user: str, password: str):
-        super(VMAX2Array, self).__init__(sym_id, address, user, password)
+    def __init__(self, sym_id: str, address: str, user: str, password: str,
+                 **kwargs):
+        super(VMAX2Array, self).__init__(sym_id, address, user, password, **kwargs)
 
     @property
     def node(self):
@@ -216,8 +470,9 @@ class VMAX2Array(BaseVMAXArray):
 class VMAX3Array(BaseVMAXArray):
     """Concrete VMAX-3 array"""
 
-    def __init__(self, sym_id: str, address: str, user: str, password: str):
-        super(VMAX3Array, self).__init__(sym_id, address, user, password)
+    def __init__(self, sym_id: str, address: str, user: str, password: str,
+                 **kwargs):
+        super(VMAX3Array, self).__init__(sym_id, address, user, password, **kwargs)
 
     @property
     def node(self):
@@ -244,7 +499,8 @@ class VMAXArrayFactory(object):
                '77': VMAX3Array,
                '78': VMAX3Array}
 
-    def __new__(cls, sym_id: str, address: str, user: str, password: str):
+    def __new__(cls, sym_id: str, address: str, user: str, password: str,
+                **kwargs):
         cls._logger = logging.getLogger('arrayxray')
 
         model_type = sym_id[5:7]  # Model type is in the middle of the SID
@@ -254,4 +510,4 @@ class VMAXArrayFactory(object):
             cls._logger.error(msg)
             raise VmaxInventoryFactoryError
 
-        return cls.classes[model_type](sym_id, address, user, password)
+        return cls.classes[model_type](sym_id, address, user, password, **kwargs)
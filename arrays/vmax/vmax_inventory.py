@@ -2,7 +2,10 @@
 # coding: utf-8
 
 import logging
-from arrays.vmax.vmax_connector import BaseVMAXArray, VMAX2Array, VMAX3Array
+from functools import partial
+from arrays.metrics import get_metrics
+from arrays.pipeline import Pipeline
+from arrays.vmax.vmax_connector import BaseVMAXArray
 from arrays.vmax.vmax_filters import *
 from arrays.xls_injector import XlsInjector
 
@@ -10,10 +13,20 @@ from arrays.xls_injector import XlsInjector
 class VMAXInventoryCollector(object):
     """ Describe how to collect information from VMAX array """
 
-    def __init__(self):
+    def __init__(self, pipeline: int = 0, incremental: bool = False):
+        """
+        Constructor
+        :param pipeline: sections fetched ahead while the previous ones are
+                         written (0 : one section after the other)
+        :param incremental: incremental inventory of the TDEVs (column giving
+                            the date of the details reused)
+        """
         self._formatter = None  # Format the output
+        self._pipeline = pipeline
+        self._incremental = incremental
         self._vmax = None  # VMAX array
         self._vmax_id = None
+        self._measures = None  # Measures of the collect
         self._logger = logging.getLogger('arrayxray')
         # This list enforce the order of collecting methods
         self._order = [self._get_system,
@@ -28,58 +41,47 @@ class VMAXInventoryCollector(object):
                        self._get_storage_groups,
                        self._get_fast_policy]
 
-    def _symid_first(self, dictionary):
-        dictionary['Symmetrix Id'] = self._vmax_id
-        dictionary.move_to_end('Symmetrix Id', last=False)
-
     def _get_fast_policy(self):
-        if isinstance(self._vmax, VMAX2Array):
+        if hasattr(self._vmax, 'get_fast_policy'):  # VMAX-2 only
             self._logger.info('- Extraction of FAST Policies')
-            for policy in VMAXFastPolicy(self._vmax.get_fast_policy()):
-                self._symid_first(policy)
+            for policy in VMAXFastPolicy(self._vmax.get_fast_policy(), self._vmax_id):
                 self._formatter.save(name='FAST Policies', data=policy)
 
     def _get_hosts(self):
         self._logger.info('- Extraction of Hosts')
-        for host in VMAXHost(self._vmax.get_hosts()):
-            self._symid_first(host)
+        for host in VMAXHost(self._vmax.get_hosts(), self._vmax_id):
             self._formatter.save(name='InitiatorGroup', data=host)
 
     def _get_host_groups(self):
         self._logger.info('- Extraction of Host Groups')
-        for host_group in VMAXHostGroup(self._vmax.get_host_groups()):
-            self._symid_first(host_group)
+        for host_group in VMAXHostGroup(self._vmax.get_host_groups(), self._vmax_id):
             self._formatter.save(name='InitiatorGroupCascaded', data=host_group)
 
     def _get_initiators(self):
         self._logger.info('- Extraction of Initiators')
-        for initiator in VMAXInitiator(self._vmax.get_initiators()):
-            self._symid_first(initiator)
+        for initiator in VMAXInitiator(self._vmax.get_initiators(), self._vmax_id):
             self._formatter.save(name='WWNs', data=initiator)
 
     def _get_masking_views(self):
         self._logger.info('- Extraction of Masking Views')
-        for view in VMAXMaskingView(self._vmax.get_masking_view()):
-            self._symid_first(view)
+        for view in VMAXMaskingView(self._vmax.get_masking_view(), self._vmax_id):
             self._formatter.save(name='Masking Views', data=view)
 
     def _get_port_groups(self):
         self._logger.info('- Extraction of Port Groups')
-        for port_group in VMAXPortGroup(self._vmax.get_port_groups()):
-            self._symid_first(port_group)
+        for port_group in VMAXPortGroup(self._vmax.get_port_groups(), self._vmax_id):
             self._formatter.save(name='PortGroups', data=port_group)
 
     def _get_srp(self):
-        if isinstance(self._vmax, VMAX3Array):
+        if hasattr(self._vmax, 'get_srp'):  # VMAX-3 only
             self._logger.info('- Extraction of SRPs')
-            for pool in VMAXSRPool(self._vmax.get_srp()):
-                self._symid_first(pool)
+            for pool in VMAXSRPool(self._vmax.get_srp(), self._vmax_id):
                 self._formatter.save(name='SRPs', data=pool)
 
     def _get_storage_groups(self):
         self._logger.info('- Extraction of Storage Groups')
-        for storage_group in VMAXStorageGroup(self._vmax.get_storage_group()):
-            self._symid_first(storage_group)
+        for storage_group in VMAXStorageGroup(self._vmax.get_storage_group(),
+                                              self._vmax_id):
             self._formatter.save(name='StorageGroups', data=storage_group)
 
     def _get_system(self):
@@ -90,21 +92,25 @@ class VMAXInventoryCollector(object):
         self._logger.info('- Extraction of System\'s information')
         data = VMAXSystem(self._vmax.get_system()).clean()
         self._formatter.save(name='Arrays', data=data)
-        self._vmax_id = data['symmetrixId']  # Memorize the system's name
+        self._vmax_id = data.value('symmetrixId')  # Memorize the system's name
 
     def _get_thin_devices(self):
         self._logger.info('- Extraction of TDEVs')
-        for device in VMAXThinDevice(self._vmax.get_thin_volumes()):
-            self._symid_first(device)
+        tdev = VMAXIncrementalThinDevice if self._incremental else VMAXThinDevice
+        for device in tdev(self._vmax.get_thin_volumes(), self._vmax_id):
             self._formatter.save(name='TDEVs', data=device)
 
     def _get_thin_pools(self):
-        if isinstance(self._vmax, VMAX2Array):
+        if hasattr(self._vmax, 'get_thin_pool'):  # VMAX-2 only
             self._logger.info('- Extraction of Thin Pools')
-            for pool in VMAXThinPool(self._vmax.get_thin_pool()):
-                self._symid_first(pool)
+            for pool in VMAXThinPool(self._vmax.get_thin_pool(), self._vmax_id):
                 self._formatter.save(name='ThinPools', data=pool)
 
+    def _section(self, collect_method):
+        """ Run a collect method as a section (_get_hosts : hosts) """
+        with self._measures.section(collect_method.__name__[5:]):
+            collect_method()
+
     def collect(self, formatter: XlsInjector, array: BaseVMAXArray):
         """
         Launch data collection
@@ -112,11 +118,20 @@ class VMAXInventoryCollector(object):
         :param array: SVC to collect
         :return:
         """
-        self._vmax = array
-        self._formatter = formatter
+        self._measures = get_metrics().collection(str(array))
+        self._vmax = self._measures.connector(array)
+        self._formatter = self._measures.injector(formatter)
 
         self._logger.info('Beginning of data extraction %s' % self._vmax)
-        for collect_method in self._order:
-            collect_method()
+        sections = [partial(self._section, method) for method in self._order]
+        sections[0]()  # The system first : the other sections need its ID
+        if self._pipeline <= 0:
+            for section in sections[1:]:
+                section()
+        else:
+            # The next sections are fetched while the previous ones are written
+            pipeline = Pipeline(formatter, depth=self._pipeline)
+            self._formatter = self._measures.injector(pipeline.injector())
+            pipeline.run(sections[1:])
 
         self._logger.info('End of data extraction %s' % self._vmax)
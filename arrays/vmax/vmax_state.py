@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+State of the TDEVs of a VMAX, kept from one run to the next.
+Used by the incremental inventory : only new devices, devices changed since
+the previous run and devices not refreshed for a while are requested again
+to UNISPHERE.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+
+# Attributes of the TDEVs checked at each run with volume lists filtered on
+# each of their values (few different values on an array). Each storage group
+# of a device is a value of storageGroupId. The identifier and the WWN, unique
+# by device, can't be checked this way.
+CHECKED = ('cap_gb', 'status', 'allocated_percent', 'num_of_front_end_paths',
+           'num_of_storage_groups', 'storageGroupId')
+
+
+class TDEVState(object):
+    """ Details of the TDEVs collected by the previous runs on an array """
+
+    def __init__(self, directory: str, sym_id: str, max_age: int = 172800,
+                 refresh: bool = False):
+        """
+        Constructor
+        :param directory: where to store the state of the arrays
+        :param sym_id: Symmetrix ID of the VMAX
+        :param max_age: age (seconds) after which a device is requested again
+        :param refresh: ignore the previous state (all devices are requested)
+        """
+        self._path = os.path.join(directory, '%s-tdevs.json' % sym_id)
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger('arrayxray')
+        self._previous = {}  # volumeId: {'fetched': timestamp, 'volume': details}
+        self._current = {}
+        self._changed = set()  # Devices changed since the previous run
+        self.added = self.changed = self.refreshed = self.reused = 0
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.isfile(self._path) and not refresh:
+            try:
+                with open(self._path, 'r') as file:
+                    self._previous = json.load(file)['volumes']
+            except (OSError, ValueError, KeyError) as error:
+                self._logger.warning('State %s ignored (%s)' % (self._path, error))
+
+    def __str__(self):
+        return 'TDEVState(%s)' % self._path
+
+    def __len__(self):
+        return len(self._previous)
+
+    def _age_limit(self, device: str):
+        """
+        Age after which a device is refreshed : between half and all the
+        maximum age, spread by device. Devices collected on the same run
+        aren't all refreshed on the same later run.
+        :param device: volumeId
+        :return: (float) seconds
+        """
+        spread = zlib.crc32(device.encode('utf-8')) % 1000 / 1000
+        return self._max_age * (0.5 + spread / 2)
+
+    def probes(self):
+        """
+        Values of the checked attributes in the previous state
+        :return: (dict) (attribute, value): set of the volumeId having it
+        """
+        probes = {}
+        for device, entry in self._previous.items():
+            for attribute in CHECKED:
+                values = entry['volume'].get(attribute)
+                for value in values if isinstance(values, list) else [values]:
+                    if isinstance(value, (str, int, float)):
+                        probes.setdefault((attribute, value), set()).add(device)
+        return probes
+
+    def expire(self):
+        """ Request all the devices again (as if they all had changed) """
+        with self._lock:
+            self._changed.update(self._previous)
+
+    def check(self, previous: set, listed):
+        """
+        Compare the devices having a checked value, before and now
+        A device which had the value but isn't listed anymore has changed
+        :param previous: volumeId having the value in the previous state
+                         (see probes)
+        :param listed: volumeId listed by UNISPHERE for this value
+        """
+        changed = previous - set(listed)
+        with self._lock:
+            self._changed.update(changed)
+
+    def get(self, device: str):
+        """
+        Get the details of a device collected by a previous run
+        :param device: volumeId
+        :return: details (with the date of the previous run in 'reused_from')
+                 or None if the device is new, changed or must be refreshed
+        """
+        entry = self._previous.get(device)
+        with self._lock:
+            if entry is None:
+                self.added += 1
+                return None
+            if device in self._changed:
+                self.changed += 1
+                return None
+            if time.time() - entry['fetched'] > self._age_limit(device):
+                self.refreshed += 1
+                return None
+            self.reused += 1
+            self._current[device] = entry
+        volume = dict(entry['volume'])
+        volume['reused_from'] = time.strftime('%Y-%m-%d %H:%M',
+                                              time.localtime(entry['fetched']))
+        return volume
+
+    def update(self, device: str, volume: dict):
+        """
+        Memorize the details of a device requested to UNISPHERE
+        :param device: volumeId
+        :param volume: details of the volume
+        """
+        with self._lock:
+            self._current[device] = {'fetched': time.time(), 'volume': volume}
+
+    def save(self):
+        """
+        Write the state on disk
+        Devices of the previous state not seen during this run are removed
+        """
+        removed = len(set(self._previous) - set(self._current))
+        self._logger.info('  TDEVs added: %s, changed: %s, refreshed: %s, '
+                          'unchanged: %s, removed: %s' %
+                          (self.added, self.changed, self.refreshed, self.reused,
+                           removed))
+        try:
+            with open(self._path + '.tmp', 'w') as file:
+                json.dump({'volumes': self._current}, file)
+            os.replace(self._path + '.tmp', self._path)
+        except OSError as error:
+            self._logger.warning('State %s not saved (%s)' % (self._path, error))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Sending REST calls to a VPLEX equipment with asyncio.
+Asynchronous counterpart of vplex_connector (same methods, as coroutines).
+"""
+
+import asyncio
+import json
+from arrays.async_connector import AsyncConnector
+from arrays.errors import VPLEXConnectionError
+from arrays.vplex.vplex_connector import VPLEXCommunicator, endpoint
+
+
+class AsyncVPLEXCommunicator(AsyncConnector):
+    """ Send requests to VPLEX array with asyncio """
+
+    methods = ['get_clusters', 'get_virtual_volumes', 'get_initiators',
+               'get_storage_views', 'get_storage_arrays']
+
+    def __init__(self, name: str, address: str, headers: dict,
+                 concurrency: int = 100, throttle=None, split: bool = False):
+        """
+        Constructor (use VPLEXCommunicator.asynchronous)
+        :param name: name of the VPLEX (for the logs)
+        :param address: base URL of the REST API of the VPLEX
+        :param headers: HTTP headers (with the credentials)
+        :param concurrency: maximum of requests in flight on this VPLEX
+        :param throttle: Throttle of the requests (rate, retries, adaptive
+                         concurrency)
+        :param split: split the biggest wildcard queries by cluster and
+                      backend array
+        """
+        super(AsyncVPLEXCommunicator, self).__init__(name, concurrency=concurrency,
+                                                     throttle=throttle,
+                                                     headers=headers)
+        self._address = address
+        self._split = split
+
+    def _connection_error(self, message: str):
+        return VPLEXConnectionError(message)
+
+    async def _send_request(self, request: str):
+        url = '/'.join([self._address, request])
+        status, text = await self._get(url, endpoint(request))
+        if status >= 400:
+            raise VPLEXCommunicator._error(status, text)
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise VPLEXConnectionError('Invalid response to %s' % request)
+        if data['response']['message']:
+            if 'User authentication failed.' in data['response']['message']:
+                raise VPLEXConnectionError('Authentication failure')
+        return data['response']['context']
+
+    async def get_clusters(self):
+        return await self._send_request('clusters/*')
+
+    async def get_initiators(self):
+        return await self._send_request('clusters/*/exports/initiator-ports/*')
+
+    async def _send_slice(self, request: str):
+        """ Send one slice of a split query (skipped on error) """
+        try:
+            return await self._send_request(request)
+        except VPLEXConnectionError as error:
+            self._logger.error('Slice %s skipped (%s)' % (request, error))
+            return []
+
+    async def get_storage_arrays(self):
+        url = 'clusters/*/storage-elements/storage-arrays/*/logical-units/*'
+        if not self._split:
+            return await self._send_request(url)
+
+        arrays = await self._send_request('clusters/*/storage-elements/storage-arrays/*')
+        slices = await asyncio.gather(*(self._send_slice('%s/%s/logical-units/*' %
+                                                         (array['parent'].strip('/'),
+                                                          array['name']))
+                                        for array in arrays))
+        # Grouped by array, not in the order of the wildcard query
+        return [unit for units in slices for unit in units]
+
+    async def get_storage_views(self):
+        return await self._send_request('clusters/*/exports/storage-views/*')
+
+    async def get_virtual_volumes(self):
+        return await self._send_request('clusters/*/virtual-volumes/*')
@@ -3,52 +3,153 @@
 
 """
 Sending REST calls to a VPLEX equipment.
-Returning, in the most of cases, a list of dictionary for each method.
+Returning, in the most of cases, an iterator of dictionary for each method.
+The responses are decoded while they are received (one record at a time).
 """
 
+import http.client
 import json
+import logging
+import time
 import requests
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 from arrays.errors import VPLEXConnectionError
+from arrays.fetcher import ordered_map
+from arrays.metrics import get_metrics
+from arrays.session import PooledSession
+from arrays.stream import iter_items
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
 
+def endpoint(request: str):
+    """
+    Kind of a request, without the names (for the metrics)
+    clusters/cluster-1/storage-elements/storage-arrays/EMC-1/logical-units/*
+    gives clusters/{name}/storage-elements/storage-arrays/{name}/logical-units/*
+    :param request: URI of the request
+    :return: (str)
+    """
+    path = request.split('/')
+    return '/'.join('{name}' if index and path[index - 1] in
+                    ('clusters', 'storage-arrays') and part != '*' else part
+                    for index, part in enumerate(path))
+
+
 class VPLEXCommunicator(object):
     """
     Send requests to VPLEX array
     """
 
-    def __init__(self, address: str, user: str, password: str, port=443):
+    def __init__(self, address: str, user: str, password: str, port=443,
+                 pool_size: int = 4, split: bool = False):
         """
         Constructor
         :param address: IP address of the VPLEX
         :param user: Username
         :param password: Password
         :param port: TCP port (by default 443)
+        :param pool_size: keep-alive connections to the management server
+                          (and requests in flight when queries are split)
+        :param split: split the biggest wildcard queries by cluster and
+                      backend array
         """
         self._address = 'https://%s:%s/vplex' % (address, port)
         self._headers = {'Username': user,
                          'Password': password,
                          'Accept': 'application/json;format=1'}
+        self._pool_size = pool_size
+        self._split = split
+        self._logger = logging.getLogger('arrayxray')
+        self._metrics = get_metrics()
+
+        # All the requests reuse the same connections
+        self._session = PooledSession(pool_size)
+        self._session.headers.update(self._headers)
 
     def __str__(self):
         return 'VPlex(%s)' % self._address
 
-    def _send_request(self, request: str):
+    def asynchronous(self, concurrency: int = 100):
+        """
+        Asynchronous counterpart of this VPLEX (asyncio mode, needs aiohttp)
+        :param concurrency: maximum of requests in flight on this VPLEX
+        :return: AsyncVPLEXCommunicator
+        """
+        from arrays.vplex.vplex_async import AsyncVPLEXCommunicator
+        return AsyncVPLEXCommunicator(str(self), self._address, self._headers,
+                                      concurrency=concurrency, split=self._split)
+
+    def close(self):
+        """ Close the connections to the VPLEX """
+        self._session.log_statistics(self._logger, self)
+        self._session.close()
+
+    def _send_request(self, request: str, timeout: int = 600):
+        """
+        Generator - Send a request and yield the records of its context
+        one at a time, while the response is received
+        :param request: URI of the request
+        :param timeout: timeout between two chunks of the response (seconds)
+        :return: each record of the context of the response
+        """
         url = '/'.join([self._address, request])
+        members = {}  # Other members of the response (message, exception)
+        start = time.perf_counter()
         try:
-            data = requests.get(url, headers=self._headers, timeout=600, verify=False)
-            data = json.loads(data.text)
-            if data['response']['message']:
-                if 'User authentication failed.' in data['response']['message']:
-                    raise VPLEXConnectionError('Authentication failure')
+            with self._session.get(url, stream=True, verify=False,
+                                   timeout=timeout) as data:
+                # Latency : until the headers, the body is read by the consumer
+                self._metrics.request(str(self), endpoint(request),
+                                      time.perf_counter() - start,
+                                      error=data.status_code >= 400)
+                if data.status_code >= 400:
+                    # Checked before yielding any record of the context
+                    raise self._error(data.status_code, data.text, data.reason)
+                yield from iter_items(self._count(request, data.iter_content(65536)),
+                                      ('response', 'context'), members)
         except requests.exceptions.ConnectionError:
+            self._metrics.request(str(self), endpoint(request),
+                                  time.perf_counter() - start, error=True)
             raise VPLEXConnectionError('Problem while connecting to VPLEX')
         except requests.exceptions.ReadTimeout:
+            self._metrics.request(str(self), endpoint(request),
+                                  time.perf_counter() - start, error=True)
             raise VPLEXConnectionError('Connection timeout occurs')
-        else:
-            return data['response']['context']
+
+        if members.get('message'):
+            if 'User authentication failed.' in members['message']:
+                raise VPLEXConnectionError('Authentication failure')
+
+    @staticmethod
+    def _error(status: int, text: str, reason: str = None):
+        """
+        Error of a response with an HTTP error status (a short message, read
+        at once). Used by the asynchronous connector too.
+        :param status: HTTP status of the response
+        :param text: body of the response
+        :param reason: reason phrase of the status (standard one by default)
+        :return: VPLEXConnectionError
+        """
+        try:
+            message = json.loads(text)['response']['message'] or ''
+        except (ValueError, KeyError, TypeError):
+            message = ''
+        if 'User authentication failed.' in message:
+            return VPLEXConnectionError('Authentication failure')
+        return VPLEXConnectionError('HTTP error %s (%s)' %
+                                    (status, message or reason or
+                                     http.client.responses.get(status, '')))
+
+    def _count(self, request: str, chunks):
+        """ Generator - Yield the chunks of a response, counting their bytes """
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            self._metrics.received(str(self), endpoint(request), size)
 
     def get_clusters(self):
         return self._send_request('clusters/*')
@@ -56,9 +157,33 @@ class VPLEXCommunicator(object):
     def get_initiators(self):
         return self._send_request('clusters/*/exports/initiator-ports/*')
 
+    def _send_slice(self, request: str):
+        """
+        Send one slice of a split query
+        A slice in error is skipped : only its part of the data is lost
+        :param request: URI of the slice
+        :return: context of the response (empty list on error)
+        """
+        try:
+            return list(self._send_request(request))
+        except VPLEXConnectionError as error:
+            self._logger.error('Slice %s skipped (%s)' % (request, error))
+            return []
+
     def get_storage_arrays(self):
         url = 'clusters/*/storage-elements/storage-arrays/*/logical-units/*'
-        return self._send_request(url)
+        if not self._split:
+            yield from self._send_request(url)
+            return
+
+        # One request by backend array of each cluster, sent concurrently
+        # The units are grouped by array, not in the order of the wildcard query
+        # Sample of parent : /clusters/cluster-1/storage-elements/storage-arrays
+        arrays = self._send_request('clusters/*/storage-elements/storage-arrays/*')
+        slices = ['%s/%s/logical-units/*' % (array['parent'].strip('/'), array['name'])
+                  for array in arrays]
+        for units in ordered_map(self._send_slice, slices, self._pool_size):
+            yield from units
 
     def get_storage_views(self):
         return self._send_request('clusters/*/exports/storage-views/*')
@@ -5,9 +5,11 @@
 These objects are going to filter the input data and only keep the interesting
 attributes. Convert of capacity units may be occur to stay more consistent
 between arrays.
+Each filter describes its rows with a Schema (see arrays.schema) and yields
+Records.
 """
 
-from collections import OrderedDict
+from arrays.schema import Schema, fields, record_class
 
 
 def gigabytes(value: str):
@@ -27,127 +29,100 @@ def gigabytes(value: str):
         return value
 
 
+def cluster(parent: str):
+    """ Sample of parent : /clusters/cluster-1/virtual-volumes """
+    return parent.split('/')[2]
+
+
+def storage_array(parent: str):
+    """
+    Sample of parent :
+    /clusters/cluster-1/storage-elements/storage-arrays/EMC-SYMMETRIX-123/logical-units
+    """
+    return parent.split('/')[5]
+
+
+def capacity_gb(capacity: str):
+    """ Sample of capacity : 10737418240B """
+    return int(int(capacity.split('B')[0]) / 1073741824)
+
+
 class VPLEXFilter(object):
     """ Abstract class for all filters objects """
 
-    def __init__(self, data: list):
+    schema = None  # Schema of the rows, defined by each filter
+
+    def __init__(self, data):
         """
         Constructor
-        :param data: list of data to filter
+        :param data: records to filter (list or iterator)
         """
         self._data = data
-        self._f_data = []
-        self._clean()
+        # Lazy : each record is cleaned only when the next one is asked
+        self._f_data = self._clean()
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        try:
-            one_element = self._f_data.pop(0)
-        except IndexError:
-            raise StopIteration
-        return one_element
+        return next(self._f_data)
 
     def _clean(self):
-        raise NotImplementedError
+        """ Generator - Yield each filtered record """
+        row = self.schema.row
+        for to_clean in self._data:
+            yield row(to_clean)
 
 
 class VPLEXCluster(VPLEXFilter):
 
-    def __init__(self, data):
-        super(VPLEXCluster, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            keys = ['name', 'top-level-assembly', 'health-state',
-                    'operational-status', 'cluster-id', 'island-id',
-                    'default-cache-mode', 'director-names',
-                    'default-xcopy-template']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema(fields(['name', 'top-level-assembly', 'health-state',
+                            'operational-status', 'cluster-id', 'island-id',
+                            'default-cache-mode', 'director-names',
+                            'default-xcopy-template']))
 
 
 class VPLEXInitiator(VPLEXFilter):
 
-    def __init__(self, data):
-        super(VPLEXInitiator, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            clean['Cluster'] = to_clean['parent'].split('/')[2]
-            keys = ['name', 'node-wwn', 'port-wwn',
-                    'suspend-on-detach', 'target-ports']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema([('Cluster', 'parent', cluster)] +
+                    fields(['name', 'node-wwn', 'port-wwn',
+                            'suspend-on-detach', 'target-ports']))
 
 
 class VPLEXStorageArray(VPLEXFilter):
 
-    def __init__(self, data):
-        super(VPLEXStorageArray, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            clean['Cluster'] = to_clean['parent'].split('/')[2]
-            clean['Array'] = to_clean['parent'].split('/')[5]
-            keys = ['storage-volume', 'name', 'visibility',
-                    'connectivity-status', 'alua-support',
-                    'active-aao-visibility', 'luns']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema([('Cluster', 'parent', cluster),
+                     ('Array', 'parent', storage_array)] +
+                    fields(['storage-volume', 'name', 'visibility',
+                            'connectivity-status', 'alua-support',
+                            'active-aao-visibility', 'luns']))
 
 
 class VPLEXView(VPLEXFilter):
+    """ One row by virtual volume of each storage view """
 
-    def __init__(self, data: list):
-        super(VPLEXView, self).__init__(data)
+    keys = ['operational-status', 'initiators', 'ports', 'xcopy-enabled']
+    record = record_class(('Cluster', 'Name', 'LUN-ID', 'Volume', 'NAA', 'Size') +
+                          tuple(key.capitalize() for key in keys))
 
     def _clean(self):
+        record = self.record
         for to_clean in self._data:
+            view = (cluster(to_clean['parent']), to_clean['name'])
+            others = tuple(to_clean[key] for key in self.keys)
             for volume in to_clean['virtual-volumes']:
-                clean = OrderedDict()
+                # Sample of volume : (0,volume_name,VPD83T3:6000...,10G)
                 members = volume.strip('(').strip(')').split(',')
-                clean['Cluster'] = to_clean['parent'].split('/')[2]
-                clean['Name'] = to_clean['name']
-                clean['LUN-ID'] = members[0]
-                clean['Volume'] = members[1]
-                clean['NAA'] = members[2]
-                clean['Size'] = gigabytes(members[3])
-                lst = ['operational-status', 'initiators',
-                       'ports', 'xcopy-enabled']
-
-                for l in lst:
-                    clean[l.capitalize()] = to_clean[l]
-
-                self._f_data.append(clean)
+                yield record(view + (members[0], members[1], members[2],
+                                     gigabytes(members[3])) + others)
 
 
 class VPLEXVolume(VPLEXFilter):
 
-    def __init__(self, data):
-        super(VPLEXVolume, self).__init__(data)
-
-    def _clean(self):
-        for to_clean in self._data:
-            clean = OrderedDict()
-            clean['Cluster'] = to_clean['parent'].split('/')[2]
-            clean['Name'] = to_clean['name']
-            clean['Capacity_GB'] = int(int(to_clean['capacity'].split('B')[0]) / 1073741824)
-            keys = ['locality', 'service-status', 'health-state',
-                    'operational-status', 'consistency-group',
-                    'supporting-device', 'vpd-id', 'expandable',
-                    'expandable-capacity']
-
-            for key in keys:
-                clean[key.capitalize()] = to_clean[key]
-            self._f_data.append(clean)
+    schema = Schema([('Cluster', 'parent', cluster),
+                     ('Name', 'name', None),
+                     ('Capacity_GB', 'capacity', capacity_gb)] +
+                    fields(['locality', 'service-status', 'health-state',
+                            'operational-status', 'consistency-group',
+                            'supporting-device', 'vpd-id', 'expandable',
+                            'expandable-capacity']))
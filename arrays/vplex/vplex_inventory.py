@@ -2,6 +2,9 @@
 # coding: utf-8
 
 import logging
+from functools import partial
+from arrays.metrics import get_metrics
+from arrays.pipeline import Pipeline
 from arrays.vplex.vplex_connector import VPLEXCommunicator
 from arrays.vplex.vplex_filters import *
 from arrays.xls_injector import XlsInjector
@@ -10,9 +13,16 @@ from arrays.xls_injector import XlsInjector
 class VPLEXInventoryCollector(object):
     """ Describe how to collect information from VPLEX products """
 
-    def __init__(self):
+    def __init__(self, pipeline: int = 0):
+        """
+        Constructor
+        :param pipeline: sections fetched ahead while the previous ones are
+                         written (0 : one section after the other)
+        """
         self._formatter = None  # Format the output
+        self._pipeline = pipeline
         self._vp = None  # VPLEX array
+        self._measures = None  # Measures of the collect
         self._logger = logging.getLogger('arrayxray')
         self._order = [self._get_clusters,
                        self._get_volumes,
@@ -45,12 +55,25 @@ class VPLEXInventoryCollector(object):
         for volume in VPLEXVolume(self._vp.get_virtual_volumes()):
             self._formatter.save(name='Virtual Volumes', data=volume)
 
+    def _section(self, collect_method):
+        """ Run a collect method as a section (_get_views : views) """
+        with self._measures.section(collect_method.__name__[5:]):
+            collect_method()
+
     def collect(self, formatter: XlsInjector, array: VPLEXCommunicator):
-        self._vp = array
-        self._formatter = formatter
+        self._measures = get_metrics().collection(str(array))
+        self._vp = self._measures.connector(array)
+        self._formatter = self._measures.injector(formatter)
 
         self._logger.info('Beginning of data extraction %s' % self._vp)
-        for collect_method in self._order:
-            collect_method()
+        sections = [partial(self._section, method) for method in self._order]
+        if self._pipeline <= 0:
+            for section in sections:
+                section()
+        else:
+            # The next sections are fetched while the previous ones are written
+            pipeline = Pipeline(formatter, depth=self._pipeline)
+            self._formatter = self._measures.injector(pipeline.injector())
+            pipeline.run(sections)
 
         self._logger.info('End of data extraction %s' % self._vp)
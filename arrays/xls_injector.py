@@ -18,20 +18,22 @@ __author__ = 'Julien B.'
 class XlsInjector(Injector):
     """ Format the data under an XLS file """
 
-    def __init__(self, directory: str, filename: str):
+    def __init__(self, directory: str, filename: str, streaming: bool = False):
         """Constructor
         :param directory: Where create the inventory file
         :param filename: Filename of that Excel workbook
+        :param streaming: flush each row to disk once written (constant memory)
         """
         super().__init__()
+        self._book = None  # Nothing to close if the directory is refused
 
         if not os.path.isdir(directory):
             self._logger.error('Path incorrect (%s)' % directory)
-            raise XlsFormatterError
+            raise XlsFormatterError('Path incorrect (%s)' % directory)
 
         if not os.access(directory, os.W_OK):
             self._logger.error('Insufficient rights on %s' % directory)
-            raise XlsFormatterError
+            raise XlsFormatterError('Insufficient rights on %s' % directory)
 
         # If the file is already open, add a timestamp to the filename
         try:
@@ -46,7 +48,11 @@ class XlsInjector(Injector):
 
         self._sheets = {}
         self._logger.info('Initializing a Excel workbook (%s)' % filename)
-        self._book = xlsxwriter.Workbook(os.path.join(directory, filename))
+        # In constant memory mode, xlsxwriter writes each row in a temporary
+        # file as soon as the next one begins : rows must be written in order
+        # (which is the case, each sheet only appends rows)
+        self._book = xlsxwriter.Workbook(os.path.join(directory, filename),
+                                         {'constant_memory': streaming})
         self._book.set_properties({'title':    'Array-XRay Inventory',
                                    'subject':  'Make an inventory of storage arrays',
                                    'author':   'Julien B.',
@@ -54,83 +60,107 @@ class XlsInjector(Injector):
                                    'keywords': 'SAN, Symmetrix, VMAX, SVC, VPLEX',
                                    'comments': "It's better when it's not a "
                                                "manual task :-)"})
+        self._formats = XlsSheet.create_formats(self._book)
 
     def __del__(self):
+        self.close()
+
+    def close(self):
+        """ Set the size of the columns and write the workbook on disk """
+        if self._book is None:
+            return
+
         self._logger.debug('Now closing the workbook')
+        for sheet in self._sheets.values():
+            sheet.close()
         self._book.close()
+        self._book = None
 
     def save(self, *args, **kwargs):
         name = kwargs['name']
         data = kwargs['data']
         if name not in self._sheets:
-            self._sheets[name] = XlsSheet(self._book, name)
+            self._sheets[name] = XlsSheet(self._book, name, self._formats)
         self._sheets[name].add_row(data)
 
 
 class XlsSheet(object):
     """ Abstract class that define the behavior of a Excel sheet """
 
-    def __init__(self, workbook, sheet_name):
+    def __init__(self, workbook, sheet_name, formats: dict = None):
         """ Constructor
 
         :param workbook: Workbook Excel
         :param sheet_name: name for the sheet
+        :param formats: formats shared by the sheets (see create_formats)
         """
-        self._column_width = {}  # To memorize the width of each cell
+        self._column_width = {}  # To memorize the widest cell of each column
         self._header_exists = False  # Switch for creating the header the fist time
         self._current_row = 1
 
         self._logger = logging.getLogger('arrayxray')
         self._book = workbook
+        self._formats = formats or self.create_formats(workbook)
         self._sheet = workbook.add_worksheet(sheet_name)
 
-    def _initialize_header(self, data):
+    @staticmethod
+    def create_formats(workbook):
+        """
+        Create the cell formats once for all the rows of a workbook
+        :param workbook: Workbook Excel
+        :return: (dict) format of the header and format of the cells
+        """
+        header = workbook.add_format({'bold': True,
+                                      'align': 'center',
+                                      'bg_color': 'C5D9F1',
+                                      'top': 1,
+                                      'left': 1,
+                                      'right': 1,
+                                      'bottom': 1})
+        cell = workbook.add_format({'align': 'left',
+                                    'top': 1,
+                                    'left': 1,
+                                    'right': 1,
+                                    'bottom': 1})
+        return {'header': header, 'cell': cell}
+
+    def _initialize_header(self, headers):
         """ Define the sheet header format """
 
-        column_format = self._book.add_format({'bold': True,
-                                               'align': 'center',
-                                               'bg_color': 'C5D9F1',
-                                               'top': 1,
-                                               'left': 1,
-                                               'right': 1,
-                                               'bottom': 1})
-
-        for index, label in enumerate(data):
-            self._sheet.write(0, index, label, column_format)
+        for index, label in enumerate(headers):
+            self._sheet.write(0, index, label, self._formats['header'])
             self._memorize_width(index, len(label))
 
-        self._sheet.autofilter(0, 0, 0, len(data)-1)
+        self._sheet.autofilter(0, 0, 0, len(headers)-1)
         self._sheet.freeze_panes('A2')
         self._header_exists = True
 
     def _memorize_width(self, column, number_of_char):
-        """ Memorize the width of each cells """
-        if column not in self._column_width:
-            self._column_width[column] = [number_of_char]
-        else:
-            self._column_width[column].append(number_of_char)
+        """ Memorize the width of the widest cell of each column """
+        if number_of_char > self._column_width.get(column, 0):
+            self._column_width[column] = number_of_char
 
     def add_row(self, data):
         """
         Adding a new line to the sheet
-        :param data: data for the new line (dict)
+        :param data: data for the new line (Record, values by position)
         """
         if not self._header_exists:
-            self._initialize_header(data)
-
-        cell_format = self._book.add_format({'align': 'left',
-                                             'top': 1,
-                                             'left': 1,
-                                             'right': 1,
-                                             'bottom': 1})
-        for column, key in enumerate(data):
-            value = data[key] if not isinstance(data[key], list) else ', '.join(data[key])
+            self._initialize_header(data.headers)
+
+        cell_format = self._formats['cell']
+        for column, value in enumerate(data):
+            if isinstance(value, list):
+                value = ', '.join(value)
             self._sheet.write(self._current_row, column, value, cell_format)
             self._memorize_width(column, len(str(value)))
 
-        # Set the width of the column to the right size
-        # Take the highest value as column size (with a little padding)
-        for col, key in enumerate(data):
-            self._sheet.set_column(col, col, max(self._column_width[col])+5)
-
         self._current_row += 1
+
+    def close(self):
+        """
+        Set the width of the columns to the right size (once, at the end)
+        Take the highest value as column size (with a little padding)
+        """
+        for column, width in self._column_width.items():
+            self._sheet.set_column(column, column, width+5)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Benchmark of the complete collections, against the local mock servers.
+Each collector (VMAX, VPLEX, SVC) is run with each output format on the
+same synthetic dataset, in a child process of its own. Report the wall time,
+the requests (or SSH commands) per second, the rows per second and the peak
+memory of each run.
+
+Usage: python benchmarks/collect_benchmark.py --volumes 100000 --latency 0.005
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from mock_servers import VMAX_ID, Dataset, start_servers
+from arrays.columnar_injector import ColumnarInjector
+from arrays.injector import Injector
+from arrays.sqlite_injector import SQLiteInjector
+from arrays.svc.svc_connector import SVCCommunicator
+from arrays.svc.svc_inventory import SVCInventoryCollector
+from arrays.vmax.vmax_connector import VMAXArrayFactory
+from arrays.vmax.vmax_inventory import VMAXInventoryCollector
+from arrays.vplex.vplex_connector import VPLEXCommunicator
+from arrays.vplex.vplex_inventory import VPLEXInventoryCollector
+from arrays.xls_injector import XlsInjector
+
+
+class CountingInjector(Injector):
+    """ Count the rows given to another injector """
+
+    def __init__(self, injector: Injector):
+        super().__init__()
+        self._injector = injector
+        self.rows = 0
+
+    def save(self, *args, **kwargs):
+        self.rows += 1
+        self._injector.save(*args, **kwargs)
+
+    def close(self):
+        self._injector.close()
+
+
+def injector(file_format: str, directory: str):
+    if file_format == 'xlsx':
+        return XlsInjector(directory=directory, filename='benchmark.xlsx',
+                           streaming=True)
+    if file_format == 'sqlite':
+        return SQLiteInjector(directory=directory, filename='benchmark.xlsx')
+    return ColumnarInjector(directory=directory, filename='benchmark.xlsx',
+                            file_format=file_format)
+
+
+def collect(collector: str, port: int, workers: int):
+    """
+    Connect the collector to its mock server
+    :return: (connector, collector object)
+    """
+    if collector == 'vmax':
+        array = VMAXArrayFactory(VMAX_ID, '127.0.0.1', 'smc', 'smc', port=port,
+                                 workers=workers, pool_size=workers)
+        return array, VMAXInventoryCollector(pipeline=2)
+    if collector == 'vplex':
+        array = VPLEXCommunicator('127.0.0.1', 'service', 'service', port=port,
+                                  pool_size=workers)
+        return array, VPLEXInventoryCollector(pipeline=min(2, workers - 1))
+    array = SVCCommunicator('127.0.0.1', 'superuser', 'passw0rd', port=port)
+    return array, SVCInventoryCollector(channels=min(workers, 4))
+
+
+def run(collector: str, file_format: str, port: int, workers: int, results):
+    """ Child process - Run one collection and send back its measures """
+    directory = tempfile.mkdtemp()
+    formatter = CountingInjector(injector(file_format, directory))
+    start = time.time()
+    array, inventory = collect(collector, port, workers)
+    try:
+        inventory.collect(formatter=formatter, array=array)
+    finally:
+        array.close()
+    formatter.close()
+    elapsed = time.time() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((elapsed, formatter.rows, peak))
+
+
+def main(arguments):
+    dataset = Dataset(arguments.volumes, arguments.hosts, arguments.mappings)
+    # Self-signed certificate : the tools don't verify the arrays' ones
+    servers = start_servers(dataset, arguments.latency)
+    # fork : the children don't import the modules again
+    context = multiprocessing.get_context('fork')
+
+    print('%s volumes, %s hosts, %s mappings, latency %.3fs, %s workers' %
+          (dataset.volumes, dataset.hosts, dataset.mappings, arguments.latency,
+           arguments.workers))
+    print('%-6s %-8s %9s %9s %11s %11s %9s' % ('array', 'format', 'time (s)',
+                                               'requests', 'requests/s',
+                                               'rows/s', 'peak (MB)'))
+    for collector in arguments.collectors:
+        server = servers[collector]
+        for file_format in arguments.formats:
+            results = context.Queue()
+            requests = server.requests
+            child = context.Process(target=run, args=(collector, file_format,
+                                                      server.port, arguments.workers,
+                                                      results))
+            child.start()
+            child.join()
+            if child.exitcode != 0:
+                print('%-6s %-8s failed (exit code %s)' % (collector, file_format,
+                                                           child.exitcode))
+                continue
+            elapsed, rows, peak = results.get()
+            requests = server.requests - requests
+            print('%-6s %-8s %9.2f %9d %11.0f %11.0f %9.0f' %
+                  (collector, file_format, elapsed, requests, requests / elapsed,
+                   rows / elapsed, peak))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark of the collectors')
+    parser.add_argument('-v', '--volumes', type=int, default=10000,
+                        help='number of volumes')
+    parser.add_argument('--hosts', type=int, default=100, help='number of hosts')
+    parser.add_argument('-m', '--mappings', type=int,
+                        help='number of host mappings (one by volume by default)')
+    parser.add_argument('-l', '--latency', type=float, default=0.0,
+                        help='delay of each request (seconds)')
+    parser.add_argument('-w', '--workers', type=int, default=16,
+                        help='requests in flight (VMAX), pool size (VPLEX)')
+    parser.add_argument('--collectors', nargs='+', choices=['vmax', 'vplex', 'svc'],
+                        default=['vmax', 'vplex', 'svc'])
+    parser.add_argument('--formats', nargs='+',
+                        choices=['xlsx', 'sqlite', 'parquet', 'arrow'],
+                        default=['xlsx', 'sqlite', 'parquet'])
+    main(parser.parse_args())
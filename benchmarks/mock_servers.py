@@ -0,0 +1,597 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Local stand-ins of the management servers, for the benchmarks.
+- UNISPHERE for VMAX : HTTPS REST API with iterators and per-object requests
+- VPLEX : HTTPS REST API (wildcard queries)
+- SVC : SSH server answering the ls* commands in CSV
+The data is a synthetic dataset of N volumes, hosts and mappings. Each
+request or command can be delayed to mimic a distant or busy server.
+
+Usage: python benchmarks/mock_servers.py --volumes 100000 --latency 0.02 --port 9443
+(then point the tools at 127.0.0.1 with the ports printed, see README)
+"""
+
+import argparse
+import csv
+import datetime
+import io
+import ipaddress
+import itertools
+import json
+import logging
+import os
+import socket
+import ssl
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import paramiko
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+VMAX_ID = '000197800123'  # Model 78 : VMAX-3 family
+PAGE_SIZE = 1000  # maxPageSize of UNISPHERE
+VPLEX_PASSWORD = 'service'  # Other passwords are rejected by the VPLEX
+
+
+class Dataset(object):
+    """ Synthetic inventory, computed on demand from the index of each object """
+
+    def __init__(self, volumes: int = 10000, hosts: int = 100, mappings: int = None):
+        """
+        Constructor
+        :param volumes: number of volumes (TDEVs, vdisks, virtual volumes)
+        :param hosts: number of hosts (2 initiators each)
+        :param mappings: number of host/volume mappings (one by volume if None)
+        """
+        self.volumes = volumes
+        self.hosts = max(hosts, 1)
+        self.mappings = volumes if mappings is None else mappings
+        self.changes = {}  # Attributes changed by volume (index: dict)
+
+    def host_of(self, volume: int):
+        return volume % self.hosts
+
+    def mapped(self, host: int):
+        """ Indexes of the volumes mapped to a host """
+        return range(host, self.mappings, self.hosts)
+
+
+def certificate(directory: str):
+    """
+    Create a self-signed certificate for the HTTPS servers
+    :param directory: where to write the files
+    :return: (certificate file, key file)
+    """
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'localhost')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name)
+            .public_key(key.public_key()).serial_number(x509.random_serial_number())
+            .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=7))
+            .add_extension(x509.SubjectAlternativeName([
+                x509.DNSName('localhost'),
+                x509.IPAddress(ipaddress.ip_address('127.0.0.1'))]), critical=False)
+            .sign(key, hashes.SHA256()))
+    cert_file = os.path.join(directory, 'mock.crt')
+    key_file = os.path.join(directory, 'mock.key')
+    with open(cert_file, 'wb') as file:
+        file.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_file, 'wb') as file:
+        file.write(key.private_bytes(serialization.Encoding.PEM,
+                                     serialization.PrivateFormat.TraditionalOpenSSL,
+                                     serialization.NoEncryption()))
+    return cert_file, key_file
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """ Keep-alive handler streaming JSON answers (chunked encoding) """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Headers and chunks are separate writes
+
+    def log_message(self, *args):
+        pass
+
+    def answer(self, path: str, query: dict):
+        """ :return: JSON chunks (str) or None for a 404 """
+        raise NotImplementedError
+
+    def do_GET(self):
+        self.server.count()
+        time.sleep(self.server.latency)
+        url = urlsplit(self.path)
+        chunks = self.answer(url.path, parse_qs(url.query))
+        if chunks is None:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        buffer = []
+        size = 0
+        for chunk in itertools.chain(chunks, [None]):
+            if chunk is not None:
+                buffer.append(chunk)
+                size += len(chunk)
+            if buffer and (chunk is None or size > 65536):
+                data = ''.join(buffer).encode('utf-8')
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                buffer = []
+                size = 0
+        self.wfile.write(b'0\r\n\r\n')
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    """ HTTPS server counting the requests """
+
+    daemon_threads = True
+
+    def __init__(self, handler, dataset: Dataset, latency: float, cert: tuple,
+                 port: int = 0):
+        super(MockHTTPServer, self).__init__(('127.0.0.1', port), handler)
+        self.dataset = dataset
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*cert)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+
+def json_list(items):
+    """ Generator - JSON chunks of a list, one item at a time """
+    yield '['
+    for index, item in enumerate(items):
+        yield (',' if index else '') + json.dumps(item)
+    yield ']'
+
+
+class UnisphereHandler(JSONHandler):
+    """ REST API of UNISPHERE for VMAX (VMAX-3 family) """
+
+    def volume(self, index: int):
+        data = self.server.dataset
+        host = data.host_of(index)
+        volume = {'volumeId': '%05X' % index,
+                  'wwn': '60000970000197800123533%09X' % index,
+                  'cap_gb': float(8 * (1 + index % 64)), 'cap_mb': 8192.0 * (1 + index % 64),
+                  'cap_cyl': 4369 * (1 + index % 64), 'volume_identifier': 'vol_%s' % index,
+                  'status': 'Ready', 'type': 'TDEV', 'allocated_percent': index % 100,
+                  'num_of_front_end_paths': 2, 'num_of_storage_groups': 1,
+                  'storageGroupId': ['SG_HOST_%s' % host]}
+        volume.update(data.changes.get(index, {}))
+        return volume
+
+    def objects(self):
+        """ Lists and details of each kind of object (except the volumes) """
+        data = self.server.dataset
+        hosts = range(data.hosts)
+        wwn = '10000000C9%06X'
+        return {
+            'host': ('hostId', 'host', ['HOST_%s' % h for h in hosts], lambda h: {
+                'hostId': h, 'num_of_initiators': 2, 'num_of_host_groups': 0,
+                'num_of_masking_views': 1, 'consistent_lun': False,
+                'initiator': [wwn % (2 * int(h[5:])), wwn % (2 * int(h[5:]) + 1)],
+                'maskingview': ['MV_%s' % h]}),
+            'hostgroup': ('hostGroupId', 'hostGroup',
+                          ['HG_%s' % g for g in range(max(data.hosts // 10, 1))], lambda g: {
+                              'hostGroupId': g, 'num_of_hosts': 10, 'num_of_initiators': 20,
+                              'num_of_masking_views': 0, 'consistent_lun': False,
+                              'host': [{'hostId': 'HOST_%s' % (int(g[3:]) * 10 + h)}
+                                       for h in range(10)]}),
+            'initiator': ('initiatorId', 'initiator',
+                          [wwn % i for i in range(2 * data.hosts)], lambda i: {
+                              'initiatorId': i, 'host': 'HOST_%s' % (int(i[10:], 16) // 2),
+                              'symmetrixPortKey': [{'directorId': 'FA-1D', 'portId': '4'}],
+                              'on_fabric': True, 'logged_in': True,
+                              'num_of_masking_views': 1, 'num_of_host_groups': 0}),
+            'maskingview': ('maskingViewId', 'maskingView',
+                            ['MV_HOST_%s' % h for h in hosts], lambda m: {
+                                'maskingViewId': m, 'hostId': m[3:], 'portGroupId': 'PG_1',
+                                'storageGroupId': 'SG_%s' % m[3:]}),
+            'portgroup': ('portGroupId', 'portGroup', ['PG_1'], lambda p: {
+                'portGroupId': p, 'num_of_ports': 2, 'num_of_masking_views': data.hosts,
+                'symmetrixPortKey': [{'directorId': 'FA-1D', 'portId': '4'},
+                                     {'directorId': 'FA-2D', 'portId': '4'}]}),
+            'storagegroup': ('storageGroupId', 'storageGroup',
+                             ['SG_HOST_%s' % h for h in hosts], lambda s: {
+                                 'storageGroupId': s, 'num_of_masking_views': 1,
+                                 'type': 'Standalone', 'num_of_child_sgs': 0,
+                                 'num_of_vols': len(range(int(s[8:]), data.volumes, data.hosts)),
+                                 'cap_gb': 100.0, 'maskingview': ['MV_%s' % s[3:]]}),
+            'srp': ('srpId', 'srp', ['SRP_1'], lambda s: {
+                'srpId': s, 'emulation': 'FBA', 'total_usable_cap_gb': 500000.0,
+                'total_subscribed_cap_gb': 400000.0, 'total_allocated_cap_gb': 300000.0,
+                'total_snapshot_allocated_cap_gb': 0.0,
+                'total_srdf_dse_allocated_cap_gb': 0.0, 'reserved_cap_percent': 10}),
+        }
+
+    def volume_list(self, query: dict):
+        """ First page of a list of volumes, with an iterator if needed """
+        data = self.server.dataset
+        group = query.get('storageGroupId', [None])[0]
+        if group is None:
+            volumes = range(data.volumes)
+        elif data.changes:
+            volumes = [v for v in range(data.volumes)
+                       if group in self.volume(v)['storageGroupId']]
+        else:
+            volumes = range(int(group[8:]), data.volumes, data.hosts)
+        # Filters on the attributes of the volumes (equality only)
+        filters = {key: values[0] for key, values in query.items()
+                   if key not in ('storageGroupId', 'tdev', 'meta_member')}
+        if filters:
+            volumes = [v for v in volumes
+                       if all(str(self.volume(v).get(key)) == value
+                              for key, value in filters.items())]
+        iterator = 'iterator-%s-%s_0' % (group or 'all', next(self.server.serial))
+        self.server.iterators[iterator] = volumes
+        first = [{'volumeId': '%05X' % v} for v in volumes[:PAGE_SIZE]]
+        answer = {'count': len(volumes), 'maxPageSize': PAGE_SIZE,
+                  'resultList': {'result': first, 'from': 1, 'to': len(first)}}
+        if len(volumes) > PAGE_SIZE:
+            answer['id'] = iterator
+        return answer
+
+    def answer(self, path: str, query: dict):
+        base = '/univmax/restapi/'
+        if not path.startswith(base):
+            return None
+        parts = path[len(base):].split('/')
+
+        if parts[:2] == ['common', 'Iterator'] and len(parts) == 4:
+            volumes = self.server.iterators.get(parts[2])
+            if volumes is None:
+                return None
+            start, end = int(query['from'][0]), int(query['to'][0])
+            page = [{'volumeId': '%05X' % v} for v in volumes[start - 1:end]]
+            return [json.dumps({'result': page, 'from': start, 'to': end})]
+
+        if parts[:2] == ['system', 'version']:
+            return [json.dumps({'version': 'V8.4.0.1'})]
+
+        if len(parts) < 3 or parts[1] != 'symmetrix' or parts[2] != VMAX_ID:
+            return None
+        data = self.server.dataset
+        if len(parts) == 3:
+            return [json.dumps({'symmetrix': [{
+                'symmetrixId': VMAX_ID, 'model': 'VMAX250F', 'ucode': '5978.221.221',
+                'device_count': data.volumes,
+                'virtualCapacity': {'used_capacity_gb': 300000.0,
+                                    'total_capacity_gb': 500000.0}}]})]
+
+        kind = parts[3]
+        if kind == 'volume':
+            if len(parts) == 4:
+                return [json.dumps(self.volume_list(query))]
+            index = int(parts[4], 16)
+            if index >= data.volumes:
+                return None
+            return [json.dumps({'volume': [self.volume(index)]})]
+
+        objects = self.objects()
+        if kind not in objects:
+            return None
+        key, name, ids, details = objects[kind]
+        if len(parts) == 4:
+            return [json.dumps({key: ids})]
+        return [json.dumps({name: [details(parts[4])]})]
+
+
+class VPLEXHandler(JSONHandler):
+    """ REST API of a VPLEX (2 clusters, 4 backend arrays) """
+
+    arrays = ['EMC-SYMMETRIX-%s' % a for a in range(4)]
+
+    def do_GET(self):
+        if self.headers.get('Password') == VPLEX_PASSWORD:
+            return super().do_GET()
+
+        self.server.count()
+        data = json.dumps({'response': {'context': None, 'message':
+                                        'User authentication failed.',
+                                        'exception': None}}).encode('utf-8')
+        self.send_response(401)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def vpd(self, index: int):
+        return 'VPD83T3:60001440000000103%015x' % index
+
+    def clusters(self):
+        for c in (1, 2):
+            yield {'parent': '/clusters', 'name': 'cluster-%s' % c,
+                   'top-level-assembly': 'FNM0012345%s' % c, 'health-state': 'ok',
+                   'operational-status': 'ok', 'cluster-id': c, 'island-id': 1,
+                   'default-cache-mode': 'synchronous',
+                   'director-names': ['director-%s-1-A' % c, 'director-%s-1-B' % c],
+                   'default-xcopy-template': 'VAAI'}
+
+    def virtual_volumes(self):
+        for v in range(self.server.dataset.volumes):
+            yield {'parent': '/clusters/cluster-%s/virtual-volumes' % (1 + v % 2),
+                   'name': 'vv_%s' % v, 'capacity': '%sB' % (10737418240 * (1 + v % 8)),
+                   'locality': 'local', 'service-status': 'running',
+                   'health-state': 'ok', 'operational-status': 'ok',
+                   'consistency-group': None, 'supporting-device': 'dev_%s' % v,
+                   'vpd-id': self.vpd(v), 'expandable': True,
+                   'expandable-capacity': '0B'}
+
+    def initiators(self):
+        for i in range(2 * self.server.dataset.hosts):
+            yield {'parent': '/clusters/cluster-1/exports/initiator-ports',
+                   'name': 'host_%s_hba%s' % (i // 2, i % 2),
+                   'node-wwn': '0x20000000c9%06x' % i, 'port-wwn': '0x10000000c9%06x' % i,
+                   'suspend-on-detach': None, 'target-ports': ['P000000003CA00147-A0-FC00']}
+
+    def storage_views(self):
+        data = self.server.dataset
+        for h in range(data.hosts):
+            yield {'parent': '/clusters/cluster-1/exports/storage-views',
+                   'name': 'SV_host_%s' % h, 'operational-status': ['ok'],
+                   'initiators': ['host_%s_hba0' % h, 'host_%s_hba1' % h],
+                   'ports': ['P000000003CA00147-A0-FC00'], 'xcopy-enabled': True,
+                   'virtual-volumes': ['(%s,vv_%s,%s,%sG)' % (lun, v % data.volumes,
+                                                              self.vpd(v % data.volumes),
+                                                              10 * (1 + v % 8))
+                                       for lun, v in enumerate(data.mapped(h))]}
+
+    def logical_units(self, cluster: str = None, array: str = None):
+        for v in range(self.server.dataset.volumes):
+            c, a = 'cluster-%s' % (1 + v % 2), self.arrays[v % len(self.arrays)]
+            if (cluster and cluster != c) or (array and array != a):
+                continue
+            yield {'parent': '/clusters/%s/storage-elements/storage-arrays/%s/'
+                             'logical-units' % (c, a),
+                   'name': self.vpd(v).replace('VPD83T3:', 'VPD83T3:1'),
+                   'storage-volume': 'sv_%s' % v, 'visibility': 'visible',
+                   'connectivity-status': 'ok', 'alua-support': 'none',
+                   'active-aao-visibility': [], 'luns': ['0x%016x' % v]}
+
+    def storage_arrays(self):
+        for c in (1, 2):
+            for array in self.arrays:
+                yield {'parent': '/clusters/cluster-%s/storage-elements/'
+                                 'storage-arrays' % c, 'name': array}
+
+    def answer(self, path: str, query: dict):
+        base = '/vplex/'
+        if not path.startswith(base):
+            return None
+        parts = path[len(base):].split('/')
+        wildcard = {('clusters', '*'): self.clusters,
+                    ('clusters', '*', 'virtual-volumes', '*'): self.virtual_volumes,
+                    ('clusters', '*', 'exports', 'initiator-ports', '*'): self.initiators,
+                    ('clusters', '*', 'exports', 'storage-views', '*'): self.storage_views,
+                    ('clusters', '*', 'storage-elements', 'storage-arrays', '*'):
+                        self.storage_arrays,
+                    ('clusters', '*', 'storage-elements', 'storage-arrays', '*',
+                     'logical-units', '*'): self.logical_units}
+        if tuple(parts) in wildcard:
+            records = wildcard[tuple(parts)]()
+        elif len(parts) == 7 and parts[2:4] == ['storage-elements', 'storage-arrays']:
+            records = self.logical_units(parts[1], parts[4])
+        else:
+            return None
+        return itertools.chain(['{"response": {"context": '], json_list(records),
+                               [', "message": null, "exception": null}}'])
+
+
+# Columns of each SVC command and the values that must be numbers
+SVC_COMMANDS = {
+    'lsvdisk': (['id', 'name', 'IO_group_id', 'IO_group_name', 'status',
+                 'mdisk_grp_id', 'mdisk_grp_name', 'capacity', 'type', 'FC_id',
+                 'FC_name', 'RC_id', 'RC_name', 'vdisk_UID', 'fc_map_count',
+                 'copy_count', 'fast_write_state', 'se_copy_count', 'RC_change',
+                 'compressed_copy_count', 'parent_mdisk_grp_id',
+                 'parent_mdisk_grp_name', 'formatting'], 'volumes'),
+    'lshostvdiskmap': (['id', 'name', 'SCSI_id', 'vdisk_id', 'vdisk_name',
+                        'vdisk_UID', 'IO_group_id', 'IO_group_name'], 'mappings'),
+    'lshost': (['id', 'name', 'port_count', 'iogrp_count', 'status', 'site_id',
+                'site_name'], 'hosts'),
+    'lsfabric': (['remote_wwpn', 'remote_nportid', 'id', 'node_name', 'local_wwpn',
+                  'local_port', 'local_nportid', 'state', 'name', 'cluster_name',
+                  'type'], 'initiators'),
+    'lsmdisk': (['id', 'name', 'status', 'mode', 'mdisk_grp_id', 'mdisk_grp_name',
+                 'capacity', 'ctrl_LUN_#', 'controller_name', 'UID', 'tier',
+                 'encrypt', 'site_id', 'site_name'], 32),
+    'lsmdiskgrp': (['id', 'name', 'status', 'mdisk_count', 'vdisk_count',
+                    'capacity', 'extent_size', 'free_capacity', 'virtual_capacity',
+                    'used_capacity', 'real_capacity', 'overallocation', 'warning',
+                    'easy_tier', 'easy_tier_status', 'compression_active',
+                    'parent_mdisk_grp_id', 'parent_mdisk_grp_name',
+                    'child_mdisk_grp_count', 'child_mdisk_grp_capacity', 'type',
+                    'encrypt', 'owner_type', 'site_id', 'site_name'], 4),
+    'lscontroller': (['id', 'controller_name', 'ctrl_s/n', 'vendor_id',
+                      'product_id_low', 'product_id_high', 'site_id',
+                      'site_name'], 4),
+    'lsnode': (['id', 'name', 'UPS_serial_number', 'WWNN', 'status', 'IO_group_id',
+                'IO_group_name', 'config_node', 'UPS_unique_id', 'hardware',
+                'iscsi_name', 'iscsi_alias', 'panel_name', 'enclosure_id',
+                'canister_id', 'enclosure_serial_number', 'site_id', 'site_name'], 4),
+    'lsuser': (['id', 'name', 'password', 'ssh_key', 'remote', 'usergrp_id',
+                'usergrp_name'], 8),
+}
+
+SVC_SYSTEM = ['id', 'name', 'location', 'product_name', 'total_overallocation',
+              'total_mdisk_capacity', 'space_in_mdisk_grps',
+              'space_allocated_to_vdisks', 'total_free_space',
+              'total_vdiskcopy_capacity', 'total_used_capacity',
+              'total_vdisk_capacity', 'total_allocated_extent_capacity',
+              'compression_virtual_capacity', 'compression_compressed_capacity',
+              'compression_uncompressed_capacity', 'time_zone', 'code_level',
+              'email_reply', 'email_contact', 'cluster_ntp_IP_address',
+              'compression_active', 'email_organization', 'email_machine_address',
+              'email_machine_city']
+
+
+class SVCServer(paramiko.ServerInterface):
+    """ SSH server of a SVC : each command answers in a channel of its own """
+
+    def __init__(self, dataset: Dataset, latency: float = 0.0, port: int = 0):
+        self.dataset = dataset
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._key = paramiko.RSAKey.generate(2048)
+        # The clients closing their connection are not errors
+        logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(('127.0.0.1', port))
+        self._socket.listen(16)
+        self.port = self._socket.getsockname()[1]
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        with self._lock:
+            self.requests += 1
+        threading.Thread(target=self._execute, args=(channel, command.decode()),
+                         daemon=True).start()
+        return True
+
+    def _rows(self, command: str):
+        """ Generator - CSV lines of the output of a command """
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator='\n')
+        name = command.split()[0]
+        if name == 'lssystem':
+            for key in SVC_SYSTEM:
+                writer.writerow([key, 'svc_mock' if key == 'name' else
+                                 '1099511627776' if 'capacity' in key or
+                                 key.startswith(('total_', 'space_')) else key])
+            yield output.getvalue()
+            return
+
+        headers, count = SVC_COMMANDS[name]
+        count = count if isinstance(count, int) else getattr(self.dataset, count, 0) \
+            if count != 'initiators' else 2 * self.dataset.hosts
+        writer.writerow(headers)
+        for index in range(count):
+            writer.writerow([index if key == 'id' else
+                             str(10737418240 * (1 + index % 8)) if 'capacity' in key else
+                             '600507680C8080001800000000%06X' % index if 'UID' in key else
+                             '%s_%s' % (key, index) for key in headers])
+            if index % 1000 == 999:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue()
+
+    def _execute(self, channel, command: str):
+        time.sleep(self.latency)
+        try:
+            for chunk in self._rows(command):
+                channel.sendall(chunk.encode('utf-8'))
+            channel.send_exit_status(0)
+        except (KeyError, IndexError):
+            channel.sendall_stderr(b'CMMVC5986E Unknown command\n')
+            channel.send_exit_status(1)
+        except (OSError, EOFError):
+            channel.close()
+            return
+        # EOF only : closing could come before the answer to the exec request
+        channel.shutdown_write()
+
+    def _connection(self, client):
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self._key)
+        try:
+            transport.start_server(server=self)
+        except (paramiko.SSHException, EOFError):
+            return
+        channels = []  # Served by the exec requests, but must be kept alive
+        while transport.is_active():
+            channel = transport.accept(timeout=1)
+            if channel is not None:
+                channels.append(channel)
+
+    def serve_forever(self):
+        while True:
+            client, _ = self._socket.accept()
+            threading.Thread(target=self._connection, args=(client,), daemon=True).start()
+
+
+def start_servers(dataset: Dataset, latency: float = 0.0, cert: tuple = None,
+                  port: int = 0):
+    """
+    Start the three servers in background threads
+    :param dataset: data served
+    :param latency: delay of each request or command (seconds)
+    :param cert: (certificate file, key file) of the HTTPS servers (new
+                 self-signed certificate if None)
+    :param port: port of UNISPHERE, then VPLEX and SVC (random ports if 0)
+    :return: dict of the servers ('vmax', 'vplex', 'svc'), with a port and a
+             count of the requests
+    """
+    if cert is None:
+        cert = certificate(tempfile.mkdtemp())
+    ports = [port, port + 1, port + 2] if port else [0, 0, 0]
+    servers = {'vmax': MockHTTPServer(UnisphereHandler, dataset, latency, cert, ports[0]),
+               'vplex': MockHTTPServer(VPLEXHandler, dataset, latency, cert, ports[1]),
+               'svc': SVCServer(dataset, latency, ports[2])}
+    servers['vmax'].iterators = {}
+    servers['vmax'].serial = itertools.count()
+    for server in servers.values():
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
+
+
+def main(arguments):
+    dataset = Dataset(arguments.volumes, arguments.hosts, arguments.mappings)
+    cert = certificate(tempfile.mkdtemp())
+    servers = start_servers(dataset, arguments.latency, cert, arguments.port)
+    print('Certificate of the HTTPS servers : %s' % cert[0])
+    print('UNISPHERE : 127.0.0.1 port %s (section [%s])' % (servers['vmax'].port, VMAX_ID))
+    print('VPLEX     : 127.0.0.1 port %s' % servers['vplex'].port)
+    print('SVC       : 127.0.0.1 port %s' % servers['svc'].port)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mock servers of VMAX, VPLEX and SVC')
+    parser.add_argument('-v', '--volumes', type=int, default=10000,
+                        help='number of volumes')
+    parser.add_argument('--hosts', type=int, default=100, help='number of hosts')
+    parser.add_argument('-m', '--mappings', type=int,
+                        help='number of host mappings (one by volume by default)')
+    parser.add_argument('-l', '--latency', type=float, default=0.0,
+                        help='delay of each request (seconds)')
+    parser.add_argument('-p', '--port', type=int, default=0,
+                        help='port of UNISPHERE, VPLEX is on the next one and '
+                             'SVC on the one after (random ports by default)')
+    main(parser.parse_args())
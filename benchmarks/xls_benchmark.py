@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Benchmark of the Excel injector.
+Write a sheet of synthetic TDEV rows and report the number of rows per second.
+
+Usage: python benchmarks/xls_benchmark.py --rows 1000000 [--streaming]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from arrays.schema import record_class
+from arrays.xls_injector import XlsInjector
+
+TDEV = record_class(('Symmetrix Id', 'volumeId', 'wwn', 'cap_gb', 'status',
+                     'storageGroupId'))
+
+
+def synthetic_tdev(index: int):
+    """
+    Build a row looking like a VMAX TDEV
+    :param index: number of the device
+    :return: (Record)
+    """
+    return TDEV(('000297800123',
+                 '%05X' % index,
+                 '60000970000297800123533%09X' % index,
+                 float(index % 2048),
+                 'Ready',
+                 ['SG_HOST_%s' % (index % 500)]))
+
+
+def main(arguments):
+    directory = tempfile.mkdtemp()
+    injector = XlsInjector(directory=directory, filename='benchmark.xlsx',
+                           streaming=arguments.streaming)
+
+    start = time.time()
+    for index in range(arguments.rows):
+        injector.save(name='TDEVs', data=synthetic_tdev(index))
+    written = time.time()
+    injector.close()
+    end = time.time()
+
+    size = os.path.getsize(os.path.join(directory, 'benchmark.xlsx'))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print('rows          : %s' % arguments.rows)
+    print('streaming     : %s' % arguments.streaming)
+    print('write time    : %.1fs (%.0f rows/sec)' %
+          (written - start, arguments.rows / (written - start)))
+    print('close time    : %.1fs' % (end - written))
+    print('total         : %.1fs (%.0f rows/sec)' %
+          (end - start, arguments.rows / (end - start)))
+    print('file size     : %.1f MB' % (size / 1048576))
+    print('peak memory   : %.0f MB' % peak)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark of XlsInjector')
+    parser.add_argument('-r', '--rows', type=int, default=1000000,
+                        help='number of rows to write')
+    parser.add_argument('-s', '--streaming', action='store_true', default=False,
+                        help='use the constant memory mode')
+    main(parser.parse_args())
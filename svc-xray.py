@@ -5,7 +5,13 @@ import argparse
 import logging
 import socket
 import sys
+from arrays.capture import CaptureConnector, ReplayConnector, replayable
+from arrays.columnar_injector import ColumnarInjector
+from arrays.metrics import get_metrics
+from arrays.parallel import run_inventories
 from arrays.parser import ConfigFileParser
+from arrays.process_injector import ProcessInjector
+from arrays.sqlite_injector import SQLiteInjector
 from arrays.svc.svc_connector import SVCCommunicator
 from arrays.xls_injector import XlsInjector
 from arrays.svc.svc_inventory import SVCInventoryCollector
@@ -28,27 +34,68 @@ def main(arguments):
     filename = arguments.file
     path = arguments.path if arguments.path else '.'
     try:
-        formatter = XlsInjector(directory=path, filename=filename)
-    except XlsFormatterError as error:
+        if arguments.format == 'xlsx':
+            injector, options = XlsInjector, {'streaming': arguments.streaming}
+        elif arguments.format == 'sqlite':
+            injector, options = SQLiteInjector, {}
+        else:
+            injector, options = ColumnarInjector, {'file_format': arguments.format}
+        if arguments.writer_process:
+            formatter = ProcessInjector(injector, directory=path, filename=filename,
+                                        **options)
+        else:
+            formatter = injector(directory=path, filename=filename, **options)
+    except (XlsFormatterError, ColumnarFormatterError, SQLiteFormatterError,
+            InjectorProcessError) as error:
         logger.critical('Error while creation file: %s' % error)
         sys.exit(2)
 
-    for array, address, user, password in config.get_arrays():
-        logger.info('\nInventory: %s' % array)
+    def record(svc_array, array):
+        """ Capture the data of the SVC if asked """
+        if arguments.capture:
+            return CaptureConnector(svc_array, arguments.capture, array)
+        return svc_array
 
+    def inventory(injector, array, address, user, password):
+        logger.info('\nInventory: %s' % array)
+        if arguments.replay:
+            svc_array = ReplayConnector(arguments.replay, array)
+        else:
+            svc_array = SVCCommunicator(address=address, login=user, password=password,
+                                        port=config.get_int(array, 'port', 22))
         try:
-            svc_array = SVCCommunicator(address=address, login=user, password=password)
-            collector = SVCInventoryCollector()
-            collector.collect(formatter=formatter, array=svc_array)
+            channels = arguments.channels or config.get_int(array, 'channels', 1)
+            collector = SVCInventoryCollector(channels=channels)
+            collector.collect(formatter=injector, array=record(svc_array, array))
+        finally:
             svc_array.close()
-        except XlsFormatterError as error:
-            logger.critical('Error while writing file: %s' % error)
-            sys.exit(2)
-        except (SVCConnectorError, socket.gaierror) as error:
-            logger.error('Error: %s' % error)
-            logger.warning('Skip %s and go ahead' % array)
-            continue
-    del formatter
+
+    arrays = config.get_arrays()
+    if arguments.replay:
+        arrays = replayable(arguments.replay, arrays)
+
+    inventories = run_inventories(arrays, inventory, formatter, jobs=arguments.jobs)
+    metrics = get_metrics()
+    try:
+        with metrics.timer('collect'):
+            for array, run in inventories:
+                try:
+                    run()
+                except (XlsFormatterError, ColumnarFormatterError,
+                        SQLiteFormatterError, InjectorProcessError) as error:
+                    logger.critical('Error while writing file: %s' % error)
+                    sys.exit(2)
+                except (SVCConnectorError, socket.gaierror) as error:
+                    logger.error('Error: %s' % error)
+                    logger.warning('Skip %s and go ahead' % array)
+                    continue
+        with metrics.timer('close'):
+            formatter.close()
+    finally:
+        if arguments.report:
+            metrics.write_json(arguments.report)
+        if arguments.prometheus:
+            metrics.write_prometheus(arguments.prometheus)
 
 
 if __name__ == '__main__':
@@ -57,6 +104,28 @@ if __name__ == '__main__':
     parser.add_argument('-c', '--config', type=str, help='config file', required=True)
     parser.add_argument('-p', '--path', type=str, help='path to store file', required=True)
     parser.add_argument('-f', '--file', type=str, help='name of the file', required=True)
+    parser.add_argument('-n', '--channels', type=int,
+                        help='commands running at the same time (override config)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of arrays collected at the same time '
+                             '(the ones waiting to be written stay in memory)')
+    parser.add_argument('-o', '--format', choices=['xlsx', 'sqlite', 'parquet', 'arrow'],
+                        default='xlsx', help='format of the inventory (parquet '
+                                             'and arrow need pyarrow)')
+    parser.add_argument('-s', '--streaming', action='store_true', default=False,
+                        help='write the rows on disk as they come (low memory)')
+    parser.add_argument('--writer-process', action='store_true', default=False,
+                        help='encode the inventory in a process of its own')
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument('--capture', type=str,
+                        help='directory where to capture the data of the arrays')
+    replay.add_argument('--replay', type=str,
+                        help='directory of a capture to replay (no network)')
+    parser.add_argument('--report', type=str,
+                        help='JSON file of the measures of the run (timings, '
+                             'requests, rows)')
+    parser.add_argument('--prometheus', type=str,
+                        help='same measures in a Prometheus textfile')
     parser.add_argument('-d', '--debug', action='store_true', default=False,
                         help='enable debug mode')
 
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+"""
+Mock servers of the benchmarks (benchmarks/mock_servers.py), started once
+for all the tests.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'benchmarks'))
+
+from mock_servers import VMAX_ID, Dataset, certificate, start_servers
+
+_servers = {}  # By number of volumes
+
+
+def servers(volumes: int = 50):
+    """
+    :param volumes: size of the dataset
+    :return: dict of the mock servers ('vmax', 'vplex', 'svc')
+    """
+    if volumes not in _servers:
+        cert = certificate(tempfile.mkdtemp())
+        _servers[volumes] = start_servers(Dataset(volumes=volumes, hosts=5),
+                                          cert=cert)
+    return _servers[volumes]
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from arrays.cache import ResponseCache
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.directory)
+
+    def test_read_without_the_lock(self):
+        self.cache.put('https://vmax/volume/1', {'volumeId': '1'})
+        locked = []
+
+        def load(file):
+            locked.append(self.cache._lock.locked())
+            return json.loads(file.read())
+
+        with mock.patch('arrays.cache.json.load', load):
+            self.assertEqual(self.cache.get('https://vmax/volume/1'), {'volumeId': '1'})
+        self.assertEqual(locked, [False])
+
+    def test_file_removed_meanwhile(self):
+        self.cache.put('https://vmax/volume/1', {'volumeId': '1'})
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        self.assertIsNone(self.cache.get('https://vmax/volume/1'))
+
+    def test_expired(self):
+        cache = ResponseCache(self.directory, ttl=-1)
+        cache.put('https://vmax/volume/1', {'volumeId': '1'})
+        self.assertIsNone(cache.get('https://vmax/volume/1'))
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
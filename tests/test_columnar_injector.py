@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import tempfile
+import unittest
+from arrays.columnar_injector import ColumnarInjector, pyarrow
+from arrays.schema import record_class
+
+
+def row(**values):
+    return record_class(tuple(values))(values.values())
+
+
+@unittest.skipIf(pyarrow is None, 'needs pyarrow')
+class HeadersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def read(self, name: str, file_format: str = 'parquet'):
+        path = os.path.join(self.directory, 'inventory', '%s.%s' % (name, file_format))
+        if file_format == 'parquet':
+            return pyarrow.parquet.read_table(path).to_pylist()
+        with pyarrow.OSFile(path) as source:
+            return pyarrow.ipc.open_file(source).read_all().to_pylist()
+
+    def test_rows_of_different_widths(self):
+        formatter = ColumnarInjector(self.directory, 'inventory.xlsx')
+        formatter.save(name='Arrays', data=row(id='1', virtual_total=10))
+        formatter.save(name='Arrays', data=row(id='2', virtual_free=5,
+                                               virtual_total=20))
+        formatter.save(name='Arrays', data=row(id='3'))
+        formatter.close()
+
+        self.assertEqual(self.read('Arrays'), [
+            {'id': '1', 'virtual_total': 10, 'virtual_free': None},
+            {'id': '2', 'virtual_total': 20, 'virtual_free': 5},
+            {'id': '3', 'virtual_total': None, 'virtual_free': None}])
+
+    def test_new_column_after_the_first_batch(self):
+        for file_format in ColumnarInjector.formats:
+            formatter = ColumnarInjector(self.directory, 'inventory.xlsx',
+                                         file_format=file_format, batch_size=1)
+            formatter.save(name='Arrays', data=row(id='1', virtual_total=10))
+            formatter.save(name='Arrays', data=row(id='2'))
+            formatter.save(name='Arrays', data=row(id='3', virtual_free=5))
+            formatter.close()
+            self.assertEqual(self.read('Arrays', file_format), [
+                {'id': '1', 'virtual_total': 10, 'virtual_free': None},
+                {'id': '2', 'virtual_total': None, 'virtual_free': None},
+                {'id': '3', 'virtual_total': None, 'virtual_free': 5}])
+
+    def test_values_not_fitting_the_first_batch(self):
+        formatter = ColumnarInjector(self.directory, 'inventory.xlsx', batch_size=2)
+        for index, size in enumerate([1, 2, 2.5, 'abc', 3]):
+            formatter.save(name='Volumes', data=row(id=index, size=size))
+        formatter.close()
+        table = pyarrow.parquet.read_table(os.path.join(self.directory, 'inventory',
+                                                        'Volumes.parquet'))
+        self.assertEqual(table.column('size').to_pylist(),
+                         ['1', '2', '2.5', 'abc', '3'])
+        self.assertEqual(table.column('id').to_pylist(), [0, 1, 2, 3, 4])
+
+        formatter = ColumnarInjector(self.directory, 'inventory.xlsx', batch_size=2)
+        for size in [1, 2, 2.5, None]:
+            formatter.save(name='Volumes', data=row(size=size))
+        formatter.close()
+        self.assertEqual(self.read('Volumes'), [{'size': 1.0}, {'size': 2.0},
+                                                {'size': 2.5}, {'size': None}])
+
+
+if __name__ == '__main__':
+    unittest.main()
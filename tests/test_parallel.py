@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import asyncio
+import time
+import unittest
+from arrays.memory_injector import MemoryInjector
+from arrays.parallel import run_async_inventories, run_inventories
+from arrays.schema import record_class
+
+Row = record_class(('Index',))
+
+
+def inventory(formatter, array, rows, delay, error):
+    """ Fake inventory : save some rows, then fail if asked """
+    for index in range(rows):
+        formatter.save(name=array, data=Row((index,)))
+        time.sleep(delay)
+    if error:
+        raise ValueError(array)
+
+
+class RunInventoriesTest(unittest.TestCase):
+
+    def test_order_of_the_configuration(self):
+        formatter = MemoryInjector()
+        arrays = [('A', 5, 0.02, False), ('B', 3, 0.0, True), ('C', 4, 0.0, False)]
+        errors = []
+        for array, run in run_inventories(arrays, inventory, formatter, jobs=3):
+            try:
+                run()
+            except ValueError as error:
+                errors.append(str(error))
+
+        self.assertEqual(errors, ['B'])
+        self.assertEqual([(name, data[0]) for name, data in formatter._rows],
+                         [('A', index) for index in range(5)] +
+                         [('B', index) for index in range(3)] +
+                         [('C', index) for index in range(4)])
+
+    def test_first_array_written_live(self):
+        formatter = MemoryInjector()
+
+        def first(injector, array, *args):
+            injector.save(name=array, data=Row((0,)))
+            # The first array of the configuration isn't kept in memory
+            self.assertEqual(len(formatter), 1)
+
+        for array, run in run_inventories([('A',)], first, formatter, jobs=2):
+            run()
+
+
+class FakeConnector(object):
+    """ Asynchronous connector of a fake array """
+
+    def __init__(self, array: str, started: list, delay: float):
+        self._array = array
+        self._delay = delay
+        started.append(array)
+
+    async def prefetch(self):
+        await asyncio.sleep(self._delay)
+        if self._array == 'B':
+            raise ValueError(self._array)
+        return self._array
+
+    async def close(self):
+        pass
+
+
+class RunAsyncInventoriesTest(unittest.TestCase):
+
+    def run_all(self, jobs: int):
+        """ :return: (arrays started when each one is written, errors) """
+        started = []
+        written = []
+        errors = []
+
+        def write(formatter, connector, array):
+            written.append(list(started))
+
+        arrays = [('A', 0.05), ('B', 0.0), ('C', 0.0)]
+        for array, run in run_async_inventories(
+                arrays, lambda array, delay: FakeConnector(array, started, delay),
+                write, MemoryInjector(), jobs=jobs):
+            try:
+                run()
+            except ValueError as error:
+                errors.append(str(error))
+        return written, errors
+
+    def test_all_arrays_at_once(self):
+        written, errors = self.run_all(jobs=0)
+        self.assertEqual(errors, ['B'])
+        self.assertEqual(written, [['A', 'B', 'C']] * 2)
+
+    def test_arrays_in_memory_bounded(self):
+        written, errors = self.run_all(jobs=1)
+        self.assertEqual(errors, ['B'])
+        # An array starts once the previous one is written
+        self.assertEqual(written, [['A'], ['A', 'B', 'C']])
+
+
+if __name__ == '__main__':
+    unittest.main()
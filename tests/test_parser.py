@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import tempfile
+import unittest
+from arrays.errors import ConfigurationError
+from arrays.parser import ConfigFileParser
+
+
+class IntegersTest(unittest.TestCase):
+
+    def parse(self, settings: str):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'vmax.conf')
+        with open(path, 'w') as file:
+            file.write('[000197800123]\naddress = unisphere\nuser = smc\n'
+                       'password = smc\n%s\n' % settings)
+        return ConfigFileParser(path)
+
+    def test_no_rate_limit_and_no_retry(self):
+        config = self.parse('rate = 0\nretries = 0')
+        self.assertEqual(config.get_int('000197800123', 'rate'), 0)
+        self.assertEqual(config.get_int('000197800123', 'retries'), 0)
+
+    def test_positive_settings(self):
+        for settings in ('workers = 0', 'port = 0', 'rate = -1', 'retries = x'):
+            with self.assertRaises(ConfigurationError):
+                self.parse(settings)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from arrays.errors import InjectorProcessError
+from arrays.injector import Injector
+from arrays.process_injector import ProcessInjector
+from arrays.schema import record_class
+from arrays.sqlite_injector import SQLiteInjector
+
+
+class WriterError(Exception):
+    def __init__(self, path, reason):
+        Exception.__init__(self, '%s: %s' % (path, reason))
+
+
+class FailingInjector(Injector):
+    """ Injector raising an error with two arguments when it is closed """
+
+    def __init__(self, **options):
+        super().__init__()
+
+    def save(self, *args, **kwargs):
+        pass
+
+    def close(self):
+        raise WriterError('inventory.xlsx', 'disk full')
+
+
+class ProcessInjectorTest(unittest.TestCase):
+
+    def test_error_with_several_arguments(self):
+        formatter = ProcessInjector(FailingInjector)
+        with self.assertRaises(InjectorProcessError) as context:
+            formatter.close()
+        self.assertIn('WriterError: inventory.xlsx: disk full',
+                      str(context.exception))
+
+    def test_closed_when_deleted(self):
+        directory = tempfile.mkdtemp()
+        formatter = ProcessInjector(SQLiteInjector, directory=directory,
+                                    filename='inventory.xlsx')
+        record = record_class(('id',))
+        for index in range(10):
+            formatter.save(name='Volumes', data=record((index,)))
+        del formatter  # Ex: exit on an error, close() isn't called
+
+        database = sqlite3.connect(os.path.join(directory, 'inventory.sqlite'))
+        self.assertEqual(database.execute('SELECT COUNT(*) FROM Volumes').fetchone(),
+                         (10,))
+        database.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import unittest
+from unittest import mock
+import certifi
+from arrays.vmax.vmax_connector import VMAXArrayFactory
+from arrays.vplex.vplex_connector import VPLEXCommunicator
+from tests.mock import VMAX_ID, servers
+
+
+class SelfSignedTest(unittest.TestCase):
+    """ The arrays have self-signed certificates, even with a CA bundle set """
+
+    def setUp(self):
+        self.servers = servers()
+        # A CA bundle not trusting the certificate of the mock servers
+        patcher = mock.patch.dict(os.environ, {'REQUESTS_CA_BUNDLE': certifi.where(),
+                                               'CURL_CA_BUNDLE': certifi.where()})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_vmax(self):
+        vmax = VMAXArrayFactory(VMAX_ID, '127.0.0.1', 'smc', 'smc',
+                                port=self.servers['vmax'].port)
+        try:
+            self.assertIn('symmetrixId', vmax.get_system())
+        finally:
+            vmax.close()
+
+    def test_vplex(self):
+        vplex = VPLEXCommunicator('127.0.0.1', 'service', 'service',
+                                  port=self.servers['vplex'].port, split=True)
+        try:
+            self.assertEqual(len(list(vplex.get_clusters())), 2)
+            self.assertEqual(len(list(vplex.get_storage_arrays())), 50)
+        finally:
+            vplex.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from arrays.schema import record_class
+from arrays.sqlite_injector import SQLiteInjector
+
+
+def row(**values):
+    return record_class(tuple(values))(values.values())
+
+
+class HeadersTest(unittest.TestCase):
+
+    def test_rows_of_different_widths(self):
+        directory = tempfile.mkdtemp()
+        formatter = SQLiteInjector(directory, 'inventory.xlsx', batch_size=2)
+        formatter.save(name='Arrays', data=row(id='1', virtual_total=10))
+        formatter.save(name='Arrays', data=row(id='2', virtual_free=5,
+                                               virtual_total=20))
+        formatter.save(name='Arrays', data=row(id='3'))
+        formatter.save(name='Arrays', data=row(virtual_free=7, id='4'))
+        formatter.close()
+
+        database = sqlite3.connect(os.path.join(directory, 'inventory.sqlite'))
+        self.assertEqual(database.execute('SELECT * FROM Arrays').fetchall(),
+                         [('1', 10, None), ('2', 20, 5), ('3', None, None),
+                          ('4', None, 7)])
+        database.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import unittest
+from arrays.memory_injector import MemoryInjector
+from arrays.svc.svc_connector import SVCCommunicator
+from arrays.svc.svc_inventory import SVCInventoryCollector
+from tests.mock import servers
+
+
+def collect(channels: int):
+    """ :return: (sheet, first value) of each row, in the order of writing """
+    formatter = MemoryInjector()
+    svc = SVCCommunicator('127.0.0.1', 'superuser', 'passw0rd',
+                          port=servers()['svc'].port)
+    try:
+        SVCInventoryCollector(channels=channels).collect(formatter=formatter,
+                                                         array=svc)
+    finally:
+        svc.close()
+    return [(name, data[0]) for name, data in formatter._rows]
+
+
+class ChannelsTest(unittest.TestCase):
+
+    def test_same_output_on_several_channels(self):
+        rows = collect(channels=1)
+        self.assertEqual(sum(name == 'Volumes' for name, _ in rows), 50)
+        self.assertEqual(collect(channels=3), rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
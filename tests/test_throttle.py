@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import asyncio
+import unittest
+from arrays.errors import CircuitOpenError
+from arrays.throttle import Throttle
+
+
+class AsyncThrottleTest(unittest.TestCase):
+    """ The coroutines of the asyncio mode use the same guard as the threads """
+
+    def test_requests_in_flight(self):
+        throttle = Throttle(concurrency=2)
+        active = []
+
+        async def request():
+            async with throttle:
+                active.append(len(active) + 1)
+                await asyncio.sleep(0.01)
+                active.pop()
+            return True
+
+        async def requests():
+            peak = 0
+            tasks = [asyncio.ensure_future(request()) for _ in range(10)]
+            while not all(task.done() for task in tasks):
+                peak = max(peak, len(active))
+                await asyncio.sleep(0.001)
+            return peak, [task.result() for task in tasks]
+
+        peak, results = asyncio.run(requests())
+        self.assertEqual(peak, 2)
+        self.assertEqual(results, [True] * 10)
+
+    def test_circuit_breaker(self):
+        throttle = Throttle(breaker_threshold=2)
+
+        async def failure():
+            async with throttle:
+                raise ConnectionError()
+
+        async def requests():
+            for _ in range(2):
+                with self.assertRaises(ConnectionError):
+                    await failure()
+            with self.assertRaises(CircuitOpenError):
+                await failure()
+
+        asyncio.run(requests())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import unittest
+from arrays.vmax.vmax_filters import VMAXHostGroup, VMAXPortGroup
+
+
+class ColumnsTest(unittest.TestCase):
+
+    def test_port_group(self):
+        group = {'portGroupId': 'PG_1', 'num_of_ports': 2, 'num_of_masking_views': 1,
+                 'symmetrixPortKey': [{'directorId': 'FA-1D', 'portId': '4'},
+                                      {'directorId': 'FA-2D', 'portId': '4'}]}
+        row, = VMAXPortGroup([group], 'SYM')
+        self.assertEqual(row, ('SYM', 'PG_1', 2, 1, ['FA-1D:4', 'FA-2D:4']))
+
+        del group['symmetrixPortKey']
+        row, = VMAXPortGroup([group], 'SYM')
+        self.assertEqual(row.value('symmetrixPortKey'), '')
+
+        # The other keys are mandatory
+        del group['num_of_ports']
+        with self.assertRaises(KeyError):
+            list(VMAXPortGroup([group], 'SYM'))
+
+    def test_host_group_without_masking_view(self):
+        group = {'hostGroupId': 'HG_1', 'num_of_hosts': 1, 'num_of_initiators': 2,
+                 'num_of_masking_views': 0, 'consistent_lun': False,
+                 'host': [{'hostId': 'IG_1'}]}
+        row, = VMAXHostGroup([group], 'SYM')
+        self.assertEqual(row.value('maskingview'), '')
+        self.assertEqual(row.value('host'), ['IG_1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
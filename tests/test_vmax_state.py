@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import asyncio
+import tempfile
+import unittest
+from arrays.errors import ConfigurationError
+from arrays.vmax.vmax_connector import VMAXArrayFactory
+from arrays.vmax.vmax_filters import VMAXIncrementalThinDevice
+from arrays.vmax.vmax_state import TDEVState
+from tests.mock import VMAX_ID, servers
+
+
+class IncrementalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = servers(volumes=1500)['vmax']
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(self.server.dataset.changes.clear)
+
+    def run_inventory(self):
+        """ :return: (TDEVs by volumeId, state, requests sent) """
+        state = TDEVState(self.directory, VMAX_ID)
+        vmax = VMAXArrayFactory(VMAX_ID, '127.0.0.1', 'smc', 'smc', workers=4,
+                                state=state, port=self.server.port)
+        requests = self.server.requests
+        try:
+            volumes = vmax.get_thin_volumes()
+        finally:
+            vmax.close()
+        return ({volume['volumeId']: volume for volume in volumes}, state,
+                self.server.requests - requests)
+
+    def test_changed_devices_requested_again(self):
+        volumes, state, _ = self.run_inventory()
+        self.assertEqual((state.added, state.reused), (1500, 0))
+
+        self.server.dataset.changes[3] = {'cap_gb': 1024.0}
+        self.server.dataset.changes[7] = {'status': 'Not Ready'}
+        self.server.dataset.changes[9] = {'num_of_front_end_paths': 0}
+        volumes, state, requests = self.run_inventory()
+
+        self.assertEqual((state.changed, state.reused), (3, 1497))
+        self.assertEqual(volumes['00003']['cap_gb'], 1024.0)
+        self.assertEqual(volumes['00007']['status'], 'Not Ready')
+        self.assertEqual(volumes['00009']['num_of_front_end_paths'], 0)
+        # Lists filtered on each value, then the changed devices only
+        self.assertLess(requests, 300)
+
+    def test_device_moved_to_another_storage_group(self):
+        self.run_inventory()
+        self.server.dataset.changes[5] = {'storageGroupId': ['SG_HOST_6']}
+        volumes, state, _ = self.run_inventory()
+
+        self.assertEqual((state.changed, state.reused), (1, 1499))
+        self.assertEqual(volumes['00005']['storageGroupId'], ['SG_HOST_6'])
+
+    def test_small_array(self):
+        server = servers()['vmax']
+        for run in range(2):
+            state = TDEVState(self.directory, VMAX_ID)
+            vmax = VMAXArrayFactory(VMAX_ID, '127.0.0.1', 'smc', 'smc',
+                                    state=state, port=server.port)
+            self.assertEqual(len(vmax.get_thin_volumes()), 50)
+            vmax.close()
+        # More values to check than devices : all requested again
+        self.assertEqual((state.changed, state.reused), (50, 0))
+
+    def test_reused_devices_marked(self):
+        self.run_inventory()
+        self.server.dataset.changes[3] = {'cap_gb': 1024.0}
+        volumes, _, _ = self.run_inventory()
+
+        rows = {row[1]: row.value('reused_from')
+                for row in VMAXIncrementalThinDevice(volumes.values(), VMAX_ID)}
+        self.assertEqual(rows['00003'], '')
+        self.assertNotEqual(rows['00004'], '')
+
+    def test_storagegroup_needs_state(self):
+        with self.assertRaises(ConfigurationError):
+            VMAXArrayFactory(VMAX_ID, '127.0.0.1', 'smc', 'smc',
+                             strategy='storagegroup', port=self.server.port)
+
+    def test_storagegroup_strategy(self):
+        for run in range(2):
+            state = TDEVState(self.directory, VMAX_ID)
+            vmax = VMAXArrayFactory(VMAX_ID, '127.0.0.1', 'smc', 'smc',
+                                    workers=4, state=state,
+                                    strategy='storagegroup',
+                                    port=self.server.port)
+            volumes = vmax.get_thin_volumes()
+            vmax.close()
+        self.assertEqual(len(volumes), 1500)
+        self.assertEqual(state.reused, 1500)
+
+    def test_storagegroup_strategy_asyncio(self):
+        for run in range(2):
+            state = TDEVState(self.directory, VMAX_ID)
+            vmax = VMAXArrayFactory(VMAX_ID, '127.0.0.1', 'smc', 'smc',
+                                    state=state, strategy='storagegroup',
+                                    port=self.server.port)
+            connector = vmax.asynchronous(concurrency=8)
+            vmax.close()
+
+            async def thin_volumes():
+                try:
+                    return await connector.get_thin_volumes()
+                finally:
+                    await connector.close()
+            requests = self.server.requests
+            volumes = asyncio.run(thin_volumes())
+        self.assertEqual(len(volumes), 1500)
+        self.assertEqual(state.reused, 1500)
+        # Lists of the storage groups and of the changes, no device requested
+        self.assertLess(self.server.requests - requests, 300)
+        self.assertTrue(all('num_of_storage_groups' in volume for volume in volumes))
+
+
+if __name__ == '__main__':
+    unittest.main()
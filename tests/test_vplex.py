@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import asyncio
+import unittest
+from arrays.async_connector import aiohttp
+from arrays.errors import VPLEXConnectionError
+from arrays.vplex.vplex_connector import VPLEXCommunicator
+from tests.mock import servers
+
+
+class ErrorStatusTest(unittest.TestCase):
+    """ The status of a response is checked before reading its context """
+
+    def connect(self, password: str):
+        vplex = VPLEXCommunicator('127.0.0.1', 'service', password,
+                                  port=servers()['vplex'].port)
+        self.addCleanup(vplex.close)
+        return vplex
+
+    def test_authentication_failure(self):
+        rows = []
+        with self.assertRaisesRegex(VPLEXConnectionError, 'Authentication failure'):
+            for row in self.connect('wrong').get_virtual_volumes():
+                rows.append(row)
+        self.assertEqual(rows, [])
+
+    def test_error_page(self):
+        with self.assertRaisesRegex(VPLEXConnectionError, 'HTTP error 404'):
+            list(self.connect('service')._send_request('unknown/*'))
+
+    @unittest.skipIf(aiohttp is None, 'needs aiohttp')
+    def test_error_page_asyncio(self):
+        async def request(vplex):
+            try:
+                return await vplex._send_request('unknown/*')
+            finally:
+                await vplex.close()
+
+        vplex = self.connect('service').asynchronous()
+        with self.assertRaisesRegex(VPLEXConnectionError, 'HTTP error 404'):
+            asyncio.run(request(vplex))
+
+        vplex = self.connect('wrong').asynchronous()
+        with self.assertRaisesRegex(VPLEXConnectionError, 'Authentication failure'):
+            asyncio.run(request(vplex))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,10 +4,19 @@
 import argparse
 import logging
 import sys
+from arrays.cache import ResponseCache
+from arrays.capture import CaptureConnector, ReplayConnector, replayable
+from arrays.columnar_injector import ColumnarInjector
+from arrays.metrics import get_metrics
+from arrays.parallel import run_async_inventories, run_inventories
 from arrays.parser import ConfigFileParser
+from arrays.process_injector import ProcessInjector
+from arrays.sqlite_injector import SQLiteInjector
+from arrays.throttle import Throttle
 from arrays.vmax.vmax_connector import VMAXArrayFactory
 from arrays.xls_injector import XlsInjector
 from arrays.vmax.vmax_inventory import VMAXInventoryCollector
+from arrays.vmax.vmax_state import TDEVState
 from arrays.errors import *
 
 __author__ = 'Julien B.'
@@ -27,31 +36,119 @@ def main(arguments):
     filename = arguments.file
     path = arguments.path if arguments.path else '.'
     try:
-        formatter = XlsInjector(directory=path, filename=filename)
-    except XlsFormatterError as error:
+        if arguments.format == 'xlsx':
+            injector, options = XlsInjector, {'streaming': arguments.streaming}
+        elif arguments.format == 'sqlite':
+            injector, options = SQLiteInjector, {}
+        else:
+            injector, options = ColumnarInjector, {'file_format': arguments.format}
+        if arguments.writer_process:
+            formatter = ProcessInjector(injector, directory=path, filename=filename,
+                                        **options)
+        else:
+            formatter = injector(directory=path, filename=filename, **options)
+    except (XlsFormatterError, ColumnarFormatterError, SQLiteFormatterError,
+            InjectorProcessError) as error:
         logger.critical('Error while creation file: %s' % error)
         sys.exit(2)
 
-    for array, address, user, password in config.get_arrays():
+    cache = None
+    if arguments.cache:
+        cache = ResponseCache(directory=arguments.cache,
+                              ttl=arguments.cache_ttl,
+                              max_size=arguments.cache_size * 1048576,
+                              refresh=arguments.refresh)
+
+    def connect(array, address, user, password, default_workers=1):
+        workers = arguments.workers or config.get_int(array, 'workers',
+                                                      default_workers)
+        state = None
+        if arguments.incremental:
+            state = TDEVState(directory=arguments.incremental, sym_id=array,
+                              max_age=arguments.max_age * 3600,
+                              refresh=arguments.refresh)
+        vmax = VMAXArrayFactory(array, address, user, password, workers=workers,
+                                pool_size=config.get_int(array, 'pool_size'),
+                                cache=cache, state=state,
+                                strategy=arguments.strategy,
+                                port=config.get_int(array, 'port', 8443),
+                                throttle=Throttle(
+                                    concurrency=workers,
+                                    rate=config.get_int(array, 'rate', 0),
+                                    retries=config.get_int(array, 'retries', 5)))
+        return vmax, workers
+
+    def record(vmax, array):
+        """ Capture the data of the VMAX if asked """
+        if arguments.capture:
+            return CaptureConnector(vmax, arguments.capture, array)
+        return vmax
+
+    def inventory(injector, array, address, user, password):
         logger.info('\nInventory of VMAX: %s' % array)
+        if arguments.replay:
+            vmax = ReplayConnector(arguments.replay, array)
+        else:
+            vmax, _ = connect(array, address, user, password)
         try:
-            vmax = VMAXArrayFactory(array, address, user, password)
-        except VmaxInventoryFactoryError as error:
-            logger.error('Can\'t generate a VMAX connector (%s)' % error)
-            sys.exit(2)
+            collector = VMAXInventoryCollector(pipeline=arguments.pipeline,
+                                               incremental=bool(arguments.incremental))
+            collector.collect(formatter=injector, array=record(vmax, array))
+        finally:
+            vmax.close()
 
+    def connect_async(array, address, user, password):
+        vmax, workers = connect(array, address, user, password, default_workers=100)
         try:
-            collector = VMAXInventoryCollector()
-            collector.collect(formatter=formatter, array=vmax)
+            return vmax.asynchronous(concurrency=workers)
+        finally:
+            vmax.close()  # Only its settings are used
 
-        except XlsFormatterError as error:
-            logger.critical('Error while writing file: %s' % error)
-            sys.exit(2)
-        except VMAXConnectionError as error:
-            logger.error('Problem : %s' % error)
-            logger.warning('Skip this one and go ahead')
-            continue
-    del formatter
+    def write(injector, vmax, array):
+        logger.info('\nInventory of VMAX: %s' % vmax)
+        collector = VMAXInventoryCollector(pipeline=arguments.pipeline,
+                                           incremental=bool(arguments.incremental))
+        collector.collect(formatter=injector, array=record(vmax, array))
+
+    arrays = config.get_arrays()
+    if arguments.replay:
+        arrays = replayable(arguments.replay, arrays)
+
+    if arguments.asyncio and not arguments.replay:
+        inventories = run_async_inventories(arrays, connect_async, write, formatter,
+                                            jobs=arguments.jobs or 0)
+    else:
+        inventories = run_inventories(arrays, inventory, formatter,
+                                      jobs=arguments.jobs or 1)
+    metrics = get_metrics()
+    try:
+        with metrics.timer('collect'):
+            for array, run in inventories:
+                try:
+                    run()
+                except ConfigurationError as error:
+                    logger.critical('Configuration error: %s' % error)
+                    sys.exit(1)
+                except VmaxInventoryFactoryError as error:
+                    logger.error('Can\'t generate a VMAX connector (%s)' % error)
+                    sys.exit(2)
+                except (XlsFormatterError, ColumnarFormatterError,
+                        SQLiteFormatterError, InjectorProcessError) as error:
+                    logger.critical('Error while writing file: %s' % error)
+                    sys.exit(2)
+                except VMAXConnectionError as error:
+                    logger.error('Problem on %s: %s' % (array, error))
+                    logger.warning('Skip this one and go ahead')
+                    continue
+        with metrics.timer('close'):
+            formatter.close()
+        if cache:
+            cache.log_statistics()
+    finally:
+        if arguments.report:
+            metrics.write_json(arguments.report)
+        if arguments.prometheus:
+            metrics.write_prometheus(arguments.prometheus)
 
 
 if __name__ == '__main__':
@@ -60,9 +157,55 @@ if __name__ == '__main__':
     parser.add_argument('-c', '--config', type=str, help='config file', required=True)
     parser.add_argument('-p', '--path', type=str, help='path to store file', required=True)
     parser.add_argument('-f', '--file', type=str, help='name of the file', required=True)
+    parser.add_argument('-w', '--workers', type=int,
+                        help='requests in flight per array (override config)')
+    parser.add_argument('--cache', type=str,
+                        help='directory of the cache of UNISPHERE responses')
+    parser.add_argument('--cache-ttl', type=int, default=86400,
+                        help='time to live of the cached responses (seconds)')
+    parser.add_argument('--cache-size', type=int, default=1024,
+                        help='maximum size of the cache (MB)')
+    parser.add_argument('--incremental', type=str,
+                        help='directory of the TDEV state of the previous runs')
+    parser.add_argument('--max-age', type=int, default=48,
+                        help='age (hours) after which a TDEV is refreshed')
+    parser.add_argument('--strategy', choices=['device', 'storagegroup'],
+                        default='device',
+                        help='collect TDEVs device by device or by storage group '
+                             '(storagegroup needs --incremental)')
+    parser.add_argument('--refresh', action='store_true', default=False,
+                        help='ignore the cache and the previous runs')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='number of arrays collected at the same time '
+                             '(the ones waiting to be written stay in memory). '
+                             'By default 1, all of them with --asyncio')
+    parser.add_argument('-a', '--asyncio', action='store_true', default=False,
+                        help='collect all the arrays with one asyncio event loop')
+    parser.add_argument('-o', '--format', choices=['xlsx', 'sqlite', 'parquet', 'arrow'],
+                        default='xlsx', help='format of the inventory (parquet '
+                                             'and arrow need pyarrow)')
+    parser.add_argument('-s', '--streaming', action='store_true', default=False,
+                        help='write the rows on disk as they come (low memory)')
+    parser.add_argument('--writer-process', action='store_true', default=False,
+                        help='encode the inventory in a process of its own')
+    parser.add_argument('--pipeline', type=int, default=0,
+                        help='sections fetched while the previous ones are '
+                             'written (0: one after the other)')
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument('--capture', type=str,
+                        help='directory where to capture the data of the arrays')
+    replay.add_argument('--replay', type=str,
+                        help='directory of a capture to replay (no network)')
+    parser.add_argument('--report', type=str,
+                        help='JSON file of the measures of the run (timings, '
+                             'requests, rows)')
+    parser.add_argument('--prometheus', type=str,
+                        help='same measures in a Prometheus textfile')
     parser.add_argument('-d', '--debug', action='store_true', default=False,
                         help='enable debug mode')
 
     args = parser.parse_args()
+    if args.strategy == 'storagegroup' and not args.incremental:
+        parser.error('--strategy storagegroup needs --incremental')
     logger.setLevel(logging.DEBUG) if args.debug else logger.setLevel(logging.INFO)
     main(args)
@@ -4,7 +4,13 @@
 import argparse
 import logging
 import sys
+from arrays.capture import CaptureConnector, ReplayConnector, replayable
+from arrays.columnar_injector import ColumnarInjector
+from arrays.metrics import get_metrics
+from arrays.parallel import run_async_inventories, run_inventories
 from arrays.parser import ConfigFileParser
+from arrays.process_injector import ProcessInjector
+from arrays.sqlite_injector import SQLiteInjector
 from arrays.vplex.vplex_connector import VPLEXCommunicator
 from arrays.xls_injector import XlsInjector
 from arrays.vplex.vplex_inventory import VPLEXInventoryCollector
@@ -27,27 +33,99 @@ def main(arguments):
     filename = arguments.file
     path = arguments.path if arguments.path else '.'
     try:
-        formatter = XlsInjector(directory=path, filename=filename)
-    except XlsFormatterError as error:
+        if arguments.format == 'xlsx':
+            injector, options = XlsInjector, {'streaming': arguments.streaming}
+        elif arguments.format == 'sqlite':
+            injector, options = SQLiteInjector, {}
+        else:
+            injector, options = ColumnarInjector, {'file_format': arguments.format}
+        if arguments.writer_process:
+            formatter = ProcessInjector(injector, directory=path, filename=filename,
+                                        **options)
+        else:
+            formatter = injector(directory=path, filename=filename, **options)
+    except (XlsFormatterError, ColumnarFormatterError, SQLiteFormatterError,
+            InjectorProcessError) as error:
         logger.critical('Error while creation file: %s' % error)
         sys.exit(2)
 
-    for array, address, user, password in config.get_arrays():
+    def connect(array, address, user, password):
+        return VPLEXCommunicator(address=address, user=user, password=password,
+                                 port=config.get_int(array, 'port', 443),
+                                 pool_size=config.get_int(array, 'pool_size', 4),
+                                 split=arguments.split)
+
+    def collector(array):
+        """
+        Collector of a VPLEX - The sections running ahead each hold a streamed
+        response : the pool keeps a connection for the section being written
+        """
+        pool_size = config.get_int(array, 'pool_size', 4)
+        return VPLEXInventoryCollector(pipeline=min(arguments.pipeline,
+                                                    pool_size - 1))
+
+    def record(vplex, array):
+        """ Capture the data of the VPLEX if asked """
+        if arguments.capture:
+            return CaptureConnector(vplex, arguments.capture, array)
+        return vplex
+
+    def inventory(injector, array, address, user, password):
         logger.info('\nInventory of VPLEX: %s' % array)
-        vplex = VPLEXCommunicator(address=address, user=user, password=password)
+        if arguments.replay:
+            vplex = ReplayConnector(arguments.replay, array)
+        else:
+            vplex = connect(array, address, user, password)
+        try:
+            collector(array).collect(formatter=injector, array=record(vplex, array))
+        finally:
+            vplex.close()
 
+    def connect_async(array, address, user, password):
+        vplex = connect(array, address, user, password)
         try:
-            collector = VPLEXInventoryCollector()
-            collector.collect(formatter=formatter, array=vplex)
+            return vplex.asynchronous(concurrency=config.get_int(array, 'pool_size', 4))
+        finally:
+            vplex.close()  # Only its settings are used
 
-        except XlsFormatterError as error:
-            logger.critical('Error while writing file: %s' % error)
-            sys.exit(2)
-        except VPLEXConnectionError as error:
-            logger.error('Problem : %s' % error)
-            logger.warning('Skip this one and go ahead')
-            continue
-    del formatter
+    def write(injector, vplex, array):
+        logger.info('\nInventory of VPLEX: %s' % vplex)
+        collector(array).collect(formatter=injector, array=record(vplex, array))
+
+    arrays = config.get_arrays()
+    if arguments.replay:
+        arrays = replayable(arguments.replay, arrays)
+
+    if arguments.asyncio and not arguments.replay:
+        inventories = run_async_inventories(arrays, connect_async, write, formatter,
+                                            jobs=arguments.jobs or 0)
+    else:
+        inventories = run_inventories(arrays, inventory, formatter,
+                                      jobs=arguments.jobs or 1)
+    metrics = get_metrics()
+    try:
+        with metrics.timer('collect'):
+            for array, run in inventories:
+                try:
+                    run()
+                except ConfigurationError as error:
+                    logger.critical('Configuration error: %s' % error)
+                    sys.exit(1)
+                except (XlsFormatterError, ColumnarFormatterError,
+                        SQLiteFormatterError, InjectorProcessError) as error:
+                    logger.critical('Error while writing file: %s' % error)
+                    sys.exit(2)
+                except VPLEXConnectionError as error:
+                    logger.error('Problem on %s: %s' % (array, error))
+                    logger.warning('Skip this one and go ahead')
+                    continue
+        with metrics.timer('close'):
+            formatter.close()
+    finally:
+        if arguments.report:
+            metrics.write_json(arguments.report)
+        if arguments.prometheus:
+            metrics.write_prometheus(arguments.prometheus)
 
 
 if __name__ == '__main__':
@@ -56,6 +134,35 @@ if __name__ == '__main__':
     parser.add_argument('-c', '--config', type=str, help='config file', required=True)
     parser.add_argument('-p', '--path', type=str, help='path to store file', required=True)
     parser.add_argument('-f', '--file', type=str, help='name of the file', required=True)
+    parser.add_argument('--split', action='store_true', default=False,
+                        help='split the storage arrays query by backend array')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='number of arrays collected at the same time '
+                             '(the ones waiting to be written stay in memory). '
+                             'By default 1, all of them with --asyncio')
+    parser.add_argument('-a', '--asyncio', action='store_true', default=False,
+                        help='collect all the arrays with one asyncio event loop')
+    parser.add_argument('-o', '--format', choices=['xlsx', 'sqlite', 'parquet', 'arrow'],
+                        default='xlsx', help='format of the inventory (parquet '
+                                             'and arrow need pyarrow)')
+    parser.add_argument('-s', '--streaming', action='store_true', default=False,
+                        help='write the rows on disk as they come (low memory)')
+    parser.add_argument('--writer-process', action='store_true', default=False,
+                        help='encode the inventory in a process of its own')
+    parser.add_argument('--pipeline', type=int, default=0,
+                        help='sections fetched while the previous ones are '
+                             'written (0: one after the other, at most '
+                             'pool_size - 1)')
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument('--capture', type=str,
+                        help='directory where to capture the data of the arrays')
+    replay.add_argument('--replay', type=str,
+                        help='directory of a capture to replay (no network)')
+    parser.add_argument('--report', type=str,
+                        help='JSON file of the measures of the run (timings, '
+                             'requests, rows)')
+    parser.add_argument('--prometheus', type=str,
+                        help='same measures in a Prometheus textfile')
     parser.add_argument('-d', '--debug', action='store_true', default=False,
                         help='enable debug mode')
 